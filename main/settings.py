@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
@@ -109,6 +110,36 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Çakışma kontrolü için süreç içi aralık önbelleği (mathmentor/interval_cache.py)
+CONFLICT_CACHE_MAX_ENTRIES = config('CONFLICT_CACHE_MAX_ENTRIES', default=256, cast=int)
+CONFLICT_CACHE_TTL = config('CONFLICT_CACHE_TTL', default=60, cast=int)  # saniye
+
+# Dashboard yanıt önbelleği (mathmentor/response_cache.py). Dosya tabanlı
+# backend aynı sunucudaki tüm gunicorn worker'larının sürümü paylaşmasını sağlar.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'mathmentor_cache')),
+    }
+}
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=300, cast=int)  # saniye
+
+# Delta sync (/api/sync/). Token'dan bu kadar öncesi de tekrar gönderilir: save
+# anında damgalanıp geç commit edilen yazmalar kaçmasın.
+SYNC_OVERLAP_SECONDS = config('SYNC_OVERLAP_SECONDS', default=60, cast=int)
+# Silme izlerinin saklanma süresi; daha eski token'lar tam senkronizasyon alır
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Haftalık programların dersleri bu kadar hafta ileriye üretilir (materialize_schedules)
+SCHEDULE_MATERIALIZE_WEEKS = config('SCHEDULE_MATERIALIZE_WEEKS', default=13, cast=int)
+
+# Boş saat önerileri (/api/lessons/free_slots/, çakışma yanıtlarındaki suggested_slots)
+WORKING_HOURS_START = config('WORKING_HOURS_START', default='09:00')
+WORKING_HOURS_END = config('WORKING_HOURS_END', default='21:00')
+FREE_SLOT_STEP_MINUTES = config('FREE_SLOT_STEP_MINUTES', default=15, cast=int)  # önerilen başlangıç aralığı
+FREE_SLOT_SEARCH_DAYS = config('FREE_SLOT_SEARCH_DAYS', default=14, cast=int)
+FREE_SLOT_COUNT = config('FREE_SLOT_COUNT', default=5, cast=int)
+
 LANGUAGE_CODE = 'tr-tr'
 TIME_ZONE = 'Europe/Istanbul'
 USE_I18N = True
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student, Assignment, Schedule, Lesson, Notification
+from .models import Student, Assignment, Schedule, Lesson, Notification, LedgerEntry
 from django.contrib.auth.admin import UserAdmin
 from .models import CustomUser
 
@@ -87,6 +87,26 @@ class NotificationAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('student', 'lesson')
 
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'entry_type', 'amount', 'lesson', 'created_at']
+    list_filter = ['entry_type', 'created_at']
+    search_fields = ['student__name', 'student__surname']
+    readonly_fields = ['student', 'lesson', 'entry_type', 'amount', 'created_at']
+    
+    # Defter sadece eklenerek ilerler; düzeltme için öğrencinin borç durumu değiştirilir
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('student', 'lesson__student')
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'is_staff', 'is_active', 'date_joined')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MathmentorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mathmentor'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - sinyal alıcılarını bağlar
@@ -0,0 +1,53 @@
+"""
+Büyük listelerin akış (streaming) olarak dışa aktarımı.
+
+Satırlar values_list().iterator(chunk_size=...) ile parça parça okunur ve
+StreamingHttpResponse'a üreteç olarak verilir; bellek kullanımı satır
+sayısından bağımsızdır ve ilk bayt sorgu biter bitmez gönderilir.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+
+class CSVRenderer(JSONRenderer):
+    """
+    ?format=csv için içerik anlaşması. Başarılı yanıtlar StreamingHttpResponse
+    olarak döner; bu renderer yalnızca hata yanıtlarını (JSON) yazar.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(JSONRenderer):
+    """?format=ndjson için içerik anlaşması (bkz. CSVRenderer)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class _Echo:
+    """csv.writer için yazılan satırı geri döndüren sahte dosya"""
+    def write(self, value):
+        return value
+
+
+def csv_rows(columns, rows):
+    writer = csv.writer(_Echo())
+    # Excel'in Türkçe karakterleri doğru açması için UTF-8 BOM
+    yield '\ufeff' + writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_rows(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+STREAMERS = {
+    'csv': csv_rows,
+    'ndjson': ndjson_rows,
+}
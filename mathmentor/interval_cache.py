@@ -0,0 +1,166 @@
+"""
+Çakışma kontrolleri için süreç içi (process-local) aralık önbelleği.
+
+Her anahtar (ders için tarih, haftalık program için haftanın günü) başlangıç
+saatine göre sıralı bir aralık listesine eşlenir; örtüşme sorgusu ikili arama
+ile O(log n) çalışır. Kayıtlar Lesson/Schedule post_save/post_delete
+sinyalleriyle (bkz. signals.py) geçersiz kılınır, LRU ile sınırlandırılır ve
+diğer süreçlerde yapılan yazmalara karşı TTL ile kendiliğinden yenilenir.
+"""
+import threading
+import time as time_module
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+
+
+class IntervalIndex:
+    """Başlangıca göre sıralı [start, end) aralıkları; örtüşme araması O(log n)"""
+
+    __slots__ = ('starts', 'ends', 'ids', 'max_ends')
+
+    def __init__(self, intervals):
+        items = sorted(intervals)
+        self.starts = [item[0] for item in items]
+        self.ends = [item[1] for item in items]
+        self.ids = [item[2] for item in items]
+
+        # max_ends[i] = ends[0..i] içindeki en büyük bitiş (azalmayan dizi)
+        self.max_ends = []
+        running_max = None
+        for end in self.ends:
+            running_max = end if running_max is None or end > running_max else running_max
+            self.max_ends.append(running_max)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def overlapping(self, start, end, exclude_id=None):
+        """start < mevcut.end AND end > mevcut.start koşulunu sağlayan kayıt id'leri"""
+        # Başlangıcı yeni bitişten önce olan adaylar: [0, hi)
+        hi = bisect_left(self.starts, end)
+        # Bitişi yeni başlangıçtan sonra olabilecek ilk aday: max_ends[lo] > start
+        lo = bisect_right(self.max_ends, start, 0, hi)
+        return [
+            self.ids[i] for i in range(lo, hi)
+            if self.ends[i] > start and self.ids[i] != exclude_id
+        ]
+
+
+class IntervalCache:
+    """Anahtar -> IntervalIndex eşlemesi; LRU tahliye, TTL ve isabet sayaçları ile"""
+
+    def __init__(self, loader, max_entries=256, ttl=60):
+        self.loader = loader  # keys -> {key: [(start, end, id), ...]}
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (loaded_at, IntervalIndex)
+        self._generation = 0  # her geçersiz kılmada artar
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.get_many([key])[key]
+
+    def get_many(self, keys):
+        """İstenen anahtarları döner; eksik olanları tek seferde yükler"""
+        result = {}
+        missing = []
+        now = time_module.monotonic()
+
+        with self._lock:
+            generation = self._generation
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    result[key] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(key)
+                    self.misses += 1
+
+        if missing:
+            loaded = self.loader(missing)
+            indexes = {key: IntervalIndex(loaded.get(key, [])) for key in missing}
+            result.update(indexes)
+
+            # Transaction içindeyken commit edilmemiş veri önbelleğe yazılmaz;
+            # yükleme sırasında geçersiz kılma olduysa sonuç da saklanmaz
+            if not connection.in_atomic_block:
+                with self._lock:
+                    if generation != self._generation:
+                        return result
+                    for key, index in indexes.items():
+                        self._entries[key] = (now, index)
+                        self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+        return result
+
+    def invalidate(self, keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0,
+            }
+
+
+def _load_lesson_intervals(dates):
+    from .models import Lesson
+
+    intervals = {}
+    rows = Lesson.objects.filter(
+        date__in=dates,
+        status__in=Lesson.ACTIVE_STATUSES
+    ).values_list('date', 'start_time', 'end_time', 'id')
+    for lesson_date, start_time, end_time, lesson_id in rows:
+        intervals.setdefault(lesson_date, []).append((start_time, end_time, lesson_id))
+    return intervals
+
+
+def _load_schedule_intervals(days_of_week):
+    from .models import Schedule
+
+    intervals = {}
+    rows = Schedule.objects.filter(
+        day_of_week__in=days_of_week,
+        is_active=True
+    ).values_list('day_of_week', 'start_time', 'end_time', 'id')
+    for day_of_week, start_time, end_time, schedule_id in rows:
+        intervals.setdefault(day_of_week, []).append((start_time, end_time, schedule_id))
+    return intervals
+
+
+# Tarih -> o günün aktif dersleri
+lesson_intervals = IntervalCache(
+    _load_lesson_intervals,
+    max_entries=getattr(settings, 'CONFLICT_CACHE_MAX_ENTRIES', 256),
+    ttl=getattr(settings, 'CONFLICT_CACHE_TTL', 60),
+)
+
+# Haftanın günü -> o günün aktif haftalık programları
+schedule_intervals = IntervalCache(
+    _load_schedule_intervals,
+    max_entries=7,
+    ttl=getattr(settings, 'CONFLICT_CACHE_TTL', 60),
+)
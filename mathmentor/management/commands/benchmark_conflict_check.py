@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from datetime import date, time, timedelta
+from decimal import Decimal
+import time as time_module
+from functools import partial
+from mathmentor.models import Student, Lesson
+
+
+class _Rollback(Exception):
+    """Benchmark verilerini geri almak için kullanılır"""
+
+
+def legacy_check_schedule_conflict(lesson_date, start_time, end_time, exclude_lesson_id=None):
+    """Eski (Python döngüsü ile) çakışma kontrolü - sadece karşılaştırma için"""
+    conflicting_lessons = Lesson.objects.filter(
+        date=lesson_date,
+        status__in=['scheduled', 'completed']
+    )
+    if exclude_lesson_id:
+        conflicting_lessons = conflicting_lessons.exclude(id=exclude_lesson_id)
+
+    for lesson in conflicting_lessons:
+        lesson_start = lesson.start_time
+        lesson_end = lesson.end_time
+        if lesson_start <= start_time < lesson_end:
+            return True, lesson
+        if lesson_start < end_time <= lesson_end:
+            return True, lesson
+        if start_time <= lesson_start and end_time >= lesson_end:
+            return True, lesson
+        if lesson_start <= start_time and lesson_end >= end_time:
+            return True, lesson
+    return False, None
+
+
+class Command(BaseCommand):
+    help = 'Çakışma kontrolünü (eski döngü vs. indeksli sorgu) yoğun bir gün üzerinde karşılaştırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lessons',
+            type=int,
+            default=3000,
+            help='Test gününe eklenecek ders sayısı (varsayılan: 3000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Her yöntem için tekrar sayısı (varsayılan: 20)'
+        )
+
+    def handle(self, *args, **options):
+        lesson_count = options['lessons']
+        repeat = options['repeat']
+
+        try:
+            with transaction.atomic():
+                self._run(lesson_count, repeat)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('\n✓ Benchmark verileri geri alındı'))
+
+    def _run(self, lesson_count, repeat):
+        student = Student.objects.create(
+            name='Benchmark', surname='Öğrenci', parent_name='-', parent_contact='-',
+            lesson_fee=Decimal('200.00')
+        )
+        test_date = date.today() + timedelta(days=3650)
+
+        # Aynı güne çakışmayan kısa dersler (20 saniyelik aralıklarla, 00:00'dan itibaren)
+        step = max(1, min(20, 20 * 3600 // max(lesson_count, 1)))
+        lessons = []
+        for i in range(lesson_count):
+            start_seconds = i * step
+            end_seconds = start_seconds + step
+            lessons.append(Lesson(
+                student=student,
+                date=test_date,
+                start_time=time(start_seconds // 3600, (start_seconds // 60) % 60, start_seconds % 60),
+                end_time=time(end_seconds // 3600, (end_seconds // 60) % 60, end_seconds % 60),
+                lesson_fee=Decimal('200.00'),
+                status='scheduled',
+            ))
+        Lesson.objects.bulk_create(lessons, batch_size=500)
+        self.stdout.write(f'{lesson_count} ders {test_date} tarihine eklendi')
+
+        # En kötü durum: günün sonunda boş bir aralık (eski yöntem tüm dersleri gezer)
+        cases = [
+            ('boş aralık', time(22, 0), time(23, 0)),
+            ('çakışan aralık', time(12, 0), time(13, 0)),
+        ]
+
+        for label, start_time, end_time in cases:
+            self.stdout.write(self.style.WARNING(f'\n▶ {label} ({start_time}-{end_time})'))
+            for name, check in (
+                ('eski döngü', legacy_check_schedule_conflict),
+                # Önbellek transaction içinde saklanmaz; ölçülen yol veritabanı sorgusudur
+                ('indeksli sorgu', partial(Lesson.check_schedule_conflict, use_cache=False)),
+            ):
+                with CaptureQueriesContext(connection) as ctx:
+                    has_conflict, conflicting_lesson = check(test_date, start_time, end_time)
+                    if conflicting_lesson is not None:
+                        str(conflicting_lesson.student)
+                queries = len(ctx.captured_queries)
+
+                started = time_module.perf_counter()
+                for _ in range(repeat):
+                    check(test_date, start_time, end_time)
+                elapsed_ms = (time_module.perf_counter() - started) * 1000 / repeat
+
+                self.stdout.write(
+                    f'  {name:<16} çakışma={has_conflict!s:<5} '
+                    f'sorgu={queries:<3} ortalama={elapsed_ms:.2f} ms'
+                )
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from datetime import date, time, timedelta
+from decimal import Decimal
+import time as time_module
+from mathmentor.models import Student, Lesson
+from mathmentor.serializers import LessonSerializer, LessonListSerializer
+
+
+class _Rollback(Exception):
+    """Benchmark verilerini geri almak için kullanılır"""
+
+
+class Command(BaseCommand):
+    help = 'Ders listesi serileştirmesini (LessonSerializer vs. LessonListSerializer) satır başına karşılaştırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lessons',
+            type=int,
+            default=2000,
+            help='Serileştirilecek ders sayısı (varsayılan: 2000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Her yöntem için tekrar sayısı (varsayılan: 5)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options['lessons'], options['repeat'])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('\n✓ Benchmark verileri geri alındı'))
+
+    def _run(self, lesson_count, repeat):
+        student = Student.objects.create(
+            name='Benchmark', surname='Öğrenci', parent_name='-', parent_contact='-',
+            lesson_fee=Decimal('200.00')
+        )
+        first_date = date.today() + timedelta(days=3650)
+        Lesson.objects.bulk_create([
+            Lesson(
+                student=student,
+                date=first_date + timedelta(days=i // 10),
+                start_time=time(8 + i % 10, 0),
+                end_time=time(9 + i % 10, 0),
+                lesson_fee=Decimal('200.00'),
+                status='scheduled',
+            )
+            for i in range(lesson_count)
+        ], batch_size=500)
+        queryset = Lesson.objects.filter(student=student).order_by('date', 'start_time')
+        self.stdout.write(f'{lesson_count} ders oluşturuldu')
+
+        expected = LessonSerializer(queryset.select_related('student'), many=True).data
+        if LessonListSerializer(queryset, many=True).data != expected:
+            self.stdout.write(self.style.ERROR('❌ Serileştirici çıktıları farklı!'))
+            return
+
+        # Sorgu süresini ayırmak için veriler önceden okunur
+        instances = list(queryset.select_related('student'))
+        rows = list(queryset.values(*LessonListSerializer.VALUES_FIELDS))
+
+        for name, serializer_class, data in (
+            ('LessonSerializer', LessonSerializer, instances),
+            ('LessonListSerializer', LessonListSerializer, rows),
+        ):
+            started = time_module.perf_counter()
+            for _ in range(repeat):
+                serializer_class(data, many=True).data
+            elapsed = time_module.perf_counter() - started
+            per_row_us = elapsed * 1_000_000 / (repeat * lesson_count)
+            self.stdout.write(f'  {name:<22} satır başına={per_row_us:.1f} µs  toplam={elapsed * 1000 / repeat:.1f} ms')
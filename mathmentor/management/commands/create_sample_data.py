@@ -220,13 +220,7 @@ class Command(BaseCommand):
                     assignments_created += 1
                     total_assignments_created += 1
             
-            # Öğrencinin borç durumunu güncelle
-            pending_amount = student.lessons.filter(
-                status='completed',
-                payment_status__in=['pending', 'overdue']
-            ).aggregate(total=models.Sum('lesson_fee'))['total'] or Decimal('0.00')
-            
-            student.debt_status = pending_amount
+            # Borç durumu dersler kaydedilirken defter (LedgerEntry) üzerinden güncellendi
             
             # Son ders bilgilerini güncelle
             last_lesson = student.lessons.filter(status='completed').order_by('-date').first()
@@ -0,0 +1,160 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import date, time, timedelta
+from decimal import Decimal
+import random
+import time as time_module
+from mathmentor.models import Student, Schedule, Lesson, Assignment, Notification
+
+
+class _Rollback(Exception):
+    """Üretilen verileri ve silinen indeksleri geri almak için kullanılır"""
+
+
+# 0011_hot_filter_indexes ile eklenen indeksler
+HOT_INDEXES = [
+    (Lesson, 'lesson_status_payment_idx'),
+    (Lesson, 'lesson_upcoming_idx'),
+    (Assignment, 'assignment_completion_idx'),
+    (Notification, 'notification_unread_idx'),
+    (Schedule, 'schedule_active_day_idx'),
+]
+
+
+def hot_queries():
+    """(başlık, queryset) - view'lardaki sık çalışan filtreler"""
+    now = timezone.now()
+    today = now.date()
+    return [
+        ('pending_payments', Lesson.objects.filter(
+            status='completed', payment_status__in=['pending', 'overdue']
+        ).order_by('-date')),
+        ('upcoming_lessons', Lesson.objects.filter(
+            Q(date__gt=today) | Q(date=today, start_time__gt=now.time()),
+            status='scheduled'
+        ).order_by('date', 'start_time')[:10]),
+        ('aylık ödenen dersler', Lesson.objects.filter(
+            status='completed', payment_status='paid', date__gte=today.replace(day=1)
+        ).order_by().values('id')),
+        ('süresi geçen ödevler', Assignment.objects.filter(
+            is_completed=False, due_date__lt=today
+        ).order_by().values('id')),
+        ('tamamlanan ödevler', Assignment.objects.filter(is_completed=True).order_by().values('id')),
+        ('okunmamış bildirimler', Notification.objects.filter(is_read=False).order_by('-created_at', 'id')[:50]),
+        ('aktif haftalık programlar', Schedule.objects.filter(
+            is_active=True, day_of_week='monday'
+        ).order_by('start_time')),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Sık kullanılan sorguların EXPLAIN planlarını yeni indekslerle ve indeksler olmadan gösterir'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lessons',
+            type=int,
+            default=100000,
+            help='Üretilecek ders sayısı (varsayılan: 100000)'
+        )
+        parser.add_argument(
+            '--students',
+            type=int,
+            default=500,
+            help='Üretilecek öğrenci sayısı (varsayılan: 500)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._generate(options['students'], options['lessons'])
+                self._analyze()
+
+                self.stdout.write(self.style.WARNING('\n═══ SONRA (yeni indekslerle) ═══'))
+                self._explain_all()
+
+                with connection.cursor() as cursor:
+                    for model, index_name in HOT_INDEXES:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(index_name)}')
+                self._analyze()
+
+                self.stdout.write(self.style.WARNING('\n═══ ÖNCE (yeni indeksler olmadan) ═══'))
+                self._explain_all()
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('\n✓ Üretilen veriler ve indeks değişiklikleri geri alındı'))
+
+    def _generate(self, student_count, lesson_count):
+        rng = random.Random(42)
+        today = date.today()
+
+        students = Student.objects.bulk_create([
+            Student(name=f'Explain{i}', surname='Öğrenci', parent_name='-', parent_contact='-',
+                    lesson_fee=Decimal('200.00'))
+            for i in range(student_count)
+        ], batch_size=1000)
+
+        statuses = ['completed'] * 6 + ['scheduled'] * 2 + ['cancelled', 'missed']
+        payment_statuses = ['paid'] * 8 + ['pending', 'overdue']
+        lessons = []
+        for _ in range(lesson_count):
+            start_hour = rng.randint(8, 21)
+            lessons.append(Lesson(
+                student=rng.choice(students),
+                date=today + timedelta(days=rng.randint(-730, 90)),
+                start_time=time(start_hour, rng.choice([0, 30])),
+                end_time=time(start_hour + 1, 0),
+                lesson_fee=Decimal('200.00'),
+                status=rng.choice(statuses),
+                payment_status=rng.choice(payment_statuses),
+            ))
+        Lesson.objects.bulk_create(lessons, batch_size=2000)
+
+        Assignment.objects.bulk_create([
+            Assignment(
+                student=rng.choice(students), book='Kitap', topic='Konu', page='1',
+                is_completed=rng.random() < 0.8,
+                due_date=today + timedelta(days=rng.randint(-365, 30))
+            )
+            for _ in range(lesson_count // 4)
+        ], batch_size=2000)
+
+        Notification.objects.bulk_create([
+            Notification(
+                student=rng.choice(students), title='Hatırlatma', message='-', notification_type='general',
+                is_read=rng.random() < 0.95, send_at=timezone.now()
+            )
+            for _ in range(lesson_count // 4)
+        ], batch_size=2000)
+
+        days = [day for day, _ in Schedule.DAYS_OF_WEEK]
+        Schedule.objects.bulk_create([
+            Schedule(
+                student=student, day_of_week=days[index % 7],
+                start_time=time(8 + index % 12, 0), end_time=time(9 + index % 12, 0),
+                is_active=rng.random() < 0.3
+            )
+            for index, student in enumerate(students)
+        ], batch_size=1000)
+
+        self.stdout.write(
+            f'{student_count} öğrenci, {lesson_count} ders, {lesson_count // 4} ödev ve bildirim üretildi'
+        )
+
+    def _analyze(self):
+        # Planlayıcının güncel istatistiklerle karar vermesi için
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _explain_all(self, repeat=5):
+        for label, queryset in hot_queries():
+            started = time_module.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed_ms = (time_module.perf_counter() - started) * 1000 / repeat
+
+            self.stdout.write(self.style.HTTP_INFO(f'\n▶ {label} (ortalama {elapsed_ms:.2f} ms)'))
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'  {line}')
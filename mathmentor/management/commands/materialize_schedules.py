@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mathmentor.models import Schedule, MaterializationJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Haftalık programların derslerini kayan bir ufka kadar üretir: önce kuyruktaki '
+        'işler (yeni programlar), sonra filigranı geride kalan aktif programlar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weeks',
+            type=int,
+            default=settings.SCHEDULE_MATERIALIZE_WEEKS,
+            help=f'Kaç hafta ileriye ders üretilecek (varsayılan: {settings.SCHEDULE_MATERIALIZE_WEEKS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Bir turda işlenecek en fazla iş / program sayısı (varsayılan: 100)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Sürekli çalış (worker): iş kalmayınca --interval kadar bekle'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='--loop modunda boş turlar arası bekleme süresi, saniye (varsayılan: 60)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.run_once(options['weeks'], options['batch_size'])
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+    def run_once(self, weeks, batch_size):
+        until = timezone.localdate() + timedelta(weeks=weeks)
+
+        job_results = MaterializationJob.run_pending(until, limit=batch_size)
+        for job, result in job_results:
+            if isinstance(result, Exception):
+                self.stdout.write(self.style.ERROR(f'❌ İş #{job.pk} (program #{job.schedule_id}): {result}'))
+            elif result is not None:
+                self.write_report(job.schedule, result)
+
+        schedule_results = Schedule.extend_horizons(until, batch_size=batch_size)
+        for schedule, report in schedule_results:
+            self.write_report(schedule, report)
+
+        processed = len(job_results) + len(schedule_results)
+        if processed:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {len(job_results)} iş, {len(schedule_results)} program işlendi ({until} tarihine kadar)'
+            ))
+        return processed
+
+    def write_report(self, schedule, report):
+        conflicts = sum(1 for skipped in report['skipped'] if skipped['reason'] == 'conflict')
+        line = f'  {schedule}: {report["created"]} ders oluşturuldu'
+        if conflicts:
+            line += f', {conflicts} tarih çakışma nedeniyle atlandı'
+        self.stdout.write(line)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+from mathmentor.models import DeletionTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delta sync için tutulan eski silme izlerini (DeletionTombstone) temizler'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help=f'Bu kadar günden eski izler silinir (varsayılan: {settings.SYNC_TOMBSTONE_RETENTION_DAYS})'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days < settings.SYNC_TOMBSTONE_RETENTION_DAYS:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {days} gün, SYNC_TOMBSTONE_RETENTION_DAYS ({settings.SYNC_TOMBSTONE_RETENTION_DAYS}) '
+                f'değerinden kısa: bu aralıktaki token\'lar silmeleri kaçırabilir'
+            ))
+
+        count = DeletionTombstone.prune(timezone.now() - timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} silme izi temizlendi'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from datetime import datetime
+from mathmentor.models import DailyLessonRollup
+
+
+class Command(BaseCommand):
+    help = 'Günlük ders özet tablosunu (DailyLessonRollup) ders kayıtlarından yeniden oluşturur'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='date_from',
+            help='Başlangıç tarihi (YYYY-MM-DD, varsayılan: tüm geçmiş)'
+        )
+        parser.add_argument(
+            '--to',
+            dest='date_to',
+            help='Bitiş tarihi (YYYY-MM-DD, varsayılan: tüm gelecek)'
+        )
+
+    def handle(self, *args, **options):
+        date_from = options['date_from']
+        date_to = options['date_to']
+        if date_from:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
+        if date_to:
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
+
+        self.stdout.write('Günlük ders özetleri yeniden oluşturuluyor...')
+        count = DailyLessonRollup.rebuild(date_from=date_from, date_to=date_to)
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} gün/saat özeti oluşturuldu'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from mathmentor.models import StudentStats
+
+
+class Command(BaseCommand):
+    help = 'Öğrenci istatistiklerini (StudentStats) ders ve ödev kayıtlarından yeniden hesaplar'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student',
+            type=int,
+            action='append',
+            dest='student_ids',
+            help='Sadece bu öğrenci(ler) için hesapla (birden fazla verilebilir)'
+        )
+
+    def handle(self, *args, **options):
+        student_ids = options['student_ids']
+
+        self.stdout.write('Öğrenci istatistikleri yeniden hesaplanıyor...')
+        count = StudentStats.rebuild(student_ids=student_ids)
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} öğrencinin istatistikleri güncellendi'))
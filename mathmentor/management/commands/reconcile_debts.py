@@ -0,0 +1,48 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from mathmentor.models import LedgerEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Öğrenci borçlarını (debt_status) tamamlanmış, ödenmemiş derslerin ücret toplamı ile '
+        'açılış bakiyesi ve elle yapılan düzeltmelerin (adjustment) toplamından hesaplanan değerle uzlaştırır'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student',
+            type=int,
+            action='append',
+            dest='student_ids',
+            help='Sadece bu öğrenci(ler) için uzlaştır (birden fazla verilebilir)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Farkları sadece raporla, veritabanını değiştirme'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=900,
+            help='Tek UPDATE sorgusunda güncellenecek en fazla öğrenci sayısı (varsayılan: 900)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        self.stdout.write('Öğrenci borçları ders kayıtlarıyla karşılaştırılıyor...')
+        checked, diffs = LedgerEntry.reconcile(
+            student_ids=options['student_ids'], dry_run=dry_run, batch_size=options['batch_size']
+        )
+
+        for pk, name, debt_status, balance in diffs:
+            self.stdout.write(f'  #{pk} {name}: {debt_status} → {balance} ({balance - debt_status:+})')
+
+        total = sum((balance - debt_status for _, _, debt_status, balance in diffs), Decimal('0.00'))
+        summary = f'{checked} öğrenci kontrol edildi, {len(diffs)} fark (toplam düzeltme: {total:+})'
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'⚠️ Deneme modu: {summary}, değişiklik yapılmadı'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ {summary} düzeltildi'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0005_lesson_book_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['date', 'status', 'start_time', 'end_time'], name='lesson_conflict_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_student_stats(apps, schema_editor):
+    Student = apps.get_model('mathmentor', 'Student')
+    StudentStats = apps.get_model('mathmentor', 'StudentStats')
+    Lesson = apps.get_model('mathmentor', 'Lesson')
+    Assignment = apps.get_model('mathmentor', 'Assignment')
+
+    stats = {pk: StudentStats(student_id=pk) for pk in Student.objects.values_list('pk', flat=True)}
+
+    lesson_rows = Lesson.objects.order_by().values('student_id', 'status', 'payment_status').annotate(
+        count=models.Count('pk'), total=models.Sum('lesson_fee')
+    )
+    for row in lesson_rows:
+        student_stats = stats[row['student_id']]
+        if row['status'] in ('scheduled', 'completed', 'cancelled', 'missed'):
+            field = f"{row['status']}_lessons"
+            setattr(student_stats, field, getattr(student_stats, field) + row['count'])
+        if row['status'] == 'completed' and row['payment_status'] in ('paid', 'pending', 'overdue'):
+            setattr(student_stats, f"{row['payment_status']}_total", row['total'] or 0)
+
+    assignment_rows = Assignment.objects.order_by().values('student_id', 'is_completed').annotate(
+        count=models.Count('pk')
+    )
+    for row in assignment_rows:
+        student_stats = stats[row['student_id']]
+        student_stats.total_assignments += row['count']
+        if row['is_completed']:
+            student_stats.completed_assignments += row['count']
+
+    StudentStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0006_lesson_conflict_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='mathmentor.student')),
+                ('scheduled_lessons', models.IntegerField(default=0)),
+                ('completed_lessons', models.IntegerField(default=0)),
+                ('cancelled_lessons', models.IntegerField(default=0)),
+                ('missed_lessons', models.IntegerField(default=0)),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pending_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('overdue_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_assignments', models.IntegerField(default=0)),
+                ('completed_assignments', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_student_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:09
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour
+
+
+def populate_lesson_rollups(apps, schema_editor):
+    Lesson = apps.get_model('mathmentor', 'Lesson')
+    DailyLessonRollup = apps.get_model('mathmentor', 'DailyLessonRollup')
+
+    aggregates = {}
+    for status in ('scheduled', 'completed', 'cancelled', 'missed'):
+        aggregates[f'{status}_count'] = Count('id', filter=Q(status=status))
+    for lesson_type in ('online', 'physical'):
+        aggregates[f'{lesson_type}_count'] = Count('id', filter=Q(lesson_type=lesson_type))
+    for payment_status in ('paid', 'pending', 'overdue'):
+        payment_filter = Q(status='completed', payment_status=payment_status)
+        aggregates[f'{payment_status}_count'] = Count('id', filter=payment_filter)
+        aggregates[f'{payment_status}_total'] = Sum('lesson_fee', filter=payment_filter)
+
+    rows = Lesson.objects.order_by().annotate(hour=ExtractHour('start_time')).values('date', 'hour').annotate(**aggregates)
+    DailyLessonRollup.objects.bulk_create([
+        DailyLessonRollup(date=row['date'], hour=row['hour'], **{field: row[field] or 0 for field in aggregates})
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0007_studentstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLessonRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('scheduled_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('missed_count', models.IntegerField(default=0)),
+                ('online_count', models.IntegerField(default=0)),
+                ('physical_count', models.IntegerField(default=0)),
+                ('paid_count', models.IntegerField(default=0)),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('pending_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('overdue_count', models.IntegerField(default=0)),
+                ('overdue_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'ordering': ['date', 'hour'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'hour'), name='unique_lesson_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(populate_lesson_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0008_dailylessonrollup'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='assignment',
+            options={'ordering': ['-date_added', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='lesson',
+            options={'ordering': ['-date', '-start_time', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-created_at', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['-date_added', 'id'], name='assignment_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['-date', '-start_time', 'id'], name='lesson_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['-created_at', 'id'], name='notification_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0010_sync_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['is_completed', 'due_date'], name='assignment_completion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['status', 'payment_status', 'date'], name='lesson_status_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('status', 'scheduled')), fields=['date', 'start_time'], name='lesson_upcoming_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at', 'id'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['day_of_week', 'start_time'], name='schedule_active_day_idx'),
+        ),
+    ]
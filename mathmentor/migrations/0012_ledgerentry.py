@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    # Mevcut borçlar defterin açılış bakiyesi olur (replay_balances aynı değerleri verir)
+    Student = apps.get_model('mathmentor', 'Student')
+    LedgerEntry = apps.get_model('mathmentor', 'LedgerEntry')
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(student_id=pk, entry_type='adjustment', amount=debt_status)
+        for pk, debt_status in Student.objects.exclude(debt_status=0).values_list('pk', 'debt_status')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0011_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('charge', 'Ders Ücreti'), ('payment', 'Ödeme'), ('adjustment', 'Düzeltme')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='mathmentor.lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='mathmentor.student')),
+            ],
+            options={
+                'ordering': ['-created_at', 'id'],
+                'indexes': [models.Index(fields=['student', 'created_at'], name='ledger_student_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
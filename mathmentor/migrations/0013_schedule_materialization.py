@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def set_watermarks(apps, schema_editor):
+    # Mevcut programlar için filigran: şimdiye kadar üretilmiş son dersin tarihi
+    Schedule = apps.get_model('mathmentor', 'Schedule')
+    Lesson = apps.get_model('mathmentor', 'Lesson')
+    last_dates = Lesson.objects.filter(schedule__isnull=False).order_by().values('schedule').annotate(
+        last_date=models.Max('date')
+    ).values_list('schedule', 'last_date')
+    for schedule_id, last_date in last_dates:
+        Schedule.objects.filter(pk=schedule_id).update(materialized_until=last_date)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0012_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='materialized_until',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='MaterializationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('running', 'Çalışıyor'), ('done', 'Tamamlandı'), ('failed', 'Başarısız')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='materialization_jobs', to='mathmentor.schedule')),
+            ],
+            options={
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='materialization_job_idx')],
+            },
+        ),
+        migrations.RunPython(set_watermarks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mathmentor', '0013_schedule_materialization'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='entry_type',
+            field=models.CharField(choices=[('charge', 'Ders Ücreti'), ('payment', 'Ödeme'), ('adjustment', 'Düzeltme'), ('correction', 'Uzlaştırma')], max_length=10),
+        ),
+    ]
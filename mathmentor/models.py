@@ -2,7 +2,92 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
 from datetime import datetime, timedelta, date
-from django.db.models import Q
+from django.db.models import Q, F
+from django.db import transaction
+from django.core.exceptions import ValidationError
+from collections import defaultdict
+from decimal import Decimal
+
+
+class LoadedValuesMixin:
+    """
+    Veritabanından okunan alan değerlerini saklar; kaydetme sırasında eski ve
+    yeni değerleri karşılaştırıp türetilmiş tabloları (istatistik, önbellek)
+    fark (delta) ile güncellemek için kullanılır.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_current_values(self):
+        deferred_fields = self.get_deferred_fields()
+        return {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred_fields
+        }
+
+    def get_loaded_values(self):
+        """Yeni (henüz kaydedilmemiş) nesneler için None"""
+        if self._state.adding:
+            return None
+        return getattr(self, '_loaded_values', None)
+
+    def load_missing_values(self):
+        """
+        .only()/.defer() ile kısmi okunan nesnede okunmamış alanları tek sorguda
+        tamamlar (kayıt/silme öncesi çağrılmalı); ertelenmiş alanlar nesneye de
+        yazılır. Returns: tamamlanmış okunan değerler, satır yoksa None
+        """
+        loaded_values = self.get_loaded_values()
+        if loaded_values is None:
+            return None
+        missing_fields = [
+            field.attname for field in self._meta.concrete_fields if field.attname not in loaded_values
+        ]
+        if not missing_fields:
+            return loaded_values
+
+        db_values = type(self)._base_manager.filter(pk=self.pk).values(*missing_fields).first()
+        if db_values is None:
+            return None
+        loaded_values.update(db_values)
+        deferred_fields = self.get_deferred_fields()
+        for name, value in db_values.items():
+            if name in deferred_fields:
+                setattr(self, name, value)
+        return loaded_values
+
+    def get_changed_fields(self):
+        """Okunduktan sonra değişen alanlar (attname); yeni nesnelerde None"""
+        loaded_values = self.get_loaded_values()
+        if loaded_values is None:
+            return None
+        return {
+            name for name, value in self.get_current_values().items()
+            if name not in loaded_values or loaded_values[name] != value
+        }
+
+    def get_saved_values(self, update_fields=None):
+        """
+        save() sonrası veritabanındaki değerler: update_fields verildiyse
+        sadece o alanlar yazılır, diğerleri okunduğu gibi kalır
+        """
+        current_values = self.get_current_values()
+        loaded_values = self.get_loaded_values()
+        if update_fields is None or loaded_values is None:
+            return current_values
+        saved_values = dict(loaded_values)
+        for name in update_fields:
+            attname = self._meta.get_field(name).attname
+            saved_values[attname] = current_values[attname]
+        return saved_values
+
+    def refresh_loaded_values(self, values=None):
+        self._loaded_values = values if values is not None else self.get_current_values()
 
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
@@ -11,7 +96,25 @@ class CustomUser(AbstractUser):
         return self.username
 
 
-class Student(models.Model):
+class StudentQuerySet(models.QuerySet):
+    def with_stats(self):
+        """
+        Student özelliklerinin (assignment_completion_percentage, total_lessons_count,
+        total_earned, pending_payments) değerlerini StudentStats satırından tek
+        join ile ekler.
+        """
+        return self.annotate(
+            annotated_total_lessons_count=F('stats__completed_lessons'),
+            annotated_total_earned=F('stats__paid_total'),
+            annotated_pending_payments=F('stats__pending_total'),
+            annotated_total_assignments=F('stats__total_assignments'),
+            annotated_completed_assignments=F('stats__completed_assignments'),
+            # Satırı olmayan öğrenciler (LEFT JOIN -> None) için alanlar get_stats()'a düşer
+            annotated_stats_id=F('stats__student'),
+        )
+
+
+class Student(LoadedValuesMixin, models.Model):
     name = models.CharField(max_length=100)  # Öğrenci adı
     surname = models.CharField(max_length=100)  # Öğrenci soyadı
     parent_name = models.CharField(max_length=100)  # Veli adı
@@ -23,34 +126,216 @@ class Student(models.Model):
     last_lesson_date = models.DateField(blank=True, null=True)  # Son ders tarihi
     notes = models.TextField(blank=True, null=True)  # Öğrenci notları
     created_at = models.DateTimeField(auto_now_add=True)  # Kayıt tarihi
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Son değişiklik (delta sync)
+
+    objects = StudentQuerySet.as_manager()
+
+    def get_stats(self):
+        """Öğrencinin StudentStats satırı; eksikse yeniden hesaplanır"""
+        try:
+            return self.stats
+        except StudentStats.DoesNotExist:
+            StudentStats.rebuild(student_ids=[self.pk])
+            self.stats = StudentStats.objects.get(student_id=self.pk)
+            return self.stats
 
     @property
     def assignment_completion_percentage(self):
-        total_assignments = self.assignments.count()
-        completed_assignments = self.assignments.filter(is_completed=True).count()
-        if total_assignments == 0:
+        stats = self.get_stats()
+        if stats.total_assignments == 0:
             return 0
-        return (completed_assignments / total_assignments) * 100
+        return (stats.completed_assignments / stats.total_assignments) * 100
 
     @property
     def total_lessons_count(self):
-        return self.lessons.filter(status='completed').count()
+        return self.get_stats().completed_lessons
 
     @property
     def total_earned(self):
-        return self.lessons.filter(status='completed', payment_status='paid').aggregate(
-            total=models.Sum('lesson_fee'))['total'] or 0
+        return self.get_stats().paid_total or 0
 
     @property
     def pending_payments(self):
-        return self.lessons.filter(status='completed', payment_status='pending').aggregate(
-            total=models.Sum('lesson_fee'))['total'] or 0
+        return self.get_stats().pending_total or 0
 
     def __str__(self):
         return f"{self.name} {self.surname}"
 
+    def save(self, *args, **kwargs):
+        """
+        debt_status bakiyesi LedgerEntry kayıtlarıyla F() ifadesiyle güncellenir;
+        normal kaydetme onu yazmaz (eşzamanlı ders tamamlamaları kaybolmasın).
+        Elle yapılan değişiklik fark kadar bir düzeltme (adjustment) kaydına dönüşür.
+        """
+        if self._state.adding:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if self.debt_status:
+                    LedgerEntry.record_opening_balance(self)
+            self.refresh_loaded_values()
+            return
+
+        update_fields = kwargs.pop('update_fields', None)
+        if update_fields is None:
+            deferred_fields = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred_fields
+            ]
+        update_fields = [name for name in update_fields if name != 'debt_status']
+
+        loaded_values = self.get_loaded_values() or {}
+        if 'debt_status' not in loaded_values:
+            # Okunmamış / ertelenmiş bakiye: elle değişiklik tespit edilemez, yazılmaz
+            super().save(*args, update_fields=update_fields, **kwargs)
+            self.refresh_loaded_values()
+            return
+
+        debt_change = Decimal(str(self.debt_status or 0)) - Decimal(str(loaded_values['debt_status'] or 0))
+        with transaction.atomic():
+            super().save(*args, update_fields=update_fields, **kwargs)
+            if debt_change:
+                LedgerEntry.post([LedgerEntry(student_id=self.pk, entry_type='adjustment', amount=debt_change)])
+                self.debt_status = Student.objects.values_list('debt_status', flat=True).get(pk=self.pk)
+        self.refresh_loaded_values()
 
-class Schedule(models.Model):
+
+class StudentStats(models.Model):
+    """
+    Öğrenci başına ders/ödeme/ödev toplamları. Lesson ve Assignment yazmalarıyla
+    aynı transaction içinde fark (delta) olarak güncellenir; okuma tek satırdır.
+    Onarım için: python manage.py rebuild_student_stats
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    scheduled_lessons = models.IntegerField(default=0)
+    completed_lessons = models.IntegerField(default=0)
+    cancelled_lessons = models.IntegerField(default=0)
+    missed_lessons = models.IntegerField(default=0)
+    # Tamamlanan derslerin ödeme durumuna göre ücret toplamları
+    paid_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    overdue_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_assignments = models.IntegerField(default=0)
+    completed_assignments = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    LESSON_STATUS_FIELDS = {
+        'scheduled': 'scheduled_lessons',
+        'completed': 'completed_lessons',
+        'cancelled': 'cancelled_lessons',
+        'missed': 'missed_lessons',
+    }
+
+    PAYMENT_TOTAL_FIELDS = {
+        'paid': 'paid_total',
+        'pending': 'pending_total',
+        'overdue': 'overdue_total',
+    }
+
+    def __str__(self):
+        return f"{self.student} istatistikleri"
+
+    @property
+    def total_lessons(self):
+        return self.scheduled_lessons + self.completed_lessons + self.cancelled_lessons + self.missed_lessons
+
+    @classmethod
+    def _lesson_contribution(cls, values):
+        counters = {}
+        status_field = cls.LESSON_STATUS_FIELDS.get(values['status'])
+        if status_field:
+            counters[status_field] = 1
+        total_field = cls.PAYMENT_TOTAL_FIELDS.get(values['payment_status'])
+        if values['status'] == 'completed' and total_field:
+            counters[total_field] = Decimal(values['lesson_fee'] or 0)
+        return counters
+
+    @classmethod
+    def _assignment_contribution(cls, values):
+        return {
+            'total_assignments': 1,
+            'completed_assignments': 1 if values['is_completed'] else 0,
+        }
+
+    @classmethod
+    def _apply_changes(cls, changes, contribution):
+        """changes: [(eski_değerler|None, yeni_değerler|None), ...]"""
+        deltas = defaultdict(lambda: defaultdict(int))
+        for old_values, new_values in changes:
+            for values, sign in ((old_values, -1), (new_values, 1)):
+                if not values:
+                    continue
+                for field, amount in contribution(values).items():
+                    deltas[values['student_id']][field] += sign * amount
+
+        missing_student_ids = []
+        for student_id, fields in deltas.items():
+            updates = {field: F(field) + amount for field, amount in fields.items() if amount}
+            if updates:
+                updates['updated_at'] = timezone.now()
+                if not cls.objects.filter(student_id=student_id).update(**updates):
+                    missing_student_ids.append(student_id)
+
+        # Satırı olmayan öğrenciler (bulk_create, fixture, ham SQL ile eklenenler):
+        # fark uygulanamaz; yazma sonrası durumdan yeniden hesaplanır
+        if missing_student_ids:
+            cls.rebuild(student_ids=missing_student_ids)
+
+    @classmethod
+    def apply_lesson_changes(cls, changes):
+        cls._apply_changes(changes, cls._lesson_contribution)
+
+    @classmethod
+    def apply_assignment_changes(cls, changes):
+        cls._apply_changes(changes, cls._assignment_contribution)
+
+    @classmethod
+    def rebuild(cls, student_ids=None):
+        """İstatistikleri sıfırdan, tek gruplu sorgu ile yeniden hesaplar"""
+        students = Student.objects.order_by()
+        if student_ids is not None:
+            students = students.filter(pk__in=student_ids)
+
+        assignments = Assignment.objects.filter(student=models.OuterRef('pk')).order_by().values('student')
+        lesson_aggregates = {
+            field: models.Count('lessons', filter=Q(lessons__status=status))
+            for status, field in cls.LESSON_STATUS_FIELDS.items()
+        }
+        lesson_aggregates.update({
+            field: models.Sum(
+                'lessons__lesson_fee',
+                filter=Q(lessons__status='completed', lessons__payment_status=payment_status)
+            )
+            for payment_status, field in cls.PAYMENT_TOTAL_FIELDS.items()
+        })
+        rows = students.annotate(
+            **{f'stat_{field}': aggregate for field, aggregate in lesson_aggregates.items()},
+            stat_total_assignments=models.Subquery(
+                assignments.annotate(count=models.Count('pk')).values('count')
+            ),
+            stat_completed_assignments=models.Subquery(
+                assignments.filter(is_completed=True).annotate(count=models.Count('pk')).values('count')
+            ),
+        ).values('pk', *[f'stat_{field}' for field in lesson_aggregates],
+                 'stat_total_assignments', 'stat_completed_assignments')
+
+        stats = [
+            cls(student_id=row['pk'], **{
+                field: row[f'stat_{field}'] or 0
+                for field in [*lesson_aggregates, 'total_assignments', 'completed_assignments']
+            })
+            for row in rows
+        ]
+        update_fields = [*lesson_aggregates, 'total_assignments', 'completed_assignments', 'updated_at']
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                stats, batch_size=1000,
+                update_conflicts=True, unique_fields=['student'], update_fields=update_fields
+            )
+        return len(stats)
+
+
+class Schedule(LoadedValuesMixin, models.Model):
     DAYS_OF_WEEK = [
         ('monday', 'Pazartesi'),
         ('tuesday', 'Salı'),
@@ -72,104 +357,373 @@ class Schedule(models.Model):
     end_time = models.TimeField()
     lesson_type = models.CharField(max_length=10, choices=LESSON_TYPE_CHOICES, default='physical')
     is_active = models.BooleanField(default=True)
+    # Bu tarihe kadar (dahil) dersler üretildi; materialize_schedules ileri taşır
+    materialized_until = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ['student', 'day_of_week', 'start_time']
+        indexes = [
+            # Aktif programlar gün/saat sırasıyla (liste, çakışma önbelleği yüklemesi)
+            models.Index(fields=['day_of_week', 'start_time'], name='schedule_active_day_idx', condition=Q(is_active=True)),
+        ]
 
     def __str__(self):
         return f"{self.student.name} - {self.get_day_of_week_display()} {self.start_time}"
+
+    @staticmethod
+    def check_schedule_conflict(day_of_week, start_time, end_time, exclude_schedule_id=None, use_cache=False):
+        """
+        Aynı gün ve saatte başka aktif haftalık program olup olmadığını kontrol eder
+        use_cache: günün aralıklarını süreç içi önbellekten (interval_cache) oku; önbellek
+        diğer süreçlerin yazmalarını TTL kadar geç görür, yazma öncesi kontrollerde kullanılmaz
+        Returns: (has_conflict, conflicting_schedule)
+        """
+        from .interval_cache import schedule_intervals
+
+        conflicting_schedules = Schedule.objects.select_related('student').filter(
+            day_of_week=day_of_week,
+            is_active=True,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        ).order_by('start_time')
+        if exclude_schedule_id:
+            conflicting_schedules = conflicting_schedules.exclude(id=exclude_schedule_id)
+
+        if not use_cache:
+            conflicting_schedule = conflicting_schedules.first()
+            return conflicting_schedule is not None, conflicting_schedule
+
+        conflicting_ids = schedule_intervals.get(day_of_week).overlapping(
+            start_time, end_time, exclude_schedule_id
+        )
+        if not conflicting_ids:
+            return False, None
+
+        conflicting_schedule = conflicting_schedules.filter(id__in=conflicting_ids).first()
+        if conflicting_schedule is None:
+            # Önbellek başka bir süreçteki değişikliği henüz görmemiş olabilir
+            return Schedule.check_schedule_conflict(
+                day_of_week, start_time, end_time, exclude_schedule_id, use_cache=False
+            )
+        return True, conflicting_schedule
     
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        # Yeni schedule oluşturulduğunda periyodik dersler oluştur
-        if is_new and self.is_active:
-            self.create_recurring_lessons()
-    
+        loaded_values = self.get_loaded_values()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Yeni veya yeniden aktifleşen programın dersleri arka planda üretilir
+            # (materialize_schedules); istek ders üretimini beklemez
+            if self.is_active and (loaded_values is None or not loaded_values.get('is_active')):
+                MaterializationJob.enqueue(self)
+        self.refresh_loaded_values()
+
+    def materialize(self, until):
+        """
+        Dersleri materialized_until'den verilen tarihe (dahil) kadar üretir.
+        Filigran karşılaştır-ve-değiştir ile ilerletilir: aynı aralığı eşzamanlı
+        işleyen ikinci süreç 0 satır günceller ve hiçbir şey üretmez.
+        Returns: generate_recurring_lessons raporu veya yapılacak iş yoksa None
+        """
+        from .scheduling import occurrence_dates, generate_recurring_lessons
+
+        # Bugünden sonraki ilk ders gününden başla (bugün hariç)
+        start_date = timezone.localdate() + timedelta(days=1)
+        if self.materialized_until is not None:
+            start_date = max(start_date, self.materialized_until + timedelta(days=1))
+        if not self.is_active or start_date > until:
+            return None
+
+        with transaction.atomic():
+            claimed = Schedule.objects.filter(pk=self.pk, is_active=True)
+            if self.materialized_until is None:
+                claimed = claimed.filter(materialized_until__isnull=True)
+            else:
+                claimed = claimed.filter(materialized_until=self.materialized_until)
+            if not claimed.update(materialized_until=until):
+                return None
+            report = generate_recurring_lessons(self, occurrence_dates(self.day_of_week, start_date, until))
+        self.materialized_until = until
+        return report
+
+    def materialize_occurrence(self, occurrence_date):
+        """
+        Takvimdeki tek bir sanal tekrarı gerçek derse dönüştürür (düzenleme,
+        tamamlama veya ödeme öncesi). Ders zaten varsa onu döner.
+        Returns: (ders, oluşturuldu_mu); çakışmada LessonConflictError
+        """
+        from .scheduling import DAY_MAPPING
+
+        if not self.is_active:
+            raise ValidationError('Program aktif değil')
+        if occurrence_date.weekday() != DAY_MAPPING[self.day_of_week]:
+            raise ValidationError('Tarih programın gününe denk gelmiyor')
+
+        existing_lesson = Lesson.objects.filter(
+            student_id=self.student_id, date=occurrence_date, start_time=self.start_time
+        ).first()
+        if existing_lesson is not None:
+            return existing_lesson, False
+
+        lesson = Lesson(
+            student=self.student,
+            schedule=self,
+            date=occurrence_date,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            lesson_type=self.lesson_type,
+            lesson_fee=self.student.lesson_fee or 0,
+            status='scheduled',
+            payment_status='pending'
+        )
+        lesson.save()
+        return lesson, True
+
+    # Programdan derslere taşınan alanlar (bkz. propagate_to_lessons)
+    PROPAGATED_FIELDS = ('day_of_week', 'start_time', 'end_time', 'lesson_type')
+
+    def propagate_to_lessons(self, old_values):
+        """
+        Program değişikliğini (gün, saat, ders tipi) bu programa bağlı gelecekteki
+        planlanmış derslere tek transaction içinde uygular: dersler aynı hafta
+        içinde yeni güne taşınır, tek toplu çakışma kontrolü ve tek bulk_update.
+        old_values: değişiklik öncesi PROPAGATED_FIELDS değerleri
+        Returns: {'moved': int, 'not_moved': [{'id', 'date', 'reason', ...}]}
+        """
+        from .scheduling import DAY_MAPPING, find_batch_conflicts
+        from .signals import lessons_bulk_changed
+
+        report = {'moved': 0, 'not_moved': []}
+        if all(old_values[field] == getattr(self, field) for field in self.PROPAGATED_FIELDS):
+            return report
+
+        today = timezone.localdate()
+        new_weekday = DAY_MAPPING[self.day_of_week]
+
+        with transaction.atomic():
+            lessons = list(Lesson.objects.select_for_update().filter(
+                schedule=self, status='scheduled', date__gt=today
+            ).order_by('date'))
+
+            candidates = []
+            for lesson in lessons:
+                # Hedef, dersin kendi haftasındaki yeni gün: ders elle başka bir güne
+                # taşınmış olsa bile eski gün farkı eklenmez (hafta dışına kaymaz)
+                new_date = lesson.date + timedelta(days=new_weekday - lesson.date.weekday())
+                if new_date <= today:
+                    report['not_moved'].append({'id': lesson.id, 'date': lesson.date.isoformat(), 'reason': 'past'})
+                    continue
+                lesson.date = new_date
+                lesson.start_time = self.start_time
+                lesson.end_time = self.end_time
+                lesson.lesson_type = self.lesson_type
+                candidates.append(lesson)
+
+            conflicts = find_batch_conflicts(candidates)
+            moved = [lesson for lesson in candidates if lesson.id not in conflicts]
+            for lesson in candidates:
+                if lesson.id in conflicts:
+                    report['not_moved'].append({
+                        'id': lesson.id,
+                        'date': lesson.get_loaded_values()['date'].isoformat(),
+                        'reason': 'conflict',
+                        **LessonConflictError(conflicts[lesson.id]).as_response_data(),
+                    })
+
+            if moved:
+                now = timezone.now()
+                for lesson in moved:
+                    lesson.updated_at = now
+                Lesson.objects.bulk_update(
+                    moved, ['date', 'start_time', 'end_time', 'lesson_type', 'updated_at'], batch_size=500
+                )
+                changes = [(lesson.get_loaded_values(), lesson.get_current_values()) for lesson in moved]
+                Lesson.apply_denormalized_changes(changes)
+                for lesson, (_, new_values) in zip(moved, changes):
+                    lesson.refresh_loaded_values(new_values)
+
+                lessons_bulk_changed.send(
+                    sender=Lesson,
+                    dates={values['date'] for change in changes for values in change}
+                )
+
+        report['moved'] = len(moved)
+        report['not_moved'].sort(key=lambda item: item['date'])
+        return report
+
+    @classmethod
+    def extend_horizons(cls, until, batch_size=100):
+        """
+        Filigranı verilen tarihin gerisinde kalan aktif programları (en geride
+        olan önce) bir parti halinde ilerletir. Returns: [(program, rapor), ...]
+        """
+        schedules = cls.objects.filter(is_active=True).filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=until)
+        ).select_related('student').order_by(F('materialized_until').asc(nulls_first=True), 'id')[:batch_size]
+
+        results = []
+        for schedule in schedules:
+            report = schedule.materialize(until)
+            if report is not None:
+                results.append((schedule, report))
+        return results
+
     def create_recurring_lessons(self, months_ahead=3):
         """
-        Schedule'a göre periyodik dersler oluşturur
+        Schedule'a göre periyodik dersleri hemen oluşturur (filigranı ilerletir)
         months_ahead: kaç ay ileriye dersler oluşturulacak
+        Returns: {'created': int, 'skipped': [...]} (atlanan tarihler ve nedenleri)
         """
-        day_mapping = {
-            'monday': 0,
-            'tuesday': 1,
-            'wednesday': 2,
-            'thursday': 3,
-            'friday': 4,
-            'saturday': 5,
-            'sunday': 6,
+        end_date = timezone.localdate() + timedelta(days=30 * months_ahead)
+        return self.materialize(end_date) or {'created': 0, 'skipped': []}
+
+
+class MaterializationJob(models.Model):
+    """
+    Veritabanı tabanlı iş kuyruğu: harici bir broker olmadan program derslerinin
+    arka planda üretilmesi. İşler karşılaştır-ve-değiştir UPDATE ile sahiplenilir;
+    aynı anda çalışan birden fazla materialize_schedules süreci aynı işi almaz.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('running', 'Çalışıyor'),
+        ('done', 'Tamamlandı'),
+        ('failed', 'Başarısız'),
+    ]
+
+    MAX_ATTEMPTS = 3
+    # Bu süreden uzun 'running' kalan iş (çöken süreç) yeniden sahiplenilebilir
+    STALE_AFTER = timedelta(minutes=10)
+
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='materialization_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='materialization_job_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.schedule_id} - {self.get_status_display()}"
+
+    @classmethod
+    def enqueue(cls, schedule):
+        return cls.objects.create(schedule=schedule)
+
+    @classmethod
+    def _claimable(cls, now):
+        return cls.objects.filter(
+            Q(status='pending', run_after__lte=now) |
+            Q(status='running', locked_at__lt=now - cls.STALE_AFTER)
+        )
+
+    @classmethod
+    def claim_next(cls):
+        """Sıradaki işi sahiplenir; başka süreç önce davrandıysa bir sonrakini dener"""
+        while True:
+            now = timezone.now()
+            job = cls._claimable(now).order_by('run_after', 'id').first()
+            if job is None:
+                return None
+            claimed = cls._claimable(now).filter(pk=job.pk, status=job.status, attempts=job.attempts).update(
+                status='running', locked_at=now, attempts=F('attempts') + 1
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+
+    def run(self, until):
+        try:
+            report = self.schedule.materialize(until)
+        except Exception as e:
+            failed = self.attempts >= self.MAX_ATTEMPTS
+            MaterializationJob.objects.filter(pk=self.pk).update(
+                status='failed' if failed else 'pending',
+                run_after=timezone.now() + timedelta(minutes=self.attempts),
+                last_error=str(e),
+                locked_at=None,
+            )
+            raise
+        MaterializationJob.objects.filter(pk=self.pk).update(status='done', finished_at=timezone.now(), locked_at=None)
+        return report
+
+    @classmethod
+    def run_pending(cls, until, limit=100):
+        """En fazla limit kadar bekleyen işi çalıştırır. Returns: [(iş, rapor|hata), ...]"""
+        results = []
+        for _ in range(limit):
+            job = cls.claim_next()
+            if job is None:
+                break
+            try:
+                results.append((job, job.run(until)))
+            except Exception as e:
+                results.append((job, e))
+        return results
+
+
+class LessonConflictError(ValidationError):
+    """Ders başka bir aktif dersle çakıştığında Lesson.save() tarafından fırlatılır"""
+
+    def __init__(self, conflicting_lesson, lesson=None):
+        self.conflicting_lesson = conflicting_lesson
+        self.lesson = lesson  # Reddedilen ders (boş saat önerileri için)
+        super().__init__(
+            f"Bu tarih ve saatte çakışma var! "
+            f"{conflicting_lesson.student.name} {conflicting_lesson.student.surname} "
+            f"öğrencisinin {conflicting_lesson.start_time}-{conflicting_lesson.end_time} "
+            f"saatleri arasında dersi bulunmaktadır."
+        )
+
+    def suggested_slots(self, count=None):
+        """Reddedilen dersle aynı süredeki, istenen saatten sonraki ilk boş aralıklar"""
+        from .scheduling import find_free_slots, duration_minutes
+
+        lesson = self.lesson
+        duration = duration_minutes(lesson.start_time, lesson.end_time)
+        if duration <= 0:
+            return []
+        return find_free_slots(
+            lesson.date, duration, count=count, not_before=lesson.start_time, exclude_lesson_id=lesson.pk
+        )
+
+    def as_response_data(self, suggest=False):
+        """suggest: reddedilen ders biliniyorsa 'suggested_slots' da eklenir (bir sorgu)"""
+        lesson = self.conflicting_lesson
+        data = {
+            'error': self.message,
+            'conflicting_lesson': {
+                'id': lesson.id,
+                'student_name': f'{lesson.student.name} {lesson.student.surname}',
+                'date': lesson.date.isoformat(),
+                'start_time': lesson.start_time.strftime('%H:%M'),
+                'end_time': lesson.end_time.strftime('%H:%M'),
+                'status': lesson.status
+            }
         }
-        
-        target_weekday = day_mapping[self.day_of_week]
-        
-        # Bugünden başlayarak ilk ders gününü bul
-        today = date.today()
-        days_ahead = target_weekday - today.weekday()
-        if days_ahead <= 0:  # Bugün geçti, gelecek haftayı al
-            days_ahead += 7
-        
-        first_lesson_date = today + timedelta(days=days_ahead)
-        end_date = today + timedelta(days=30 * months_ahead)  # 3 ay sonra
-        
-        current_date = first_lesson_date
-        lessons_created = 0
-        
-        while current_date <= end_date:
-            # Bu tarihte zaten ders var mı kontrol et
-            existing_lesson = Lesson.objects.filter(
-                student=self.student,
-                date=current_date,
-                start_time=self.start_time
-            ).exists()
-            
-            if not existing_lesson:
-                # Çakışma kontrolü yap
-                has_conflict, conflicting_lesson = Lesson.check_schedule_conflict(
-                    current_date, self.start_time, self.end_time
-                )
-                
-                if not has_conflict:
-                    # Ders ücreti öğrencinin varsayılan ücretinden al
-                    lesson_fee = self.student.lesson_fee or 0
-                    
-                    Lesson.objects.create(
-                        student=self.student,
-                        schedule=self,
-                        date=current_date,
-                        start_time=self.start_time,
-                        end_time=self.end_time,
-                        lesson_type=self.lesson_type,
-                        lesson_fee=lesson_fee,
-                        status='scheduled',
-                        payment_status='pending'
-                    )
-                    lessons_created += 1
-                else:
-                    # Çakışma varsa log'a yaz (opsiyonel)
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.warning(
-                        f"Çakışma nedeniyle ders oluşturulamadı: {current_date} "
-                        f"{self.start_time}-{self.end_time} ({self.student.name} {self.student.surname}) "
-                        f"- Çakışan ders: {conflicting_lesson.student.name} {conflicting_lesson.student.surname}"
-                    )
-            
-            # Bir sonraki haftaya geç
-            current_date += timedelta(days=7)
-        
-        return lessons_created
+        if suggest and self.lesson is not None:
+            data['suggested_slots'] = self.suggested_slots()
+        return data
 
 
-class Lesson(models.Model):
+class Lesson(LoadedValuesMixin, models.Model):
     STATUS_CHOICES = [
         ('scheduled', 'Planlandı'),
         ('completed', 'Tamamlandı'),
         ('cancelled', 'İptal Edildi'),
         ('missed', 'Katılmadı'),
     ]
+
+    # Çakışma kontrolünde dikkate alınan durumlar (iptal/katılmadı hariç)
+    ACTIVE_STATUSES = ['scheduled', 'completed']
     
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Bekliyor'),
@@ -196,10 +750,20 @@ class Lesson(models.Model):
     notes = models.TextField(blank=True, null=True)
     cancel_reason = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
-        ordering = ['-date', '-start_time']
+        ordering = ['-date', '-start_time', 'id']
+        indexes = [
+            # LessonPagination: (-date, -start_time, id) keyset sayfalama
+            models.Index(fields=['-date', '-start_time', 'id'], name='lesson_keyset_idx'),
+            # check_schedule_conflict: date + status eşitliği, saatlerde aralık taraması
+            models.Index(fields=['date', 'status', 'start_time', 'end_time'], name='lesson_conflict_idx'),
+            # Durum / ödeme durumu filtreleri (liste filtreleri, özet tablolarının yeniden hesaplanması)
+            models.Index(fields=['status', 'payment_status', 'date'], name='lesson_status_payment_idx'),
+            # upcoming_lessons: planlanmış dersler tarih/saat sırasıyla (kısmi indeks)
+            models.Index(fields=['date', 'start_time'], name='lesson_upcoming_idx', condition=Q(status='scheduled')),
+        ]
 
     def __str__(self):
         return f"{self.student.name} - {self.date} {self.start_time}"
@@ -216,76 +780,516 @@ class Lesson(models.Model):
         return lesson_datetime > now
 
     @staticmethod
-    def check_schedule_conflict(date, start_time, end_time, exclude_lesson_id=None):
+    def find_schedule_conflicts(date, start_time, end_time, exclude_lesson_id=None):
         """
-        Belirtilen tarih ve saat aralığında çakışma olup olmadığını kontrol eder
-        Returns: (has_conflict, conflicting_lesson)
+        Belirtilen tarih ve saat aralığıyla çakışan aktif derslerin queryset'ini döner.
+        Tek bir indeksli sorgu: mevcut.start < yeni.end AND mevcut.end > yeni.start
         """
-        from datetime import datetime, time
-        
-        # Başlangıç ve bitiş zamanlarını datetime objelerine çevir
+        from datetime import datetime
+
         if isinstance(start_time, str):
             start_time = datetime.strptime(start_time, '%H:%M').time()
         if isinstance(end_time, str):
             end_time = datetime.strptime(end_time, '%H:%M').time()
-        
-        # Aynı tarihte çakışan dersler
+
         conflicting_lessons = Lesson.objects.filter(
             date=date,
-            status__in=['scheduled', 'completed']  # İptal edilmiş dersler hariç
-        )
-        
+            status__in=Lesson.ACTIVE_STATUSES,  # İptal edilmiş dersler hariç
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        ).select_related('student').order_by('start_time')
+
         # Güncellenecek dersi hariç tut
         if exclude_lesson_id:
             conflicting_lessons = conflicting_lessons.exclude(id=exclude_lesson_id)
-        
-        for lesson in conflicting_lessons:
-            lesson_start = lesson.start_time
-            lesson_end = lesson.end_time
-            
-            # Zaman çakışması kontrolü
-            # Yeni ders başlangıcı mevcut ders aralığında mı?
-            if lesson_start <= start_time < lesson_end:
-                return True, lesson
-            # Yeni ders bitişi mevcut ders aralığında mı?
-            if lesson_start < end_time <= lesson_end:
-                return True, lesson
-            # Yeni ders mevcut dersi tamamen kapsıyor mu?
-            if start_time <= lesson_start and end_time >= lesson_end:
-                return True, lesson
-            # Mevcut ders yeni dersi tamamen kapsıyor mu?
-            if lesson_start <= start_time and lesson_end >= end_time:
-                return True, lesson
-        
-        return False, None
 
-    def save(self, *args, **kwargs):
-        # Yeni ders oluşturulurken veya mevcut ders güncellenirken çakışma kontrolü
-        if not self._state.adding or self.pk:  # Güncelleme işlemi
-            exclude_id = self.pk
-        else:  # Yeni ders
-            exclude_id = None
-            
-        has_conflict, conflicting_lesson = self.check_schedule_conflict(
-            self.date, 
-            self.start_time, 
-            self.end_time, 
-            exclude_id
+        return conflicting_lessons
+
+    @staticmethod
+    def check_schedule_conflict(date, start_time, end_time, exclude_lesson_id=None, use_cache=False):
+        """
+        Belirtilen tarih ve saat aralığında çakışma olup olmadığını kontrol eder
+        use_cache: günün aralıklarını süreç içi önbellekten (interval_cache) oku; önbellek
+        diğer süreçlerin yazmalarını TTL kadar geç görür, yazma öncesi kontrollerde kullanılmaz
+        Returns: (has_conflict, conflicting_lesson)
+        """
+        from datetime import datetime
+        from .interval_cache import lesson_intervals
+
+        if not use_cache:
+            conflicting_lesson = Lesson.find_schedule_conflicts(
+                date, start_time, end_time, exclude_lesson_id
+            ).first()
+            return conflicting_lesson is not None, conflicting_lesson
+
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+        if isinstance(start_time, str):
+            start_time = datetime.strptime(start_time, '%H:%M').time()
+        if isinstance(end_time, str):
+            end_time = datetime.strptime(end_time, '%H:%M').time()
+
+        conflicting_ids = lesson_intervals.get(date).overlapping(
+            start_time, end_time, exclude_lesson_id
         )
-        
-        if has_conflict:
-            from django.core.exceptions import ValidationError
-            raise ValidationError(
-                f"Bu tarih ve saatte çakışma var! "
-                f"{conflicting_lesson.student.name} {conflicting_lesson.student.surname} "
-                f"öğrencisinin {conflicting_lesson.start_time}-{conflicting_lesson.end_time} "
-                f"saatleri arasında dersi bulunmaktadır."
+        if not conflicting_ids:
+            return False, None
+
+        # Sadece aday satırlar veritabanında doğrulanır (tek, birincil anahtar sorgusu)
+        conflicting_lesson = Lesson.find_schedule_conflicts(
+            date, start_time, end_time, exclude_lesson_id
+        ).filter(id__in=conflicting_ids).first()
+        if conflicting_lesson is None:
+            # Önbellek başka bir süreçteki silmeyi henüz görmemiş olabilir
+            return Lesson.check_schedule_conflict(
+                date, start_time, end_time, exclude_lesson_id, use_cache=False
             )
-        
-        super().save(*args, **kwargs)
+        return True, conflicting_lesson
+
+    @staticmethod
+    def apply_denormalized_changes(changes, deleted_with_student=False):
+        """
+        Ders yazmalarını türetilmiş tablolara (StudentStats, DailyLessonRollup) ve
+        borç defterine (LedgerEntry) uygular.
+        changes: [(eski_değerler|None, yeni_değerler|None), ...] - toplu yazmalar da bunu çağırmalı
+        deleted_with_student: öğrenciyle birlikte silinen dersler; öğrencinin istatistik
+        satırı ve defteri de silindiği için sadece günlük özetler güncellenir
+        """
+        DailyLessonRollup.apply_lesson_changes(changes)
+        if deleted_with_student:
+            return
+        StudentStats.apply_lesson_changes(changes)
+        LedgerEntry.apply_lesson_changes(changes)
+
+    # Toplu işlemler: işlem adı -> atanacak alan değerleri (bkz. apply_bulk_action)
+    BULK_ACTIONS = {
+        'mark_paid': {'payment_status': 'paid'},
+        'mark_completed': {'status': 'completed'},
+        'cancel': {'status': 'cancelled'},
+    }
+
+    @classmethod
+    def apply_bulk_action(cls, lesson_ids, action, reason=''):
+        """
+        Verilen derslere tek transaction içinde toplu işlem uygular (bulk_update).
+        Aktifleşecek dersler (iptal → tamamlandı) toplu çakışma kontrolünden geçer.
+        Returns: [{'id', 'result': 'updated'|'unchanged'|'not_found'|'conflict', ...}]
+        """
+        from .scheduling import find_batch_conflicts
+        from .signals import lessons_bulk_changed
+
+        values = dict(cls.BULK_ACTIONS[action])
+        if action == 'cancel':
+            values['cancel_reason'] = reason
+
+        with transaction.atomic():
+            lessons = {
+                lesson.id: lesson
+                for lesson in cls.objects.select_for_update().select_related('student').filter(id__in=lesson_ids)
+            }
+
+            changed = []
+            for lesson in lessons.values():
+                if all(getattr(lesson, field) == value for field, value in values.items()):
+                    continue
+                for field, value in values.items():
+                    setattr(lesson, field, value)
+                changed.append(lesson)
+
+            reactivated = [
+                lesson for lesson in changed
+                if lesson.status in cls.ACTIVE_STATUSES and lesson.get_loaded_values()['status'] not in cls.ACTIVE_STATUSES
+            ]
+            conflicts = find_batch_conflicts(reactivated)
+            changed = [lesson for lesson in changed if lesson.id not in conflicts]
 
+            if changed:
+                now = timezone.now()
+                for lesson in changed:
+                    lesson.updated_at = now
+                cls.objects.bulk_update(changed, [*values, 'updated_at'], batch_size=500)
+
+                changes = [(lesson.get_loaded_values(), lesson.get_current_values()) for lesson in changed]
+                cls.apply_denormalized_changes(changes)
+                for lesson, (_, new_values) in zip(changed, changes):
+                    lesson.refresh_loaded_values(new_values)
+
+                if action == 'mark_completed':
+                    # Öğrencilerin son ders tarihini ileri taşı
+                    last_dates = {}
+                    for lesson in changed:
+                        last_dates[lesson.student_id] = max(lesson.date, last_dates.get(lesson.student_id, lesson.date))
+                    for student_id, last_date in last_dates.items():
+                        Student.objects.filter(pk=student_id).filter(
+                            Q(last_lesson_date__isnull=True) | Q(last_lesson_date__lt=last_date)
+                        ).update(last_lesson_date=last_date, updated_at=now)
+
+                lessons_bulk_changed.send(sender=cls, dates={lesson.date for lesson in changed})
+
+        changed_ids = {lesson.id for lesson in changed}
+        results = []
+        for lesson_id in lesson_ids:
+            if lesson_id not in lessons:
+                results.append({'id': lesson_id, 'result': 'not_found'})
+            elif lesson_id in conflicts:
+                results.append({
+                    'id': lesson_id,
+                    'result': 'conflict',
+                    **LessonConflictError(conflicts[lesson_id]).as_response_data(),
+                })
+            else:
+                results.append({'id': lesson_id, 'result': 'updated' if lesson_id in changed_ids else 'unchanged'})
+        return results
+
+    # Değiştiğinde çakışma kontrolü gerektiren alanlar
+    CONFLICT_FIELDS = ('date', 'start_time', 'end_time', 'status')
+
+    def needs_conflict_check(self, update_fields=None):
+        """Sadece aktif bir ders yeni oluşturulduysa, aktifleştiyse veya zamanı değiştiyse"""
+        if self.status not in self.ACTIVE_STATUSES:
+            return False
+        if update_fields is not None and not set(update_fields) & set(self.CONFLICT_FIELDS):
+            return False
+        changed_fields = self.get_changed_fields()
+        if changed_fields is None:
+            return True
+        if self._loaded_values.get('status') not in self.ACTIVE_STATUSES:
+            return True
+        return bool(changed_fields & {'date', 'start_time', 'end_time'})
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Kısmi okunan (.only()/.defer()) derslerde türetilmiş tablolar için eksik eski değerler
+        old_values = self.load_missing_values()
+
+        # Yeni ders oluşturulurken veya zamanı değişirken çakışma kontrolü.
+        # Önbellek süreç içidir; boş sonucu başka bir worker'ın yazmasını
+        # görmemiş olabilir, bu yüzden kayıttan önce her zaman veritabanına bakılır
+        if self.needs_conflict_check(update_fields):
+            exclude_id = self.pk if not self._state.adding or self.pk else None
+            has_conflict, conflicting_lesson = self.check_schedule_conflict(
+                self.date,
+                self.start_time,
+                self.end_time,
+                exclude_id,
+                use_cache=False
+            )
+            if has_conflict:
+                raise LessonConflictError(conflicting_lesson, lesson=self)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            new_values = self.get_saved_values(update_fields)
+            Lesson.apply_denormalized_changes([(old_values, new_values)])
+        self.refresh_loaded_values(new_values)
+
+
+class DailyLessonRollup(models.Model):
+    """
+    Gün + başlangıç saati bazında ders sayıları ve ücret toplamları. Lesson
+    yazmalarıyla aynı transaction içinde fark (delta) olarak güncellenir;
+    dashboard sorguları ders tablosu yerine bu tabloyu okur.
+    Yeniden oluşturmak için: python manage.py rebuild_lesson_rollups
+    """
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()  # Ders başlangıç saati (0-23)
+    scheduled_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    missed_count = models.IntegerField(default=0)
+    online_count = models.IntegerField(default=0)
+    physical_count = models.IntegerField(default=0)
+    # Tamamlanan derslerin ödeme durumuna göre sayı ve ücret toplamları
+    paid_count = models.IntegerField(default=0)
+    paid_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pending_count = models.IntegerField(default=0)
+    pending_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    overdue_count = models.IntegerField(default=0)
+    overdue_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
-class Assignment(models.Model):
+    STATUS_FIELDS = {
+        'scheduled': 'scheduled_count',
+        'completed': 'completed_count',
+        'cancelled': 'cancelled_count',
+        'missed': 'missed_count',
+    }
+
+    LESSON_TYPE_FIELDS = {
+        'online': 'online_count',
+        'physical': 'physical_count',
+    }
+
+    PAYMENT_FIELDS = {
+        'paid': ('paid_count', 'paid_total'),
+        'pending': ('pending_count', 'pending_total'),
+        'overdue': ('overdue_count', 'overdue_total'),
+    }
+
+    class Meta:
+        ordering = ['date', 'hour']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'hour'], name='unique_lesson_rollup_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00"
+
+    @classmethod
+    def counter_fields(cls):
+        fields = [*cls.STATUS_FIELDS.values(), *cls.LESSON_TYPE_FIELDS.values()]
+        for count_field, total_field in cls.PAYMENT_FIELDS.values():
+            fields += [count_field, total_field]
+        return fields
+
+    @classmethod
+    def _lesson_contribution(cls, values):
+        counters = {}
+        status_field = cls.STATUS_FIELDS.get(values['status'])
+        if status_field:
+            counters[status_field] = 1
+        type_field = cls.LESSON_TYPE_FIELDS.get(values['lesson_type'])
+        if type_field:
+            counters[type_field] = 1
+        payment_fields = cls.PAYMENT_FIELDS.get(values['payment_status'])
+        if values['status'] == 'completed' and payment_fields:
+            counters[payment_fields[0]] = 1
+            counters[payment_fields[1]] = Decimal(values['lesson_fee'] or 0)
+        return counters
+
+    @classmethod
+    def apply_lesson_changes(cls, changes):
+        """changes: [(eski_değerler|None, yeni_değerler|None), ...]"""
+        deltas = defaultdict(lambda: defaultdict(int))
+        for old_values, new_values in changes:
+            for values, sign in ((old_values, -1), (new_values, 1)):
+                if not values:
+                    continue
+                bucket = (values['date'], values['start_time'].hour)
+                for field, amount in cls._lesson_contribution(values).items():
+                    deltas[bucket][field] += sign * amount
+
+        for (bucket_date, hour), fields in deltas.items():
+            updates = {field: F(field) + amount for field, amount in fields.items() if amount}
+            if not updates:
+                continue
+            cls.objects.get_or_create(date=bucket_date, hour=hour)
+            cls.objects.filter(date=bucket_date, hour=hour).update(**updates)
+
+    @classmethod
+    def rebuild(cls, date_from=None, date_to=None):
+        """Rollup'ları ders tablosundan tek gruplu sorgu ile yeniden oluşturur"""
+        from django.db.models.functions import ExtractHour
+
+        lessons = Lesson.objects.order_by()
+        rollups = cls.objects.all()
+        if date_from:
+            lessons = lessons.filter(date__gte=date_from)
+            rollups = rollups.filter(date__gte=date_from)
+        if date_to:
+            lessons = lessons.filter(date__lte=date_to)
+            rollups = rollups.filter(date__lte=date_to)
+
+        aggregates = {}
+        for status, field in cls.STATUS_FIELDS.items():
+            aggregates[field] = models.Count('id', filter=Q(status=status))
+        for lesson_type, field in cls.LESSON_TYPE_FIELDS.items():
+            aggregates[field] = models.Count('id', filter=Q(lesson_type=lesson_type))
+        for payment_status, (count_field, total_field) in cls.PAYMENT_FIELDS.items():
+            paid_filter = Q(status='completed', payment_status=payment_status)
+            aggregates[count_field] = models.Count('id', filter=paid_filter)
+            aggregates[total_field] = models.Sum('lesson_fee', filter=paid_filter)
+
+        rows = lessons.annotate(hour=ExtractHour('start_time')).values('date', 'hour').annotate(**aggregates)
+        new_rollups = [
+            cls(date=row['date'], hour=row['hour'], **{field: row[field] or 0 for field in aggregates})
+            for row in rows
+        ]
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create(new_rollups, batch_size=1000)
+        return len(new_rollups)
+
+
+class LedgerEntry(models.Model):
+    """
+    Öğrenci borç defteri. amount borca etkidir: tamamlanan ders ücreti (charge)
+    artırır, ödeme (payment) azaltır; ters işlemler (tamamlamanın geri alınması,
+    ödenmiş dersin silinmesi) ters işaretli kayıttır. Student.debt_status bu
+    kayıtların toplamıdır ve her yazmada F() ile güncellenir; replay_balances
+    bakiyeyi defterden yeniden kurar. adjustment açılış bakiyesi ve elle yapılan
+    değişikliklerdir; correction sadece reconcile'ın yazdığı uzlaştırma farkıdır.
+    """
+    ENTRY_TYPES = [
+        ('charge', 'Ders Ücreti'),
+        ('payment', 'Ödeme'),
+        ('adjustment', 'Düzeltme'),
+        ('correction', 'Uzlaştırma'),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='ledger_entries')
+    lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, related_name='ledger_entries', null=True, blank=True)
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', 'id']
+        indexes = [
+            models.Index(fields=['student', 'created_at'], name='ledger_student_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.get_entry_type_display()} {self.amount}"
+
+    @classmethod
+    def _lesson_amounts(cls, values):
+        """Bir ders satırının borca katkısı: {'charge': ücret, 'payment': -ücret}"""
+        if values['status'] != 'completed':
+            return {}
+        fee = Decimal(values['lesson_fee'] or 0)
+        amounts = {'charge': fee}
+        if values['payment_status'] == 'paid':
+            amounts['payment'] = -fee
+        return amounts
+
+    @classmethod
+    def apply_lesson_changes(cls, changes):
+        """changes: [(eski_değerler|None, yeni_değerler|None), ...]"""
+        amounts = defaultdict(Decimal)
+        for old_values, new_values in changes:
+            # Silinen dersin id'si deftere yazılamaz (yabancı anahtar)
+            lesson_id = new_values.get('id') if new_values else None
+            for values, sign in ((old_values, -1), (new_values, 1)):
+                if not values:
+                    continue
+                for entry_type, amount in cls._lesson_amounts(values).items():
+                    amounts[(values['student_id'], lesson_id, entry_type)] += sign * amount
+
+        cls.post([
+            cls(student_id=student_id, lesson_id=lesson_id, entry_type=entry_type, amount=amount)
+            for (student_id, lesson_id, entry_type), amount in amounts.items()
+            if amount
+        ])
+
+    @classmethod
+    def post(cls, entries):
+        """Kayıtları ekler ve öğrenci bakiyelerini tek UPDATE ... SET debt_status = debt_status + x ile günceller"""
+        if not entries:
+            return
+        totals = defaultdict(Decimal)
+        for entry in entries:
+            totals[entry.student_id] += entry.amount
+
+        now = timezone.now()
+        with transaction.atomic():
+            cls.objects.bulk_create(entries, batch_size=500)
+            for student_id, total in totals.items():
+                if total:
+                    Student.objects.filter(pk=student_id).update(
+                        debt_status=F('debt_status') + total, updated_at=now
+                    )
+
+    @classmethod
+    def record_opening_balance(cls, student):
+        """Borçla oluşturulan öğrenci: bakiye zaten yazıldı, sadece defter kaydı eklenir"""
+        cls.objects.create(student=student, entry_type='adjustment', amount=student.debt_status)
+
+    @classmethod
+    def balances(cls, student_ids=None):
+        """Defterden hesaplanan bakiyeler: {öğrenci_id: toplam} (tek gruplu sorgu)"""
+        entries = cls.objects.order_by()
+        if student_ids is not None:
+            entries = entries.filter(student_id__in=student_ids)
+        return dict(entries.values('student').annotate(total=models.Sum('amount')).values_list('student', 'total'))
+
+    @classmethod
+    def replay_balances(cls, student_ids=None):
+        """Student.debt_status değerlerini defterden yeniden kurar; değişen öğrenci sayısını döner"""
+        balances = cls.balances(student_ids)
+        students = Student.objects.order_by().only('pk', 'debt_status')
+        if student_ids is not None:
+            students = students.filter(pk__in=student_ids)
+
+        now = timezone.now()
+        changed = []
+        for student in students:
+            balance = balances.get(student.pk) or Decimal('0.00')
+            if student.debt_status != balance:
+                student.debt_status = balance
+                student.updated_at = now
+                changed.append(student)
+        with transaction.atomic():
+            Student.objects.bulk_update(changed, ['debt_status', 'updated_at'], batch_size=1000)
+        return len(changed)
+
+    @classmethod
+    def reconcile(cls, student_ids=None, dry_run=False, batch_size=900):
+        """
+        Bakiyeleri ders kayıtlarıyla karşılaştırır: borç = tamamlanmış, ödenmemiş
+        derslerin ücret toplamı + açılış/elle düzeltme (adjustment) kayıtları (birer
+        gruplu sorgu). Farklar en fazla batch_size öğrencilik toplu UPDATE'lerle
+        düzeltilir; defter toplamı tutmayan öğrenciler için uzlaştırma (correction) kaydı eklenir.
+        Returns: (kontrol_edilen_öğrenci_sayısı, [(öğrenci_id, ad, kayıtlı, hesaplanan), ...])
+        """
+        with transaction.atomic():
+            students = Student.objects.order_by('pk')
+            if student_ids is not None:
+                students = students.filter(pk__in=student_ids)
+            if not dry_run:
+                # Önce öğrenciler kilitlenir: işlem sürerken gelen defter yazmaları
+                # (F() farkı) düzeltilmiş değerin üzerine uygulanır
+                students = students.select_for_update()
+            rows = list(students.values_list('pk', 'name', 'surname', 'debt_status'))
+
+            outstanding = Lesson.objects.filter(status='completed').exclude(payment_status='paid').order_by()
+            if student_ids is not None:
+                outstanding = outstanding.filter(student_id__in=student_ids)
+            totals = dict(
+                outstanding.values('student').annotate(total=models.Sum('lesson_fee')).values_list('student', 'total')
+            )
+            adjustments = cls.objects.filter(entry_type='adjustment').order_by()
+            if student_ids is not None:
+                adjustments = adjustments.filter(student_id__in=student_ids)
+            adjustment_totals = dict(
+                adjustments.values('student').annotate(total=models.Sum('amount')).values_list('student', 'total')
+            )
+            expected = {
+                pk: (Decimal(totals.get(pk) or 0) + (adjustment_totals.get(pk) or 0)).quantize(Decimal('0.01'))
+                for pk, _, _, _ in rows
+            }
+
+            diffs = [
+                (pk, f'{name} {surname}', debt_status, expected[pk])
+                for pk, name, surname, debt_status in rows
+                if debt_status != expected[pk]
+            ]
+            if dry_run:
+                return len(rows), diffs
+
+            # Bakiyeler ders ücretlerinin katlarıdır, farklı değer sayısı azdır: değer başına
+            # toplu UPDATE ... WHERE id IN (...), bulk_update'in satır başına CASE'inden çok hızlı
+            now = timezone.now()
+            ids_by_balance = defaultdict(list)
+            for pk, _, _, balance in diffs:
+                ids_by_balance[balance].append(pk)
+            for balance, ids in ids_by_balance.items():
+                for offset in range(0, len(ids), batch_size):
+                    Student.objects.filter(pk__in=ids[offset:offset + batch_size]).update(
+                        debt_status=balance, updated_at=now
+                    )
+
+            # Uzlaştırma kayıtları defter toplamını hesaplanan bakiyeye getirir (defter dışı
+            # yazmalarla kaymış bakiyelerde fark debt_status'tan farklı olabilir)
+            ledger_balances = cls.balances(student_ids)
+            cls.objects.bulk_create([
+                cls(student_id=pk, entry_type='correction', amount=balance - (ledger_balances.get(pk) or 0))
+                for pk, balance in expected.items()
+                if balance != (ledger_balances.get(pk) or 0)
+            ], batch_size=1000)
+        return len(rows), diffs
+
+
+class Assignment(LoadedValuesMixin, models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='assignments')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='assignments', null=True, blank=True)
     book = models.CharField(max_length=255)
@@ -296,9 +1300,16 @@ class Assignment(models.Model):
     due_date = models.DateField(null=True, blank=True)
     completion_date = models.DateField(null=True, blank=True)
     date_added = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
-        ordering = ['-date_added']
+        ordering = ['-date_added', 'id']
+        indexes = [
+            # AssignmentPagination: (-date_added, id) keyset sayfalama
+            models.Index(fields=['-date_added', 'id'], name='assignment_keyset_idx'),
+            # Tamamlanan / süresi geçen ödev sayıları
+            models.Index(fields=['is_completed', 'due_date'], name='assignment_completion_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.name} {self.student.surname} - {self.topic}"
@@ -309,6 +1320,13 @@ class Assignment(models.Model):
             return self.due_date < timezone.now().date()
         return False
 
+    def save(self, *args, **kwargs):
+        old_values = self.load_missing_values()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            StudentStats.apply_assignment_changes([(old_values, self.get_current_values())])
+        self.refresh_loaded_values()
+
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
@@ -327,9 +1345,47 @@ class Notification(models.Model):
     is_sent = models.BooleanField(default=False)
     send_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', 'id']
+        indexes = [
+            # NotificationPagination: (-created_at, id) keyset sayfalama
+            models.Index(fields=['-created_at', 'id'], name='notification_keyset_idx'),
+            # ?unread_only=true: okunmamış bildirimler sayfalama sırasıyla (kısmi indeks)
+            models.Index(fields=['-created_at', 'id'], name='notification_unread_idx', condition=Q(is_read=False)),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.student.name if self.student else 'Genel'}"
+
+
+class DeletionTombstone(models.Model):
+    """
+    Silinen kayıtların izi; delta sync (/api/sync/) istemcilere silmeleri
+    bu tablodan bildirir. SYNC_TOMBSTONE_RETENTION_DAYS'ten eski izler
+    prune_tombstones komutuyla temizlenir, daha eski token'lar tam senkronizasyon alır.
+    """
+    MODEL_CHOICES = [
+        ('student', 'Öğrenci'),
+        ('lesson', 'Ders'),
+        ('assignment', 'Ödev'),
+        ('schedule', 'Haftalık Program'),
+        ('notification', 'Bildirim'),
+    ]
+
+    model_name = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name} #{self.object_id} ({self.deleted_at})"
+
+    @classmethod
+    def record(cls, instance):
+        cls.objects.create(model_name=instance._meta.model_name, object_id=instance.pk)
+
+    @classmethod
+    def prune(cls, older_than):
+        deleted, _ = cls.objects.filter(deleted_at__lt=older_than).delete()
+        return deleted
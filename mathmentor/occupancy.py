@@ -0,0 +1,86 @@
+"""
+Günlük doluluk bit kümeleri.
+
+Her gün 15 dakikalık 96 dilime bölünür ve o günün dolu dilimleri tek bir
+Python int'inde tutulur (bit i = i. dilim dolu). Bir maske içindeki dolu/boş
+süre tek bir AND ve popcount ile bulunur; ders listesi üzerinde karşılaştırma
+yapılmaz. Tüm aralık tek sorguda yüklenir. Kısmi dilimler dolu sayıldığından
+bu harita sadece raporlama içindir; çakışma kontrolü Lesson.check_schedule_conflict'tedir.
+"""
+from datetime import timedelta
+
+from .scheduling import to_minutes, working_hours
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def slot_mask(start_minutes, end_minutes):
+    """[start, end) dakika aralığının değdiği dilimlerin maskesi (kısmi dilim dolu sayılır)"""
+    first = start_minutes // SLOT_MINUTES
+    last = -(-end_minutes // SLOT_MINUTES)  # yukarı yuvarla
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def interval_mask(start_time, end_time):
+    return slot_mask(to_minutes(start_time), to_minutes(end_time))
+
+
+def working_mask():
+    day_start, day_end = working_hours()
+    return slot_mask(day_start, day_end)
+
+
+class OccupancyMap:
+    """Tarih -> dolu dilim bit kümesi (int)"""
+
+    def __init__(self, date_from, date_to, bits=None):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.bits = bits or {}
+
+    @classmethod
+    def load(cls, date_from, date_to):
+        """Aralıktaki aktif derslerden tek sorguyla oluşturur"""
+        from .models import Lesson
+
+        lessons = Lesson.objects.filter(
+            date__gte=date_from, date__lte=date_to, status__in=Lesson.ACTIVE_STATUSES
+        ).order_by().values_list('date', 'start_time', 'end_time')
+
+        bits = {}
+        for lesson_date, start_time, end_time in lessons:
+            bits[lesson_date] = bits.get(lesson_date, 0) | interval_mask(start_time, end_time)
+        return cls(date_from, date_to, bits)
+
+    def dates(self):
+        current_date = self.date_from
+        while current_date <= self.date_to:
+            yield current_date
+            current_date += timedelta(days=1)
+
+    def day(self, day_date):
+        return self.bits.get(day_date, 0)
+
+    def booked_slots(self, day_date, mask=None):
+        bits = self.day(day_date)
+        if mask is not None:
+            bits &= mask
+        return bits.bit_count()
+
+    def free_minutes(self, day_date, mask=None):
+        """Maske (varsayılan: çalışma saatleri) içindeki boş süre"""
+        mask = working_mask() if mask is None else mask
+        return (mask & ~self.day(day_date)).bit_count() * SLOT_MINUTES
+
+    def free_hours(self, mask=None):
+        """Tüm aralıktaki boş saat (ör. 'bu hafta kaç saat boşum')"""
+        mask = working_mask() if mask is None else mask
+        return sum(self.free_minutes(day_date, mask) for day_date in self.dates()) / 60
+
+    def slots(self, day_date):
+        """Isı haritası için 96 elemanlı 0/1 listesi"""
+        bits = self.day(day_date)
+        return [(bits >> index) & 1 for index in range(SLOTS_PER_DAY)]
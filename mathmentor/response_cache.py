@@ -0,0 +1,78 @@
+"""
+Dashboard uç noktaları için sürümlü yanıt önbelleği.
+
+Önbellek anahtarı global bir veri sürümünü, bugünün tarihini ve isteğin tam
+yolunu içerir. Lesson, Assignment, Student ve Notification yazmaları (bkz.
+signals.py) sürümü değiştirir; böylece yazmalar arasındaki tekrar eden
+istekler veritabanına hiç gitmeden yanıtlanır. Tarih anahtarda olduğu için
+gün dönümünde (bugün / bu ay) yanıtlar kendiliğinden yenilenir.
+"""
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+
+VERSION_KEY = 'mathmentor:data-version'
+
+
+def get_data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    # Artırma yerine rastgele değer: eşzamanlı süreçlerde de her yazma yeni sürüm üretir
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def lessons_expiry(data):
+    """
+    Serileştirilmiş ders listesinde başlamamış ilk dersin başlangıç zamanı.
+    is_upcoming alanı ve 'yaklaşan dersler' filtresi bu anda değişir.
+    """
+    now = timezone.now()
+    expiry = None
+    for lesson in data:
+        naive_start = datetime.combine(
+            datetime.strptime(lesson['date'], '%Y-%m-%d').date(),
+            datetime.strptime(lesson['start_time'], '%H:%M:%S').time()
+        )
+        for start in (timezone.make_aware(naive_start), naive_start.replace(tzinfo=dt_timezone.utc)):
+            if start > now and (expiry is None or start < expiry):
+                expiry = start
+    return expiry
+
+
+def cached_response(name, expiry=None):
+    """
+    ViewSet aksiyonları için dekoratör. Sadece 200 yanıtlar saklanır.
+    expiry: yanıt verisinden geçerliliğin biteceği zamanı hesaplayan fonksiyon
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            today = timezone.now().date()
+            key = f'mathmentor:response:{name}:{get_data_version()}:{today.isoformat()}:{request.get_full_path()}'
+
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                timeout = settings.DASHBOARD_CACHE_TTL
+                expires_at = expiry(response.data) if expiry else None
+                if expires_at is not None:
+                    timeout = min(timeout, (expires_at - timezone.now()).total_seconds())
+                if timeout > 0:
+                    cache.set(key, response.data, timeout)
+            return response
+        return wrapper
+    return decorator
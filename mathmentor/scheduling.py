@@ -0,0 +1,356 @@
+"""
+Periyodik ders üretimi ve çakışma çözümleme yardımcıları.
+
+Haftalık programdan (Schedule) ders üretimi tek tek Lesson.save() çağırmak
+yerine toplu çalışır: tüm ufuk için mevcut dersler tek sorguda okunur,
+çakışmalar bellekte çözülür ve kalan dersler tek transaction içinde
+bulk_create ile eklenir. Takvim (virtual_occurrences) filigranın ötesindeki
+tekrarları satır üretmeden aynı kurallarla gösterir.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DAY_MAPPING = {
+    'monday': 0,
+    'tuesday': 1,
+    'wednesday': 2,
+    'thursday': 3,
+    'friday': 4,
+    'saturday': 5,
+    'sunday': 6,
+}
+
+
+def occurrence_dates(day_of_week, start_date, end_date):
+    """start_date ile end_date (dahil) arasında verilen haftanın gününe düşen tarihler"""
+    target_weekday = DAY_MAPPING[day_of_week]
+    current_date = start_date + timedelta(days=(target_weekday - start_date.weekday()) % 7)
+    dates = []
+    while current_date <= end_date:
+        dates.append(current_date)
+        current_date += timedelta(days=7)
+    return dates
+
+
+def _overlaps(start_a, end_a, start_b, end_b):
+    return start_a < end_b and end_a > start_b
+
+
+def generate_recurring_lessons(schedule, dates):
+    """
+    Verilen tarihler için schedule'a ait dersleri toplu olarak oluşturur.
+    Returns: {'created': int, 'skipped': [{'date', 'reason', ...}]}
+    """
+    from .models import Lesson
+
+    dates = sorted(set(dates))
+    report = {'created': 0, 'skipped': []}
+    if not dates:
+        return report
+
+    student = schedule.student
+    lesson_fee = student.lesson_fee or 0
+
+    with transaction.atomic():
+        # Tüm ufuktaki ilgili dersler tek sorguda: aynı öğrenci/saatteki dersler
+        # (her durumda) ve saat aralığı örtüşen aktif dersler
+        existing_lessons = Lesson.objects.filter(
+            date__in=dates,
+            start_time__lt=schedule.end_time,
+            end_time__gt=schedule.start_time,
+        ).select_related('student').order_by('date', 'start_time')
+
+        lessons_by_date = {}
+        for lesson in existing_lessons:
+            lessons_by_date.setdefault(lesson.date, []).append(lesson)
+
+        new_lessons = []
+        for current_date in dates:
+            day_lessons = lessons_by_date.get(current_date, [])
+
+            # Bu tarihte zaten ders var mı kontrol et
+            if any(
+                lesson.student_id == student.id and lesson.start_time == schedule.start_time
+                for lesson in day_lessons
+            ):
+                report['skipped'].append({'date': current_date.isoformat(), 'reason': 'exists'})
+                continue
+
+            # Çakışma kontrolü (iptal edilmiş dersler hariç)
+            conflicting_lesson = next((
+                lesson for lesson in day_lessons
+                if lesson.status in Lesson.ACTIVE_STATUSES
+                and _overlaps(lesson.start_time, lesson.end_time, schedule.start_time, schedule.end_time)
+            ), None)
+
+            if conflicting_lesson is not None:
+                report['skipped'].append({
+                    'date': current_date.isoformat(),
+                    'reason': 'conflict',
+                    'conflicting_lesson': {
+                        'id': conflicting_lesson.id,
+                        'student_name': f'{conflicting_lesson.student.name} {conflicting_lesson.student.surname}',
+                        'start_time': conflicting_lesson.start_time.strftime('%H:%M'),
+                        'end_time': conflicting_lesson.end_time.strftime('%H:%M'),
+                    }
+                })
+                logger.warning(
+                    f"Çakışma nedeniyle ders oluşturulamadı: {current_date} "
+                    f"{schedule.start_time}-{schedule.end_time} ({student.name} {student.surname}) "
+                    f"- Çakışan ders: {conflicting_lesson.student.name} {conflicting_lesson.student.surname}"
+                )
+                continue
+
+            new_lessons.append(Lesson(
+                student=student,
+                schedule=schedule,
+                date=current_date,
+                start_time=schedule.start_time,
+                end_time=schedule.end_time,
+                lesson_type=schedule.lesson_type,
+                lesson_fee=lesson_fee,
+                status='scheduled',
+                payment_status='pending'
+            ))
+
+        # Çakışmalar bellekte çözüldü; Lesson.save() içindeki kontrol tekrar çalışmasın
+        Lesson.objects.bulk_create(new_lessons)
+        report['created'] = len(new_lessons)
+
+        if new_lessons:
+            Lesson.apply_denormalized_changes([(None, lesson.get_current_values()) for lesson in new_lessons])
+
+            from .signals import lessons_bulk_changed
+            lessons_bulk_changed.send(sender=Lesson, dates={lesson.date for lesson in new_lessons})
+
+    return report
+
+
+def find_batch_conflicts(lessons):
+    """
+    Aktifleşecek veya taşınacak dersler için toplu çakışma kontrolü: ilgili
+    tarihlerdeki aktif dersler tek sorguda okunur, adaylar birbirleriyle de
+    karşılaştırılır (sırayla; kabul edilen aday sonrakiler için dolu sayılır).
+    lessons: yeni tarih/saat değerleri atanmış Lesson nesneleri
+    Returns: {ders_id: çakışan_ders}
+    """
+    from .models import Lesson
+
+    if not lessons:
+        return {}
+
+    candidate_ids = [lesson.id for lesson in lessons if lesson.id]
+    active_lessons = Lesson.objects.filter(
+        date__in={lesson.date for lesson in lessons},
+        status__in=Lesson.ACTIVE_STATUSES,
+    ).exclude(id__in=candidate_ids).select_related('student')
+
+    lessons_by_date = {}
+    for lesson in active_lessons:
+        lessons_by_date.setdefault(lesson.date, []).append(lesson)
+
+    conflicts = {}
+    for lesson in sorted(lessons, key=lambda item: (item.date, item.start_time)):
+        day_lessons = lessons_by_date.setdefault(lesson.date, [])
+        conflicting_lesson = next((
+            other for other in day_lessons
+            if _overlaps(other.start_time, other.end_time, lesson.start_time, lesson.end_time)
+        ), None)
+        if conflicting_lesson is not None:
+            conflicts[lesson.id] = conflicting_lesson
+        else:
+            day_lessons.append(lesson)
+    return conflicts
+
+
+def virtual_occurrences(schedules, date_from, date_to, lesson_rows):
+    """
+    Aktif programların verilen aralıkta henüz ders satırına dönüşmemiş tekrarları
+    (materialized_until filigranının ötesi, en erken yarın). generate_recurring_lessons
+    ile aynı kurallar: aynı öğrenci/saatte ders varsa veya aktif bir dersle
+    çakışıyorsa tekrar gösterilmez.
+    schedules: student'ı yüklenmiş aktif Schedule nesneleri
+    lesson_rows: aralıktaki ders satırları (student_id, date, start_time, end_time, status)
+    Returns: LessonListSerializer satır anahtarlarıyla sanal satırlar (+ 'virtual_id')
+    """
+    from .models import Lesson
+
+    lessons_by_date = {}
+    for row in lesson_rows:
+        lessons_by_date.setdefault(row['date'], []).append(row)
+
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    occurrences = []
+    for schedule in schedules:
+        start_date = max(date_from, tomorrow)
+        if schedule.materialized_until is not None:
+            start_date = max(start_date, schedule.materialized_until + timedelta(days=1))
+
+        student = schedule.student
+        for current_date in occurrence_dates(schedule.day_of_week, start_date, date_to):
+            day_lessons = lessons_by_date.get(current_date, [])
+            if any(
+                (row['student_id'] == student.id and row['start_time'] == schedule.start_time) or (
+                    row['status'] in Lesson.ACTIVE_STATUSES
+                    and _overlaps(row['start_time'], row['end_time'], schedule.start_time, schedule.end_time)
+                )
+                for row in day_lessons
+            ):
+                continue
+            occurrences.append({
+                'id': None,
+                'virtual_id': f'{schedule.id}:{current_date.isoformat()}',
+                'student__name': student.name,
+                'student__surname': student.surname,
+                'student__parent_contact': student.parent_contact,
+                'date': current_date,
+                'start_time': schedule.start_time,
+                'end_time': schedule.end_time,
+                'lesson_type': schedule.lesson_type,
+                'status': 'scheduled',
+                'payment_status': 'pending',
+                'lesson_fee': student.lesson_fee or 0,
+                'topic_covered': None,
+                'book_progress': None,
+                'notes': None,
+                'cancel_reason': None,
+                'created_at': None,
+                'updated_at': None,
+                'student_id': student.id,
+                'schedule_id': schedule.id,
+            })
+    return occurrences
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def duration_minutes(start_time, end_time):
+    return to_minutes(end_time) - to_minutes(start_time)
+
+
+def working_hours():
+    """Ayarlardaki çalışma saatleri, gün başından dakika olarak (başlangıç, bitiş)"""
+    start = datetime.strptime(settings.WORKING_HOURS_START, '%H:%M').time()
+    end = datetime.strptime(settings.WORKING_HOURS_END, '%H:%M').time()
+    return to_minutes(start), to_minutes(end)
+
+
+def sweep_free_slots(intervals, duration, not_before=None, limit=None):
+    """
+    Başlangıca göre sıralı dolu aralıklar (dakika) üzerinde tek geçişlik tarama:
+    çalışma saatleri içindeki boşluklara sığan, FREE_SLOT_STEP_MINUTES'a hizalı
+    başlangıçlar. Returns: [başlangıç_dakika, ...]
+    """
+    if duration <= 0:
+        return []
+    day_start, day_end = working_hours()
+    step = settings.FREE_SLOT_STEP_MINUTES
+    cursor = max(day_start, not_before or day_start)
+    starts = []
+    for busy_start, busy_end in [*intervals, (day_end, day_end)]:
+        gap_end = min(busy_start, day_end)
+        # Boşluğun başını çalışma saati başlangıcına göre adım katına yuvarla
+        slot = day_start + -(-(cursor - day_start) // step) * step
+        while slot + duration <= gap_end:
+            starts.append(slot)
+            if limit is not None and len(starts) >= limit:
+                return starts
+            slot += step
+        cursor = max(cursor, busy_end)
+        if cursor >= day_end:
+            break
+    return starts
+
+
+def find_free_slots(start_date, duration, count=None, not_before=None, days=None, exclude_lesson_id=None):
+    """
+    start_date'ten itibaren (en fazla days gün) aktif derslerle çakışmayan ilk
+    count boş aralık. Günler süreç içi aralık önbelleğinden, eksikler tek sorguyla okunur.
+    not_before: start_date günü için en erken başlangıç saati
+    Returns: [{'date', 'start_time', 'end_time'}, ...]
+    """
+    from .interval_cache import lesson_intervals
+
+    count = count or settings.FREE_SLOT_COUNT
+    days = days or settings.FREE_SLOT_SEARCH_DAYS
+    # Bugün için geçmiş saatler önerilmez
+    local_now = timezone.localtime()
+    if start_date == local_now.date():
+        not_before = max(not_before or time.min, local_now.time().replace(second=0, microsecond=0))
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+
+    # Öneriler süreç içi önbellekten okunur (eksik günler tek sorguda yüklenir);
+    # bayat bir öneri kayıtta Lesson.save() içindeki veritabanı kontrolüne takılır
+    indexes = lesson_intervals.get_many(dates)
+
+    slots = []
+    for offset, current_date in enumerate(dates):
+        index = indexes[current_date]
+        intervals = [
+            (to_minutes(start_time), to_minutes(end_time))
+            for start_time, end_time, lesson_id in zip(index.starts, index.ends, index.ids)
+            if lesson_id != exclude_lesson_id
+        ]
+        starts = sweep_free_slots(
+            intervals, duration,
+            not_before=to_minutes(not_before) if not_before and offset == 0 else None,
+            limit=count - len(slots),
+        )
+        slots.extend({
+            'date': current_date.isoformat(),
+            'start_time': from_minutes(start).strftime('%H:%M'),
+            'end_time': from_minutes(start + duration).strftime('%H:%M'),
+        } for start in starts)
+        if len(slots) >= count:
+            break
+    return slots
+
+
+def find_free_schedule_slots(day_of_week, duration, count=None, not_before=None, exclude_schedule_id=None):
+    """
+    Haftalık program için boş aralıklar: önce istenen gün, sonra haftanın
+    sonraki günleri. Aktif programlar aralık önbelleğinden (eksikse tek sorguda) okunur.
+    Returns: [{'day_of_week', 'start_time', 'end_time'}, ...]
+    """
+    from .interval_cache import schedule_intervals
+
+    count = count or settings.FREE_SLOT_COUNT
+    day_names = list(DAY_MAPPING)
+    # Programlar süreç içi önbellekten (bkz. find_free_slots)
+    indexes = schedule_intervals.get_many(day_names)
+
+    first_index = DAY_MAPPING[day_of_week]
+    slots = []
+    for offset in range(7):
+        current_day = day_names[(first_index + offset) % 7]
+        index = indexes[current_day]
+        intervals = [
+            (to_minutes(start_time), to_minutes(end_time))
+            for start_time, end_time, schedule_id in zip(index.starts, index.ends, index.ids)
+            if schedule_id != exclude_schedule_id
+        ]
+        starts = sweep_free_slots(
+            intervals, duration,
+            not_before=to_minutes(not_before) if not_before and offset == 0 else None,
+            limit=count - len(slots),
+        )
+        slots.extend({
+            'day_of_week': current_day,
+            'start_time': from_minutes(start).strftime('%H:%M'),
+            'end_time': from_minutes(start + duration).strftime('%H:%M'),
+        } for start in starts)
+        if len(slots) >= count:
+            break
+    return slots
@@ -1,17 +1,87 @@
+from datetime import datetime
+
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Student, Assignment, Schedule, Lesson, Notification
 
-class StudentSerializer(serializers.ModelSerializer):
-    assignment_completion_percentage = serializers.ReadOnlyField()
-    total_lessons_count = serializers.ReadOnlyField()
-    total_earned = serializers.ReadOnlyField()
-    pending_payments = serializers.ReadOnlyField()
+def has_stats_annotation(instance, annotation):
+    """with_stats() annotation'ı var ve öğrencinin StudentStats satırı mevcut mu"""
+    return hasattr(instance, annotation) and getattr(instance, 'annotated_stats_id', None) is not None
+
+class AnnotatedReadOnlyField(serializers.ReadOnlyField):
+    """
+    Queryset'te annotation varsa onu, yoksa model özelliğini okur
+    (bkz. StudentQuerySet.with_stats)
+    """
+    def __init__(self, annotation, **kwargs):
+        self.annotation = annotation
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if not has_stats_annotation(instance, self.annotation):
+            return super().get_attribute(instance)
+        return getattr(instance, self.annotation) or 0
+
+class CompletionPercentageField(serializers.ReadOnlyField):
+    """Ödev tamamlama yüzdesi; annotation varsa ek sorgu yapmaz"""
+    def get_attribute(self, instance):
+        if not has_stats_annotation(instance, 'annotated_total_assignments'):
+            return super().get_attribute(instance)
+        total_assignments = instance.annotated_total_assignments or 0
+        completed_assignments = instance.annotated_completed_assignments or 0
+        if total_assignments == 0:
+            return 0
+        return (completed_assignments / total_assignments) * 100
+
+class SparseFieldsetMixin:
+    """
+    ?fields= / ?omit= / ?expand= desteği. Seçimler view tarafından context'e
+    konur (bkz. views.SparseFieldsetViewMixin); iç içe serializer'lar etkilenmez.
+    deferrable_fields: istenmediğinde sorguda defer edilebilecek büyük alanlar
+    """
+    deferrable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self._context.get('fields')
+        omit = self._context.get('omit', ())
+        expand = self._context.get('expand', ())
+
+        expandable_fields = self.get_expandable_fields()
+        for name in expand:
+            if name in expandable_fields:
+                self.fields[name] = expandable_fields[name]
+
+        for name in list(self.fields):
+            if name in omit or (fields and name not in fields and name not in expand):
+                self.fields.pop(name)
+
+    def get_expandable_fields(self):
+        return {}
+
+class StudentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # with_stats() annotation'ı gerektiren hesaplanan alanlar
+    COMPUTED_FIELDS = ('assignment_completion_percentage', 'total_lessons_count', 'total_earned', 'pending_payments')
+    deferrable_fields = ('notes',)
+
+    assignment_completion_percentage = CompletionPercentageField()
+    total_lessons_count = AnnotatedReadOnlyField('annotated_total_lessons_count')
+    total_earned = AnnotatedReadOnlyField('annotated_total_earned')
+    pending_payments = AnnotatedReadOnlyField('annotated_pending_payments')
     
     class Meta:
         model = Student
         fields = '__all__'
 
-class AssignmentSerializer(serializers.ModelSerializer):
+    def get_expandable_fields(self):
+        return {
+            'lessons': LessonSerializer(many=True, read_only=True),
+            'assignments': AssignmentSerializer(many=True, read_only=True),
+        }
+
+class AssignmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    deferrable_fields = ('description',)
     is_overdue = serializers.ReadOnlyField()
     student_name = serializers.CharField(source='student.name', read_only=True)
     student_surname = serializers.CharField(source='student.surname', read_only=True)
@@ -20,7 +90,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
         model = Assignment
         fields = '__all__'
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.name', read_only=True)
     student_surname = serializers.CharField(source='student.surname', read_only=True)
     day_of_week_display = serializers.CharField(source='get_day_of_week_display', read_only=True)
@@ -29,8 +99,10 @@ class ScheduleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Schedule
         fields = '__all__'
+        read_only_fields = ['materialized_until']
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    deferrable_fields = ('notes', 'topic_covered', 'book_progress', 'cancel_reason')
     student_name = serializers.CharField(source='student.name', read_only=True)
     student_surname = serializers.CharField(source='student.surname', read_only=True)
     parent_contact = serializers.CharField(source='student.parent_contact', read_only=True)
@@ -44,7 +116,8 @@ class LessonSerializer(serializers.ModelSerializer):
         model = Lesson
         fields = '__all__'
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    deferrable_fields = ('message',)
     student_name = serializers.CharField(source='student.name', read_only=True)
     student_surname = serializers.CharField(source='student.surname', read_only=True)
     notification_type_display = serializers.CharField(source='get_notification_type_display', read_only=True)
@@ -65,4 +138,83 @@ class DashboardStatsSerializer(serializers.Serializer):
 class WeeklyScheduleSerializer(serializers.Serializer):
     date = serializers.DateField()
     day_name = serializers.CharField()
-    lessons = LessonSerializer(many=True)
\ No newline at end of file
+    lessons = LessonSerializer(many=True)
+class LessonValuesListSerializer(serializers.ListSerializer):
+    """Queryset'i values() satırlarına çevirir; "şimdi" liste başına bir kez hesaplanır"""
+    def to_representation(self, data):
+        if isinstance(data, models.QuerySet):
+            data = data.values(*self.child.VALUES_FIELDS)
+        self.child.set_now(self.context.get('now'))
+        return [self.child.to_representation(row) for row in data]
+
+class LessonListSerializer(serializers.BaseSerializer):
+    """
+    Ders listeleri için salt okunur hızlı yol. LessonSerializer ile aynı çıktıyı
+    model örneği oluşturmadan, düz values() satırlarından üretir (eşitlik testte
+    kontrol edilir; LessonSerializer'a alan eklenirse buraya da eklenmeli).
+    context'teki fields/omit seçimi SparseFieldsetMixin kurallarıyla uygulanır.
+    """
+    VALUES_FIELDS = [
+        'id', 'student__name', 'student__surname', 'student__parent_contact',
+        'date', 'start_time', 'end_time', 'lesson_type', 'status', 'payment_status', 'lesson_fee',
+        'topic_covered', 'book_progress', 'notes', 'cancel_reason', 'created_at', 'updated_at',
+        'student_id', 'schedule_id',
+    ]
+    STATUS_LABELS = dict(Lesson.STATUS_CHOICES)
+    PAYMENT_STATUS_LABELS = dict(Lesson.PAYMENT_STATUS_CHOICES)
+    LESSON_TYPE_LABELS = dict(Lesson.LESSON_TYPE_CHOICES)
+
+    # Biçimlendirme LessonSerializer ile birebir aynı olsun diye DRF alanları kullanılır
+    lesson_fee_field = serializers.DecimalField(max_digits=8, decimal_places=2)
+    datetime_field = serializers.DateTimeField()
+
+    class Meta:
+        list_serializer_class = LessonValuesListSerializer
+
+    def set_now(self, now=None):
+        self.now = now or timezone.now()
+        self.today = self.now.date()
+        # is_upcoming: yerel saatle birleştirilen ders başlangıcı > şimdi
+        self.local_now = timezone.localtime(self.now).replace(tzinfo=None)
+
+    def select_fields(self, data):
+        fields = self.context.get('fields')
+        omit = self.context.get('omit', ())
+        if not fields and not omit:
+            return data
+        return {
+            name: value for name, value in data.items()
+            if name not in omit and (not fields or name in fields)
+        }
+
+    def to_representation(self, row):
+        if not hasattr(self, 'now'):
+            self.set_now(self.context.get('now'))
+        lesson_date = row['date']
+        start_time = row['start_time']
+        return self.select_fields({
+            'id': row['id'],
+            'student_name': row['student__name'],
+            'student_surname': row['student__surname'],
+            'parent_contact': row['student__parent_contact'],
+            'status_display': self.STATUS_LABELS.get(row['status'], row['status']),
+            'payment_status_display': self.PAYMENT_STATUS_LABELS.get(row['payment_status'], row['payment_status']),
+            'lesson_type_display': self.LESSON_TYPE_LABELS.get(row['lesson_type'], row['lesson_type']),
+            'is_today': lesson_date == self.today,
+            'is_upcoming': datetime.combine(lesson_date, start_time) > self.local_now,
+            'date': lesson_date.isoformat(),
+            'start_time': start_time.isoformat(),
+            'end_time': row['end_time'].isoformat(),
+            'lesson_type': row['lesson_type'],
+            'status': row['status'],
+            'payment_status': row['payment_status'],
+            'lesson_fee': self.lesson_fee_field.to_representation(row['lesson_fee']),
+            'topic_covered': row['topic_covered'],
+            'book_progress': row['book_progress'],
+            'notes': row['notes'],
+            'cancel_reason': row['cancel_reason'],
+            'created_at': self.datetime_field.to_representation(row['created_at']),
+            'updated_at': self.datetime_field.to_representation(row['updated_at']),
+            'student': row['student_id'],
+            'schedule': row['schedule_id'],
+        })
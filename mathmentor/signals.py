@@ -0,0 +1,123 @@
+"""
+Uygulama sinyalleri ve alıcıları.
+
+QuerySet.update / bulk_create gibi toplu yazmalar Django'nun model
+sinyallerini tetiklemez; bu yollar etkilenen tarihleri lessons_bulk_changed
+ile bildirir.
+"""
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import Signal, receiver
+
+from .interval_cache import lesson_intervals, schedule_intervals
+from .models import Student, StudentStats, Lesson, Schedule, Assignment, Notification, DeletionTombstone
+from .response_cache import bump_data_version
+
+# Toplu ders yazmaları: sender=Lesson, dates=etkilenen tarihler
+lessons_bulk_changed = Signal()
+
+
+def _invalidate_lesson_dates(dates):
+    dates = {lesson_date for lesson_date in dates if lesson_date is not None}
+    lesson_intervals.invalidate(dates)
+    # Eşzamanlı okuyucuların commit öncesi yüklediği veriyi de temizle
+    transaction.on_commit(lambda: lesson_intervals.invalidate(dates))
+
+
+def _bump_data_version():
+    bump_data_version()
+    # Commit öncesi eski veriyle doldurulmuş yanıtlar da geçersiz olsun
+    transaction.on_commit(bump_data_version)
+
+
+def _invalidate_schedules():
+    schedule_intervals.clear()
+    transaction.on_commit(schedule_intervals.clear)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, **kwargs):
+    loaded_values = getattr(instance, '_loaded_values', None) or {}
+    _invalidate_lesson_dates([instance.date, loaded_values.get('date')])
+    _bump_data_version()
+
+
+def _deleted_with_student(origin):
+    """Silme bir öğrenciden (veya öğrenci queryset'inden) mi başladı"""
+    if isinstance(origin, QuerySet):
+        return origin.model is Student
+    return isinstance(origin, Student)
+
+
+@receiver(pre_delete, sender=Lesson)
+@receiver(pre_delete, sender=Assignment)
+def load_values_before_delete(sender, instance, **kwargs):
+    # Kısmi okunan nesnelerin eksik alanları satır silinmeden okunur (post_delete için)
+    instance.load_missing_values()
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, origin=None, **kwargs):
+    old_values = instance.get_loaded_values() or instance.get_current_values()
+    # Öğrenciyle birlikte silinen derslerin istatistik ve defter kayıtları da silinir
+    Lesson.apply_denormalized_changes([(old_values, None)], deleted_with_student=_deleted_with_student(origin))
+    _invalidate_lesson_dates([instance.date])
+    _bump_data_version()
+
+
+@receiver(lessons_bulk_changed, sender=Lesson)
+def lessons_bulk_written(sender, dates, **kwargs):
+    _invalidate_lesson_dates(dates)
+    _bump_data_version()
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_saved(sender, instance, **kwargs):
+    _invalidate_schedules()
+
+
+@receiver(post_delete, sender=Schedule)
+def schedule_deleted(sender, instance, **kwargs):
+    _invalidate_schedules()
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, **kwargs):
+    if created:
+        StudentStats.objects.get_or_create(student=instance)
+    _bump_data_version()
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    _bump_data_version()
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_saved(sender, instance, **kwargs):
+    _bump_data_version()
+
+
+@receiver(post_delete, sender=Assignment)
+def assignment_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_student(origin):
+        old_values = instance.get_loaded_values() or instance.get_current_values()
+        StudentStats.apply_assignment_changes([(old_values, None)])
+    _bump_data_version()
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    _bump_data_version()
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Assignment)
+@receiver(post_delete, sender=Schedule)
+@receiver(post_delete, sender=Notification)
+def record_tombstone(sender, instance, **kwargs):
+    # Delta sync istemcilerine silmeyi bildirmek için
+    DeletionTombstone.record(instance)
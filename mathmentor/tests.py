@@ -1,3 +1,1160 @@
-from django.test import TestCase
+import json
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from .interval_cache import IntervalCache, IntervalIndex, lesson_intervals
+from .models import (
+    CustomUser, Student, StudentStats, Lesson, DailyLessonRollup, Assignment, Schedule, Notification, LedgerEntry,
+    MaterializationJob, LessonConflictError,
+)
+from .occupancy import OccupancyMap, interval_mask
+from .scheduling import find_free_slots, generate_recurring_lessons
+from .serializers import LessonSerializer, LessonListSerializer
+from .signals import lessons_bulk_changed
+
+
+class MathMentorTestCase(TestCase):
+    """Oturum açmış API istemcisi ve varsayılan bir öğrenci (self.student)"""
+    create_default_student = True
+
+    def setUp(self):
+        user = CustomUser.objects.create(username='tutor', email='tutor@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        if self.create_default_student:
+            self.student = self.create_student()
+
+    @staticmethod
+    def create_student(**kwargs):
+        values = {
+            'name': 'Öğrenci', 'surname': 'Test', 'parent_name': 'Veli', 'parent_contact': '05000000000',
+            'lesson_fee': Decimal('200.00'),
+        }
+        values.update(kwargs)
+        return Student.objects.create(**values)
+
+
+class DashboardDetailedStatsTests(MathMentorTestCase):
+    """detailed_stats sorgu sayısı veri miktarından bağımsız olmalı"""
+
+    EXPECTED_QUERIES = 7
+    create_default_student = False
+
+    def create_data(self, first, last):
+        today = timezone.localdate()
+        for i in range(first, last):
+            student = self.create_student(name=f'Öğrenci{i}')
+            for j in range(3):
+                Lesson.objects.create(
+                    student=student,
+                    date=today - timedelta(days=35 * j + i),
+                    start_time=time(8 + i % 12, 0),
+                    end_time=time(9 + i % 12, 0),
+                    lesson_fee=Decimal('200.00'),
+                    status='completed',
+                    payment_status='paid' if j % 2 == 0 else 'pending'
+                )
+            Assignment.objects.create(student=student, book='Kitap', topic='Konu', page='1', is_completed=i % 2 == 0)
+
+    def test_query_count_is_constant(self):
+        self.create_data(0, 2)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get('/api/dashboard/detailed_stats/')
+        self.assertEqual(response.status_code, 200)
+
+        self.create_data(2, 8)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get('/api/dashboard/detailed_stats/')
+
+        data = response.json()
+        self.assertEqual(data['general']['total_students'], 8)
+        self.assertEqual(data['general']['completed_lessons'], 24)
+        self.assertEqual(data['payments']['total_earned'], 16 * 200.0)
+        self.assertEqual(data['payments']['total_pending'], 8 * 200.0)
+        self.assertEqual(len(data['trends']['monthly_earnings']), 12)
+        self.assertEqual(sum(month['lessons'] for month in data['trends']['monthly_earnings']), 24)
+        self.assertEqual(sum(day['count'] for day in data['trends']['weekly_distribution']), 24)
+        self.assertEqual(len(data['trends']['student_performance']), 8)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DashboardResponseCacheTests(MathMentorTestCase):
+    """Yazmalar arasındaki tekrar eden dashboard istekleri veritabanına gitmemeli"""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_repeated_polls_hit_cache_until_write(self):
+        for url in ('/api/dashboard/stats/', '/api/dashboard/today_schedule/'):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+        # dashboard/stats 'bugün'ü timezone.now().date() ile hesaplar
+        Lesson.objects.create(
+            student=self.student,
+            date=timezone.now().date(),
+            start_time=time(0, 0),
+            end_time=time(0, 1),
+            lesson_fee=Decimal('200.00'),
+            status='completed'
+        )
+
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.json()['total_lessons_today'], 1)
+        response = self.client.get('/api/dashboard/today_schedule/')
+        self.assertEqual(len(response.json()), 1)
+
+
+class LessonKeysetPaginationTests(MathMentorTestCase):
+    """Cursor ile ileri/geri gezinme her dersi bir kez ve sırasıyla döndürmeli"""
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        # Aynı tarih ve saatte iptal edilmiş dersler: id ile ayrışmalı
+        for i in range(12):
+            Lesson.objects.create(
+                student=self.student,
+                date=today - timedelta(days=i // 4),
+                start_time=time(10 + i % 2, 0),
+                end_time=time(11 + i % 2, 0),
+                lesson_fee=Decimal('200.00'),
+                status='cancelled'
+            )
+
+    def test_pages_follow_ordering_in_both_directions(self):
+        expected = list(Lesson.objects.order_by('-date', '-start_time', 'id').values_list('id', flat=True))
+
+        pages = []
+        next_links = []
+        url = '/api/lessons/?page_size=5'
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            pages.append([lesson['id'] for lesson in data['results']])
+            url = data['next']
+            next_links.append(url)
+        self.assertEqual(sum(pages, []), expected)
+
+        data = self.client.get(next_links[0]).json()
+        previous = self.client.get(data['previous']).json()
+        self.assertEqual([lesson['id'] for lesson in previous['results']], pages[0])
+        self.assertIsNone(previous['previous'])
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTests(MathMentorTestCase):
+    """since token'ından sonra değişen kayıtlar ve silmeler dönmeli"""
+
+    def setUp(self):
+        super().setUp()
+        self.assignment = Assignment.objects.create(student=self.student, book='Kitap', topic='Konu', page='1')
+
+    def test_delta_since_token(self):
+        data = self.client.get('/api/sync/').json()
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['students']), 1)
+
+        lesson = Lesson.objects.create(
+            student=self.student,
+            date=timezone.localdate(),
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+            lesson_fee=Decimal('200.00')
+        )
+        assignment_id = self.assignment.id
+        self.assignment.delete()
+
+        data = self.client.get('/api/sync/', {'since': data['token']}).json()
+        self.assertFalse(data['full'])
+        self.assertEqual([item['id'] for item in data['lessons']], [lesson.id])
+        # Ders ve ödev değişikliği öğrencinin istatistiklerini değiştirdi
+        self.assertEqual([item['id'] for item in data['students']], [self.student.id])
+        self.assertEqual(data['assignments'], [])
+        self.assertEqual(data['deleted']['assignments'], [assignment_id])
+
+        data = self.client.get('/api/sync/', {'since': data['token']}).json()
+        self.assertEqual(data['lessons'], [])
+        self.assertEqual(data['deleted']['assignments'], [])
+
+
+class SparseFieldsetTests(MathMentorTestCase):
+    """?fields= / ?expand= istenen alanları dönmeli ve sorgu sayısı sabit kalmalı"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            Lesson.objects.create(
+                student=self.student,
+                date=timezone.localdate() + timedelta(days=i),
+                start_time=time(10, 0),
+                end_time=time(11, 0),
+                lesson_fee=Decimal('200.00')
+            )
+            Assignment.objects.create(student=self.student, book='Kitap', topic='Konu', page=str(i))
+
+    def test_fields_and_omit(self):
+        response = self.client.get('/api/students/', {'fields': 'id,name,total_earned', 'omit': 'total_earned'})
+        self.assertEqual(list(response.json()[0]), ['id', 'name'])
+
+        response = self.client.get('/api/lessons/', {'omit': 'notes'})
+        self.assertNotIn('notes', response.json()['results'][0])
+
+    def test_expand_student_detail(self):
+        # öğrenci + istatistik, dersler, ödevler
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f'/api/students/{self.student.id}/', {'fields': 'id,total_earned', 'expand': 'lessons,assignments'}
+            )
+        data = response.json()
+        self.assertEqual(list(data), ['id', 'total_earned', 'lessons', 'assignments'])
+        self.assertEqual(len(data['lessons']), 3)
+        self.assertEqual(len(data['assignments']), 3)
+
+
+class LessonListSerializerTests(MathMentorTestCase):
+    """values() tabanlı hızlı yol LessonSerializer ile aynı alanları, sırayı ve biçimi üretmeli"""
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        schedule = Schedule.objects.create(
+            student=self.student, day_of_week='monday', start_time=time(8, 0), end_time=time(8, 30)
+        )
+        Lesson.objects.create(
+            student=self.student, date=today, start_time=time(23, 0), end_time=time(23, 30),
+            lesson_fee=Decimal('150.5'), schedule=schedule, notes='Not', topic_covered='Türev'
+        )
+        Lesson.objects.create(
+            student=self.student, date=today - timedelta(days=3), start_time=time(10, 0), end_time=time(11, 0),
+            lesson_fee=Decimal('200.00'), status='completed', payment_status='overdue', lesson_type='physical'
+        )
+        Lesson.objects.create(
+            student=self.student, date=today + timedelta(days=2), start_time=time(9, 15), end_time=time(10, 0),
+            lesson_fee=Decimal('0'), status='cancelled', cancel_reason='Hasta'
+        )
+
+    def test_matches_lesson_serializer(self):
+        now = timezone.now()
+        lessons = Lesson.objects.order_by('date')
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            expected = [list(row.items()) for row in LessonSerializer(lessons, many=True).data]
+            actual = [list(row.items()) for row in LessonListSerializer(lessons, many=True, context={'now': now}).data]
+        self.assertEqual(actual, expected)
+
+    def test_pending_payments_honors_fields(self):
+        response = self.client.get('/api/lessons/pending_payments/', {'fields': 'id,status,lesson_fee'})
+        self.assertEqual(response.json(), [{'id': Lesson.objects.get(status='completed').id,
+                                            'status': 'completed', 'lesson_fee': '200.00'}])
+        row = self.client.get('/api/lessons/pending_payments/', {'omit': 'notes,student_name'}).json()[0]
+        self.assertNotIn('notes', row)
+        self.assertIn('student_surname', row)
+
+
+class LessonExportTests(MathMentorTestCase):
+    """export: liste filtreleriyle akış halinde CSV / NDJSON"""
+
+    create_default_student = False
+
+    def setUp(self):
+        super().setUp()
+        self.student = self.create_student(name='Çağrı, Şükrü')
+        today = timezone.localdate()
+        self.lessons = [
+            Lesson.objects.create(
+                student=self.student, date=today - timedelta(days=i), start_time=time(10, 0),
+                end_time=time(11, 0), lesson_fee=Decimal('200.00'), status=status
+            )
+            for i, status in enumerate(['completed', 'cancelled', 'completed'])
+        ]
+
+    def export(self, **params):
+        response = self.client.get('/api/lessons/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_is_streamed_with_bom_header_and_filters(self):
+        response, content = self.export(format='csv', status='completed')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('.csv"', response['Content-Disposition'])
+        self.assertTrue(content.startswith('\ufeff'))
+
+        lines = content.lstrip('\ufeff').splitlines()
+        self.assertEqual(lines[0], 'id,date,start_time,end_time,student_id,student_name,student_surname,'
+                                   'lesson_type,status,payment_status,lesson_fee,topic_covered,cancel_reason')
+        # Sadece tamamlanan dersler, tarih sırasıyla; virgüllü ad tırnak içinde
+        self.assertEqual([line.split(',')[0] for line in lines[1:]],
+                         [str(self.lessons[2].id), str(self.lessons[0].id)])
+        self.assertIn('"Çağrı, Şükrü"', lines[1])
+
+    def test_ndjson(self):
+        response, content = self.export(format='ndjson')
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [lesson.id for lesson in reversed(self.lessons)])
+        self.assertEqual(rows[0]['student_name'], 'Çağrı, Şükrü')
+        self.assertEqual(rows[0]['lesson_fee'], '200.00')
+
+    def test_unknown_format(self):
+        response = self.client.get('/api/lessons/export/', {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+
+class WeeklyScheduleTests(MathMentorTestCase):
+    """weekly_schedule: varsayılan 7 gün, ?start=&days= ile takvim aralığı"""
+
+    def create_lesson(self, lesson_date, hour):
+        return Lesson.objects.create(
+            student=self.student, date=lesson_date, start_time=time(hour, 0), end_time=time(hour + 1, 0),
+            lesson_fee=Decimal('200.00')
+        )
+
+    def test_default_week(self):
+        today = timezone.localdate()
+        later = self.create_lesson(today + timedelta(days=2), 15)
+        earlier = self.create_lesson(today + timedelta(days=2), 9)
+        self.create_lesson(today + timedelta(days=7), 9)  # aralık dışında
+
+        response = self.client.get('/api/schedules/weekly_schedule/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([day['date'] for day in data], [(today + timedelta(days=i)).isoformat() for i in range(7)])
+        self.assertEqual(data[0]['day_name'], ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma',
+                                               'Cumartesi', 'Pazar'][today.weekday()])
+        self.assertEqual([lesson['id'] for lesson in data[2]['lessons']], [earlier.id, later.id])
+        self.assertEqual(sum(len(day['lessons']) for day in data), 2)
+
+    def test_start_and_days(self):
+        start = date(2026, 3, 2)  # Pazartesi
+        lesson = self.create_lesson(date(2026, 3, 31), 10)
+        self.create_lesson(date(2026, 4, 1), 10)
+
+        data = self.client.get('/api/schedules/weekly_schedule/', {'start': '2026-03-02', 'days': 30}).json()
+        self.assertEqual(len(data), 30)
+        self.assertEqual((data[0]['date'], data[0]['day_name']), ('2026-03-02', 'Pazartesi'))
+        self.assertEqual(data[-1]['date'], (start + timedelta(days=29)).isoformat())
+        self.assertEqual([item['id'] for day in data for item in day['lessons']], [lesson.id])
+
+    def test_invalid_range(self):
+        for params in ({'days': 0}, {'days': 63}, {'days': 'yedi'}, {'start': '02.03.2026'}):
+            response = self.client.get('/api/schedules/weekly_schedule/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+
+class QueryCountGuardMixin:
+    """Liste uç noktalarının sorgu sayısı satır sayısıyla büyümemeli (N+1 koruması)"""
+
+    def assertQueryCountConstant(self, url, create_rows, params=None):
+        create_rows(2)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        create_rows(8)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        self.assertEqual(
+            len(few.captured_queries), len(many.captured_queries),
+            f'{url}: sorgu sayısı satır sayısıyla artıyor\n' +
+            '\n'.join(query['sql'] for query in many.captured_queries)
+        )
+
+
+class ListEndpointQueryCountTests(QueryCountGuardMixin, MathMentorTestCase):
+
+    create_default_student = False
+
+    def setUp(self):
+        super().setUp()
+        self.row_count = 0
+
+    def create_students(self, count):
+        students = []
+        for _ in range(count):
+            self.row_count += 1
+            students.append(self.create_student(name=f'Öğrenci{self.row_count}'))
+        return students
+
+    def create_lessons(self, count):
+        for student in self.create_students(count):
+            Lesson.objects.create(
+                student=student,
+                date=timezone.localdate() + timedelta(days=student.pk),
+                start_time=time(10, 0),
+                end_time=time(11, 0),
+                lesson_fee=Decimal('200.00')
+            )
+
+    def create_assignments(self, count):
+        for student in self.create_students(count):
+            Assignment.objects.create(student=student, book='Kitap', topic='Konu', page='1')
+
+    def create_schedules(self, count):
+        # Schedule.save ders üretim işi kuyruğa ekler; burada sadece liste sorguları ölçülüyor
+        Schedule.objects.bulk_create([
+            Schedule(
+                student=student, day_of_week='monday',
+                start_time=time(student.pk % 20, 0), end_time=time(student.pk % 20 + 1, 0)
+            )
+            for student in self.create_students(count)
+        ])
+
+    def create_notifications(self, count):
+        for student in self.create_students(count):
+            Notification.objects.create(
+                student=student, title='Hatırlatma', message='-', notification_type='general', send_at=timezone.now()
+            )
+
+    def test_students(self):
+        self.assertQueryCountConstant('/api/students/', self.create_students)
+
+    def test_lessons(self):
+        self.assertQueryCountConstant('/api/lessons/', self.create_lessons)
+
+    def test_assignments(self):
+        self.assertQueryCountConstant('/api/assignments/', self.create_assignments)
+
+    def test_schedules(self):
+        self.assertQueryCountConstant('/api/schedules/', self.create_schedules)
+
+    def test_notifications(self):
+        self.assertQueryCountConstant('/api/notifications/', self.create_notifications)
+
+
+class LessonConflictCheckTests(MathMentorTestCase):
+    """Çakışma kontrolü sadece tarih/saat veya aktiflik değiştiğinde ve en fazla bir kez çalışmalı"""
+
+    def setUp(self):
+        super().setUp()
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.lesson = self.create_lesson(time(10, 0), time(11, 0))
+        self.other = self.create_lesson(time(12, 0), time(13, 0))
+
+    def create_lesson(self, start_time, end_time, **kwargs):
+        return Lesson.objects.create(
+            student=self.student, date=self.date, start_time=start_time, end_time=end_time,
+            lesson_fee=Decimal('200.00'), **kwargs
+        )
+
+    def count_checks(self, method, url, data=None):
+        with mock.patch.object(Lesson, 'check_schedule_conflict', wraps=Lesson.check_schedule_conflict) as check:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, check.call_count
+
+    def test_status_only_actions_skip_check(self):
+        for action in ('mark_paid', 'mark_completed'):
+            response, checks = self.count_checks('post', f'/api/lessons/{self.lesson.id}/{action}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(checks, 0)
+
+        response, checks = self.count_checks('patch', f'/api/lessons/{self.lesson.id}/', {'notes': 'Not'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(checks, 0)
+
+    def test_temporal_change_checks_once(self):
+        response, checks = self.count_checks(
+            'patch', f'/api/lessons/{self.lesson.id}/', {'start_time': '12:30', 'end_time': '13:30'}
+        )
+        self.assertEqual(checks, 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['conflicting_lesson']['id'], self.other.id)
+
+        response, checks = self.count_checks('post', '/api/lessons/', {
+            'student': self.student.id, 'date': self.date.isoformat(),
+            'start_time': '14:00', 'end_time': '15:00', 'lesson_fee': '200.00'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(checks, 1)
+
+    def test_reactivated_lesson_is_checked(self):
+        cancelled = self.create_lesson(time(10, 30), time(11, 30), status='cancelled')
+        response, checks = self.count_checks('post', f'/api/lessons/{cancelled.id}/mark_completed/')
+        self.assertEqual(checks, 1)
+        self.assertEqual(response.status_code, 400)
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+
+    def assert_conflict(self, start_time, end_time, expected, exclude_lesson_id=None):
+        for use_cache in (False, True):
+            has_conflict, conflicting = Lesson.check_schedule_conflict(
+                self.date, start_time, end_time, exclude_lesson_id, use_cache=use_cache
+            )
+            self.assertEqual(conflicting.id if conflicting else None, expected)
+            self.assertEqual(has_conflict, expected is not None)
+
+    def test_touching_endpoints_do_not_conflict(self):
+        self.assert_conflict(time(11, 0), time(12, 0), None)
+        self.assert_conflict(time(9, 0), time(10, 0), None)
+        self.assert_conflict(time(10, 59), time(12, 0), self.lesson.id)
+        self.assert_conflict(time(11, 30), time(12, 1), self.other.id)
+
+    def test_exclude_lesson_id(self):
+        self.assert_conflict(time(10, 0), time(11, 0), self.lesson.id)
+        self.assert_conflict(time(10, 0), time(11, 0), None, exclude_lesson_id=self.lesson.id)
+        self.assert_conflict(time(10, 30), time(12, 30), self.other.id, exclude_lesson_id=self.lesson.id)
+
+    def test_inactive_statuses_are_ignored(self):
+        for status in ('cancelled', 'missed'):
+            self.create_lesson(time(14, 0), time(15, 0), status=status)
+        self.assert_conflict(time(14, 0), time(15, 0), None)
+        completed = self.create_lesson(time(14, 30), time(15, 30), status='completed')
+        self.assert_conflict(time(14, 0), time(15, 0), completed.id)
+
+
+class IntervalCacheTests(SimpleTestCase):
+    """IntervalIndex örtüşme araması ve IntervalCache LRU/TTL/sayaç davranışı"""
+
+    def setUp(self):
+        self.loaded_keys = []
+
+    def loader(self, keys):
+        self.loaded_keys.extend(keys)
+        return {key: [(time(10, 0), time(11, 0), key)] for key in keys}
+
+    def test_overlapping(self):
+        index = IntervalIndex([
+            (time(9, 0), time(12, 0), 1),
+            (time(10, 0), time(10, 30), 2),
+            (time(13, 0), time(14, 0), 3),
+        ])
+        self.assertEqual(index.overlapping(time(11, 0), time(13, 0)), [1])
+        self.assertEqual(index.overlapping(time(10, 15), time(13, 30)), [1, 2, 3])
+        self.assertEqual(index.overlapping(time(10, 15), time(13, 30), exclude_id=1), [2, 3])
+        # Uç uca değen aralıklar çakışmaz
+        self.assertEqual(index.overlapping(time(12, 0), time(13, 0)), [])
+        self.assertEqual(index.overlapping(time(14, 0), time(15, 0)), [])
+        self.assertEqual(IntervalIndex([]).overlapping(time(9, 0), time(10, 0)), [])
+
+    def test_lru_eviction_and_counters(self):
+        interval_cache = IntervalCache(self.loader, max_entries=2, ttl=60)
+        interval_cache.get('a')
+        interval_cache.get('b')
+        interval_cache.get('a')  # 'a' en son kullanılan olur
+        interval_cache.get('c')  # en eski 'b' tahliye edilir
+        interval_cache.get('a')
+        interval_cache.get('b')
+
+        self.assertEqual(self.loaded_keys, ['a', 'b', 'c', 'b'])
+        self.assertEqual(interval_cache.stats(), {
+            'entries': 2, 'max_entries': 2, 'hits': 2, 'misses': 4, 'hit_rate': 33.3,
+        })
+
+    def test_ttl_expiry(self):
+        interval_cache = IntervalCache(self.loader, max_entries=4, ttl=60)
+        with mock.patch('mathmentor.interval_cache.time_module.monotonic', return_value=1000):
+            interval_cache.get('a')
+        with mock.patch('mathmentor.interval_cache.time_module.monotonic', return_value=1059):
+            interval_cache.get('a')
+        with mock.patch('mathmentor.interval_cache.time_module.monotonic', return_value=1061):
+            interval_cache.get('a')
+
+        self.assertEqual(self.loaded_keys, ['a', 'a'])
+        self.assertEqual((interval_cache.hits, interval_cache.misses), (1, 2))
+
+    def test_invalidate_during_load_is_not_stored(self):
+        interval_cache = IntervalCache(None, max_entries=4, ttl=60)
+
+        def loader(keys):
+            interval_cache.invalidate(keys)
+            return {}
+
+        interval_cache.loader = loader
+        interval_cache.get('a')
+        self.assertEqual(interval_cache.stats()['entries'], 0)
+
+
+class IntervalCacheInvalidationTests(TransactionTestCase):
+    """
+    Sinyallerle geçersiz kılma ve süreçler arası bayat önbellek. Önbellek
+    transaction içinde yüklenen veriyi saklamadığı için TransactionTestCase.
+    """
+
+    def setUp(self):
+        lesson_intervals.clear()
+        self.student = MathMentorTestCase.create_student()
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.lesson = self.create_lesson(time(10, 0), time(11, 0))
+
+    def tearDown(self):
+        lesson_intervals.clear()
+
+    def create_lesson(self, start_time, end_time, **kwargs):
+        return Lesson.objects.create(
+            student=self.student, date=self.date, start_time=start_time, end_time=end_time,
+            lesson_fee=Decimal('200.00'), **kwargs
+        )
+
+    def cached_ids(self):
+        return lesson_intervals.get(self.date).ids
+
+    def test_signals_invalidate_cached_dates(self):
+        self.assertEqual(self.cached_ids(), [self.lesson.id])
+        self.assertEqual(self.cached_ids(), [self.lesson.id])  # isabet
+
+        other = self.create_lesson(time(12, 0), time(13, 0))
+        self.assertEqual(self.cached_ids(), [self.lesson.id, other.id])
+
+        other.delete()
+        self.assertEqual(self.cached_ids(), [self.lesson.id])
+
+        # Başka güne taşınan ders eski tarihten de düşer
+        self.lesson.date = self.date + timedelta(days=1)
+        self.lesson.save()
+        self.assertEqual(self.cached_ids(), [])
+
+    def test_bulk_changed_signal_invalidates(self):
+        self.assertEqual(self.cached_ids(), [self.lesson.id])
+        bulk_lesson, = Lesson.objects.bulk_create([Lesson(
+            student=self.student, date=self.date, start_time=time(12, 0), end_time=time(13, 0),
+            lesson_fee=Decimal('200.00')
+        )])
+        self.assertEqual(self.cached_ids(), [self.lesson.id])  # sinyal yok, önbellek bayat
+
+        lessons_bulk_changed.send(sender=Lesson, dates={self.date})
+        self.assertEqual(sorted(self.cached_ids()), sorted([self.lesson.id, bulk_lesson.id]))
+
+    @override_settings(WORKING_HOURS_START='09:00', WORKING_HOURS_END='13:00', FREE_SLOT_STEP_MINUTES=60)
+    def test_free_slots_read_cached_intervals(self):
+        find_free_slots(self.date, 60, count=2, days=1)
+        with self.assertNumQueries(0):
+            slots = find_free_slots(self.date, 60, count=2, days=1)
+        self.assertEqual([slot['start_time'] for slot in slots], ['09:00', '11:00'])
+
+        # Sinyal önbelleği temizler; öneriler yeni dersi görür
+        self.create_lesson(time(11, 0), time(12, 0))
+        slots = find_free_slots(self.date, 60, count=2, days=1)
+        self.assertEqual([slot['start_time'] for slot in slots], ['09:00', '12:00'])
+
+    def test_stale_cache_does_not_allow_double_booking(self):
+        # Başka bir süreçteki yazma: bu sürecin önbelleği haberdar olmaz
+        self.assertEqual(self.cached_ids(), [self.lesson.id])
+        other_process_lesson, = Lesson.objects.bulk_create([Lesson(
+            student=self.student, date=self.date, start_time=time(12, 0), end_time=time(13, 0),
+            lesson_fee=Decimal('200.00')
+        )])
+
+        with self.assertRaises(LessonConflictError) as raised:
+            self.create_lesson(time(12, 30), time(13, 30))
+        self.assertEqual(raised.exception.conflicting_lesson.id, other_process_lesson.id)
+        self.assertEqual(Lesson.objects.filter(date=self.date).count(), 2)
+
+
+class LessonBulkActionTests(MathMentorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.date = timezone.localdate() - timedelta(days=1)
+        self.lessons = [
+            Lesson.objects.create(
+                student=self.student, date=self.date, start_time=time(8, 10 * i), end_time=time(8, 10 * i + 10),
+                lesson_fee=Decimal('200.00'), status='completed'
+            )
+            # Aynı saat diliminde: özet tablosu güncellemesi tek satıra düşer
+            for i in range(5)
+        ]
+
+    def test_mark_paid_in_constant_queries(self):
+        ids = [lesson.id for lesson in self.lessons]
+        with CaptureQueriesContext(connection) as few:
+            self.client.post('/api/lessons/bulk/', {'ids': ids[:2], 'action': 'mark_paid'}, format='json')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(
+                '/api/lessons/bulk/', {'ids': ids + [999999], 'action': 'mark_paid'}, format='json'
+            )
+        self.assertLessEqual(len(many.captured_queries), len(few.captured_queries))
+
+        data = response.json()
+        self.assertEqual(data['updated'], 3)
+        self.assertEqual([result['result'] for result in data['results']], ['unchanged'] * 2 + ['updated'] * 3 + ['not_found'])
+        self.assertEqual(Student.objects.get(pk=self.student.pk).get_stats().paid_total, Decimal('1000.00'))
+
+    def test_reactivation_conflicts_are_reported(self):
+        self.client.post('/api/lessons/bulk/', {'ids': [self.lessons[0].id], 'action': 'cancel', 'reason': 'Hasta'}, format='json')
+        blocker = Lesson.objects.create(
+            student=self.student, date=self.date, start_time=time(8, 5), end_time=time(8, 8),
+            lesson_fee=Decimal('200.00')
+        )
+        response = self.client.post(
+            '/api/lessons/bulk/', {'ids': [self.lessons[0].id], 'action': 'mark_completed'}, format='json'
+        )
+        result = response.json()['results'][0]
+        self.assertEqual(result['result'], 'conflict')
+        self.assertEqual(result['conflicting_lesson']['id'], blocker.id)
+        self.lessons[0].refresh_from_db()
+        self.assertEqual(self.lessons[0].status, 'cancelled')
+        self.assertEqual(self.lessons[0].cancel_reason, 'Hasta')
+
+
+class DenormalizedTotalsTests(MathMentorTestCase):
+    """Fark (delta) ile güncellenen tablolar, yazmalardan sonra rebuild() ile aynı olmalı"""
+
+    def setUp(self):
+        super().setUp()
+        self.other = self.create_student(name='Diğer', surname='Öğrenci')
+        self.today = timezone.localdate()
+
+    def create_lesson(self, student, days, hour, **kwargs):
+        values = {'lesson_fee': Decimal('200.00'), **kwargs}
+        return Lesson.objects.create(
+            student=student, date=self.today + timedelta(days=days), start_time=time(hour, 0),
+            end_time=time(hour, 45), **values
+        )
+
+    def run_lesson_writes(self):
+        lessons = [self.create_lesson(self.student, -day, 9 + day % 3) for day in range(1, 7)]
+        lessons.append(self.create_lesson(self.other, -1, 14, status='completed', lesson_fee=Decimal('150.00')))
+
+        # Normal kayıt: durum, ücret, tarih ve saat değişiklikleri
+        lessons[0].status = 'completed'
+        lessons[0].save()
+        lessons[1].status = 'completed'
+        lessons[1].lesson_fee = Decimal('250.00')
+        lessons[1].date -= timedelta(days=10)
+        lessons[1].start_time, lessons[1].end_time = time(16, 0), time(16, 45)
+        lessons[1].save()
+
+        # update_fields: yazılmayan alan değişikliği (lesson_fee) sayılmamalı
+        lessons[2].status = 'completed'
+        lessons[2].save(update_fields=['status'])
+        lessons[2].payment_status = 'paid'
+        lessons[2].save(update_fields=['payment_status'])
+        lessons[3].lesson_fee = Decimal('999.00')
+        lessons[3].status = 'missed'
+        lessons[3].save(update_fields=['status'])
+
+        # Dersi başka öğrenciye taşıma
+        lessons[4].student = self.other
+        lessons[4].status = 'completed'
+        lessons[4].save()
+
+        # Tekil ve queryset silme
+        lessons[5].status = 'cancelled'
+        lessons[5].save()
+        lessons[0].delete()
+        Lesson.objects.filter(student=self.other, status='cancelled').delete()
+        Lesson.objects.filter(pk=lessons[3].pk).delete()
+
+        # Toplu ödeme
+        response = self.client.post('/api/lessons/bulk/', {
+            'ids': list(Lesson.objects.values_list('id', flat=True)), 'action': 'mark_paid'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    @staticmethod
+    def student_stats():
+        return {
+            stats.pop('student_id'): stats
+            for stats in StudentStats.objects.order_by('student_id').values(
+                'student_id', *StudentStats.LESSON_STATUS_FIELDS.values(),
+                *StudentStats.PAYMENT_TOTAL_FIELDS.values(), 'total_assignments', 'completed_assignments'
+            )
+        }
+
+    def test_student_stats_match_rebuild(self):
+        self.run_lesson_writes()
+        incremental = self.student_stats()
+        StudentStats.rebuild()
+        self.assertEqual(incremental, self.student_stats())
+        self.assertEqual(incremental[self.other.pk]['paid_total'], Decimal('350.00'))
+
+    def test_student_without_stats_row(self):
+        bulk_student, listed_student = Student.objects.bulk_create([
+            Student(name=name, surname='Toplu', parent_name='Veli', parent_contact='0', lesson_fee=Decimal('200.00'))
+            for name in ('Yazılan', 'Listelenen')
+        ])
+        Lesson.objects.bulk_create([
+            Lesson(student=student, date=self.today - timedelta(days=1), start_time=time(hour, 0),
+                   end_time=time(hour, 45), lesson_fee=Decimal('200.00'), status='completed', payment_status='paid')
+            for student, hour in ((bulk_student, 9), (listed_student, 10))
+        ])
+        self.assertFalse(StudentStats.objects.filter(student__in=[bulk_student, listed_student]).exists())
+
+        # Fark uygulanamayan öğrencinin satırı yazma sonrası durumdan oluşturulur
+        self.create_lesson(bulk_student, -2, 11, status='completed', payment_status='paid')
+        self.assertEqual(self.student_stats()[bulk_student.pk]['paid_total'], Decimal('400.00'))
+
+        # Liste (with_stats) ve model özelliği aynı değeri göstermeli
+        response = self.client.get('/api/students/', {'fields': 'id,total_earned,total_lessons_count'})
+        listed = {row['id']: row for row in response.json()}
+        self.assertEqual(Decimal(str(listed[listed_student.pk]['total_earned'])), Decimal('200.00'))
+        self.assertEqual(listed[listed_student.pk]['total_lessons_count'], 1)
+        self.assertEqual(Decimal(str(listed[bulk_student.pk]['total_earned'])), Decimal('400.00'))
+
+        incremental = self.student_stats()
+        StudentStats.rebuild()
+        self.assertEqual(incremental, self.student_stats())
+
+    @staticmethod
+    def lesson_rollups():
+        # Delta güncellemesi sıfırlanan satırları bırakır, rebuild bırakmaz
+        fields = DailyLessonRollup.counter_fields()
+        return [
+            rollup for rollup in DailyLessonRollup.objects.order_by('date', 'hour').values('date', 'hour', *fields)
+            if any(rollup[field] for field in fields)
+        ]
+
+    def test_lesson_rollups_match_rebuild(self):
+        self.run_lesson_writes()
+        incremental = self.lesson_rollups()
+        DailyLessonRollup.rebuild()
+        self.assertEqual(incremental, self.lesson_rollups())
+        moved_bucket = [
+            rollup for rollup in incremental
+            if (rollup['date'], rollup['hour']) == (self.today - timedelta(days=12), 16)
+        ]
+        self.assertEqual(moved_bucket[0]['paid_total'], Decimal('250.00'))
+
+    def test_partially_loaded_lessons(self):
+        lessons = [self.create_lesson(self.student, -day, 10) for day in range(1, 5)]
+        assignment = Assignment.objects.create(student=self.student, book='Kitap', topic='Konu', page='1')
+
+        lesson = Lesson.objects.only('id', 'notes').get(pk=lessons[0].pk)
+        lesson.notes = 'Not'
+        lesson.save()
+        lesson = Lesson.objects.only('id', 'status').get(pk=lessons[1].pk)
+        lesson.status = 'completed'
+        lesson.save()
+        lesson = Lesson.objects.defer('payment_status', 'lesson_fee').get(pk=lessons[2].pk)
+        lesson.status = 'completed'
+        lesson.save(update_fields=['status'])
+        Lesson.objects.only('id').get(pk=lessons[3].pk).delete()
+        Lesson.objects.filter(pk=lessons[0].pk).only('id').delete()
+
+        assignment = Assignment.objects.only('id').get(pk=assignment.pk)
+        assignment.is_completed = True
+        assignment.save()
+
+        incremental = self.student_stats()
+        rollups = self.lesson_rollups()
+        StudentStats.rebuild()
+        DailyLessonRollup.rebuild()
+        self.assertEqual(incremental, self.student_stats())
+        self.assertEqual(rollups, self.lesson_rollups())
+        self.assertEqual(incremental[self.student.pk]['completed_lessons'], 2)
+        self.assertEqual(incremental[self.student.pk]['completed_assignments'], 1)
+
+
+class DebtLedgerTests(MathMentorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.lesson = Lesson.objects.create(
+            student=self.student, date=timezone.localdate() - timedelta(days=1),
+            start_time=time(10, 0), end_time=time(11, 0), lesson_fee=Decimal('200.00')
+        )
+
+    def debt(self):
+        return Student.objects.values_list('debt_status', flat=True).get(pk=self.student.pk)
+
+    def test_completion_and_payment_post_ledger_entries(self):
+        self.client.post(f'/api/lessons/{self.lesson.id}/quick_complete/', {'payment_received': False}, format='json')
+        self.assertEqual(self.debt(), Decimal('200.00'))
+
+        self.client.post(f'/api/lessons/{self.lesson.id}/mark_paid/')
+        self.assertEqual(self.debt(), Decimal('0.00'))
+        self.assertEqual(
+            sorted(LedgerEntry.objects.values_list('entry_type', 'amount')),
+            [('charge', Decimal('200.00')), ('payment', Decimal('-200.00'))]
+        )
+
+    def test_stale_student_save_keeps_balance_and_manual_edit_is_adjustment(self):
+        stale = Student.objects.get(pk=self.student.pk)
+        self.lesson.status = 'completed'
+        self.lesson.save()
+
+        stale.notes = 'Not'
+        stale.save()
+        self.assertEqual(self.debt(), Decimal('200.00'))
+
+        stale.debt_status = stale.debt_status - Decimal('50.00')
+        stale.save()
+        self.assertEqual(self.debt(), Decimal('150.00'))
+        self.assertEqual(stale.debt_status, Decimal('150.00'))
+        self.assertEqual(LedgerEntry.objects.get(entry_type='adjustment').amount, Decimal('-50.00'))
+        self.assertEqual(LedgerEntry.replay_balances(), 0)
+
+    def test_deleting_student_with_completed_lessons(self):
+        self.lesson.status = 'completed'
+        self.lesson.save()
+        self.student.delete()
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_reconcile_corrects_drift_with_adjustments(self):
+        self.lesson.status = 'completed'
+        self.lesson.save()
+        # Defteri atlayan eski bir yazma
+        Student.objects.filter(pk=self.student.pk).update(debt_status=Decimal('500.00'))
+
+        checked, diffs = LedgerEntry.reconcile(dry_run=True)
+        self.assertEqual(diffs, [(self.student.pk, 'Öğrenci Test', Decimal('500.00'), Decimal('200.00'))])
+        self.assertEqual(self.debt(), Decimal('500.00'))
+
+        LedgerEntry.reconcile()
+        self.assertEqual(self.debt(), Decimal('200.00'))
+        self.assertEqual(LedgerEntry.reconcile()[1], [])
+        # Düzeltme kaydı defteri de tutarlı bırakır
+        self.assertEqual(LedgerEntry.balances()[self.student.pk], Decimal('200.00'))
+
+    def test_reconcile_command_keeps_adjustments_and_batches(self):
+        self.lesson.status = 'completed'
+        self.lesson.save()
+        student = Student.objects.get(pk=self.student.pk)
+        student.debt_status -= Decimal('50.00')
+        student.save()
+        opening = self.create_student(name='Açılış', debt_status=Decimal('300.00'))
+        drifted = [self.create_student(name=name) for name in ('A', 'B')]
+        Student.objects.filter(pk__in=[s.pk for s in drifted]).update(debt_status=Decimal('75.00'))
+
+        out = StringIO()
+        call_command('reconcile_debts', '--dry-run', stdout=out)
+        self.assertIn('4 öğrenci kontrol edildi, 2 fark (toplam düzeltme: -150.00)', out.getvalue())
+        self.assertEqual(Student.objects.filter(debt_status=Decimal('75.00')).count(), 2)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('reconcile_debts', '--batch-size', '1', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1:3], [f'  #{s.pk} {s.name} Test: 75.00 → 0.00 (-75.00)' for s in drifted])
+        self.assertIn('4 öğrenci kontrol edildi, 2 fark (toplam düzeltme: -150.00) düzeltildi', lines[3])
+        updates = [q for q in queries if q['sql'].startswith(f'UPDATE "{Student._meta.db_table}"')]
+        self.assertEqual(len(updates), 2)
+
+        # Açılış bakiyesi ve elle yapılan düzeltme korunur, defter dışı kayma düzelir
+        self.assertEqual(
+            dict(Student.objects.values_list('pk', 'debt_status')),
+            {self.student.pk: Decimal('150.00'), opening.pk: Decimal('300.00'),
+             drifted[0].pk: Decimal('0.00'), drifted[1].pk: Decimal('0.00')}
+        )
+        self.assertEqual(LedgerEntry.replay_balances(), 0)
+        self.assertFalse(LedgerEntry.objects.filter(entry_type='correction').exists())
+        self.assertEqual(LedgerEntry.reconcile()[1], [])
+
+
+class ScheduleMaterializationTests(MathMentorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.until = timezone.localdate() + timedelta(weeks=4)
+
+    def create_schedule(self):
+        return Schedule.objects.create(
+            student=self.student, day_of_week='monday', start_time=time(10, 0), end_time=time(11, 0)
+        )
+
+    def test_save_enqueues_job_and_worker_materializes(self):
+        schedule = self.create_schedule()
+        self.assertFalse(Lesson.objects.exists())
+        self.assertEqual(MaterializationJob.objects.get().status, 'pending')
+
+        results = MaterializationJob.run_pending(self.until)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(MaterializationJob.objects.get().status, 'done')
+        self.assertEqual(Lesson.objects.filter(schedule=schedule).count(), 4)
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.materialized_until, self.until)
+
+        # Ufuk ilerleyince sadece yeni tarihler üretilir
+        Schedule.extend_horizons(self.until + timedelta(weeks=2))
+        self.assertEqual(Lesson.objects.filter(schedule=schedule).count(), 6)
+
+    def test_concurrent_materialization_claims_range_once(self):
+        schedule = self.create_schedule()
+        stale = Schedule.objects.get(pk=schedule.pk)
+
+        self.assertIsNotNone(schedule.materialize(self.until))
+        # Aynı filigranı okumuş ikinci süreç
+        self.assertIsNone(stale.materialize(self.until))
+        self.assertEqual(Lesson.objects.count(), 4)
+        self.assertIsNone(MaterializationJob.claim_next().schedule.materialize(self.until))
+
+    def test_generate_reports_skipped_dates(self):
+        schedule = self.create_schedule()
+        today = timezone.localdate()
+        first = today + timedelta(days=7 - today.weekday())
+        dates = [first + timedelta(weeks=week) for week in range(3)]
+        other = self.create_student(name='Diğer', surname='Öğrenci')
+        Lesson.objects.create(
+            student=self.student, date=dates[0], start_time=time(10, 0), end_time=time(11, 0),
+            lesson_fee=Decimal('200.00'), status='cancelled'
+        )
+        conflicting = Lesson.objects.create(
+            student=other, date=dates[1], start_time=time(10, 30), end_time=time(11, 30), lesson_fee=Decimal('200.00')
+        )
+
+        report = generate_recurring_lessons(schedule, dates)
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['skipped'], [
+            {'date': dates[0].isoformat(), 'reason': 'exists'},
+            {'date': dates[1].isoformat(), 'reason': 'conflict', 'conflicting_lesson': {
+                'id': conflicting.id, 'student_name': 'Diğer Öğrenci', 'start_time': '10:30', 'end_time': '11:30',
+            }},
+        ])
+        self.assertTrue(Lesson.objects.filter(schedule=schedule, date=dates[2]).exists())
+
+
+class CalendarTests(MathMentorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.schedule = Schedule.objects.create(
+            student=self.student, day_of_week='monday', start_time=time(10, 0), end_time=time(11, 0)
+        )
+        today = timezone.localdate()
+        self.date_from = today + timedelta(days=1)
+        self.date_to = today + timedelta(weeks=8)
+        # İlk dört hafta üretilmiş, sonrası sanal
+        self.schedule.materialize(today + timedelta(weeks=4))
+
+    def get_calendar(self):
+        return self.client.get('/api/calendar/', {'from': self.date_from.isoformat(), 'to': self.date_to.isoformat()})
+
+    def test_merges_real_and_virtual_occurrences_in_two_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_calendar()
+        self.assertEqual(len(queries.captured_queries), 2)
+
+        lessons = response.json()['lessons']
+        self.assertEqual([lesson['virtual'] for lesson in lessons], [False] * 4 + [True] * 4)
+        self.assertEqual(lessons[-1]['lesson_fee'], '200.00')
+        self.assertEqual(lessons[-1]['student_name'], 'Öğrenci')
+
+    def test_materialize_turns_virtual_occurrence_into_lesson(self):
+        virtual = self.get_calendar().json()['lessons'][-1]
+        schedule_id, occurrence_date = virtual['virtual_id'].split(':')
+
+        response = self.client.post(
+            '/api/calendar/materialize/', {'schedule': int(schedule_id), 'date': occurrence_date}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        again = self.client.post(
+            '/api/calendar/materialize/', {'schedule': int(schedule_id), 'date': occurrence_date}, format='json'
+        )
+        self.assertEqual(again.json()['id'], response.json()['id'])
+
+        lessons = self.get_calendar().json()['lessons']
+        self.assertEqual(len(lessons), 8)
+        self.assertEqual(lessons[-1]['id'], response.json()['id'])
+        self.assertFalse(lessons[-1]['virtual'])
+
+
+@override_settings(WORKING_HOURS_START='09:00', WORKING_HOURS_END='13:00', FREE_SLOT_STEP_MINUTES=30)
+class FreeSlotTests(MathMentorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.date = timezone.localdate() + timedelta(days=1)
+        for start, end in ((time(9, 0), time(10, 0)), (time(10, 15), time(11, 30)), (time(12, 0), time(13, 0))):
+            Lesson.objects.create(student=self.student, date=self.date, start_time=start, end_time=end, lesson_fee=200)
+
+    def test_free_slots_sweep_across_days_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/lessons/free_slots/', {'date': self.date.isoformat(), 'duration': 60, 'count': 3})
+        self.assertEqual(len(queries.captured_queries), 1)
+        next_day = (self.date + timedelta(days=1)).isoformat()
+        # Gün içindeki boşluklar (10:00-10:15, 11:30-12:00) 60 dakikaya yetmiyor
+        self.assertEqual(response.json()['slots'], [
+            {'date': next_day, 'start_time': '09:00', 'end_time': '10:00'},
+            {'date': next_day, 'start_time': '09:30', 'end_time': '10:30'},
+            {'date': next_day, 'start_time': '10:00', 'end_time': '11:00'},
+        ])
+
+    def test_conflict_response_suggests_slots(self):
+        response = self.client.post('/api/lessons/', {
+            'student': self.student.id, 'date': self.date.isoformat(), 'start_time': '10:00', 'end_time': '10:30',
+            'lesson_fee': '200.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['suggested_slots'][0], {
+            'date': self.date.isoformat(), 'start_time': '11:30', 'end_time': '12:00'
+        })
+
+
+@override_settings(WORKING_HOURS_START='09:00', WORKING_HOURS_END='13:00')
+class OccupancyTests(MathMentorTestCase):
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.date = timezone.localdate() + timedelta(days=1)
+        Lesson.objects.create(student=self.student, date=self.date, start_time=time(9, 0), end_time=time(10, 0), lesson_fee=200)
+        # Dilim sınırında olmayan ders: değdiği dilimler dolu sayılır
+        Lesson.objects.create(student=self.student, date=self.date, start_time=time(11, 10), end_time=time(11, 40), lesson_fee=200)
+
+    def test_bitset_queries(self):
+        occupancy = OccupancyMap.load(self.date, self.date + timedelta(days=1))
+        self.assertEqual(occupancy.booked_slots(self.date, interval_mask(time(10, 0), time(11, 0))), 0)
+        self.assertEqual(occupancy.booked_slots(self.date, interval_mask(time(11, 30), time(12, 0))), 1)
+        self.assertEqual(occupancy.booked_slots(self.date), 4 + 3)
+        # 2 gün x 4 saat - 1 saat 45 dakika
+        self.assertEqual(occupancy.free_hours(), 8 - 1.75)
+
+    def test_occupancy_endpoint(self):
+        response = self.client.get('/api/dashboard/occupancy/', {'from': self.date.isoformat(), 'to': self.date.isoformat()})
+        day = response.json()['days'][0]
+        self.assertEqual(len(day['slots']), 96)
+        self.assertEqual(sum(day['slots'][36:40]), 4)
+        self.assertEqual(day['slots'][44:47], [1, 1, 1])
+        self.assertEqual(day['utilisation'], 43.8)
+        self.assertEqual(response.json()['summary']['free_hours'], 2.25)
+
+
+class SchedulePropagationTests(MathMentorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.schedule = Schedule.objects.create(
+            student=self.student, day_of_week='monday', start_time=time(10, 0), end_time=time(11, 0)
+        )
+        self.schedule.materialize(timezone.localdate() + timedelta(weeks=4))
+        self.lessons = list(Lesson.objects.filter(schedule=self.schedule).order_by('date'))
+
+    def test_update_moves_future_lessons_and_reports_conflicts(self):
+        other = self.create_student(name='Diğer', surname='Öğrenci')
+        blocked_date = self.lessons[1].date + timedelta(days=1)
+        blocker = Lesson.objects.create(
+            student=other, date=blocked_date, start_time=time(14, 30), end_time=time(15, 30), lesson_fee=100
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/schedules/{self.schedule.id}/', {
+                'day_of_week': 'tuesday', 'start_time': '14:00', 'end_time': '15:00', 'propagate_to_lessons': True,
+            }, format='json')
+        report = response.json()['propagation']
+        self.assertEqual(report['moved'], 3)
+        self.assertEqual(report['not_moved'][0]['id'], self.lessons[1].id)
+        self.assertEqual(report['not_moved'][0]['conflicting_lesson']['id'], blocker.id)
+
+        moved = Lesson.objects.get(pk=self.lessons[0].pk)
+        self.assertEqual((moved.date, moved.start_time), (self.lessons[0].date + timedelta(days=1), time(14, 0)))
+        self.assertEqual(Lesson.objects.get(pk=self.lessons[1].pk).date, self.lessons[1].date)
+        # Ders sayısından bağımsız: tek toplu çakışma sorgusu ve tek bulk_update
+        self.assertEqual(sum('UPDATE "mathmentor_lesson"' in query['sql'] for query in queries.captured_queries), 1)
+
+    def test_manually_moved_lesson_stays_in_its_week(self):
+        monday = self.lessons[2].date
+        manually_moved = self.lessons[2]
+        manually_moved.date = monday + timedelta(days=1)
+        manually_moved.save()
+
+        response = self.client.patch(f'/api/schedules/{self.schedule.id}/', {
+            'day_of_week': 'wednesday', 'propagate_to_lessons': True,
+        }, format='json')
+        self.assertEqual(response.json()['propagation']['moved'], len(self.lessons))
+
+        # Salıya alınmış ders perşembeye değil, kendi haftasının çarşambasına gider
+        self.assertEqual(Lesson.objects.get(pk=manually_moved.pk).date, monday + timedelta(days=2))
+        for lesson in self.lessons:
+            self.assertEqual(Lesson.objects.get(pk=lesson.pk).date.weekday(), 2)
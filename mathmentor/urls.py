@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     StudentViewSet, AssignmentViewSet, ScheduleViewSet, 
-    LessonViewSet, NotificationViewSet, DashboardViewSet
+    LessonViewSet, NotificationViewSet, DashboardViewSet, CalendarViewSet, SyncViewSet
 )
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -15,6 +15,8 @@ router.register(r'schedules', ScheduleViewSet)
 router.register(r'lessons', LessonViewSet)
 router.register(r'notifications', NotificationViewSet)
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'calendar', CalendarViewSet, basename='calendar')
+router.register(r'sync', SyncViewSet, basename='sync')
 
 urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -1,45 +1,123 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q, Sum, Count
+from django.utils.dateparse import parse_datetime
+from django.db.models import Q, F, Sum, Count, Exists, OuterRef, Prefetch
+from django.db.models.functions import TruncMonth, ExtractWeekDay
 from datetime import datetime, timedelta, date
-from .models import Student, Assignment, Schedule, Lesson, Notification
+from .models import (
+    Student, Assignment, Schedule, Lesson, LessonConflictError, Notification, DailyLessonRollup, DeletionTombstone
+)
+from .scheduling import virtual_occurrences, find_free_slots, find_free_schedule_slots, duration_minutes, working_hours
 from .serializers import (
     StudentSerializer, AssignmentSerializer, ScheduleSerializer, 
-    LessonSerializer, NotificationSerializer, DashboardStatsSerializer,
+    LessonSerializer, LessonListSerializer, NotificationSerializer, DashboardStatsSerializer,
     WeeklyScheduleSerializer
 )
+from .export import CSVRenderer, NDJSONRenderer, STREAMERS
+from .occupancy import OccupancyMap, SLOT_MINUTES, working_mask
+from .pagination import LessonPagination, NotificationPagination, AssignmentPagination
+from .response_cache import cached_response, lessons_expiry, bump_data_version
+
+
+class SparseFieldsetViewMixin:
+    """
+    GET isteklerinde ?fields=a,b / ?omit=c / ?expand=d parametreleri.
+    İstenmeyen büyük alanlar (serializer.deferrable_fields) sorguda defer edilir;
+    expand edilen ilişkiler expandable_prefetches ile tek sorguda önceden yüklenir.
+    Aksiyonlardan sadece düz ders listesi dönen pending_payments seçimi uygular;
+    gruplu/özet yanıtlar (weekly_schedule, takvim, dashboard listeleri) hariçtir.
+    """
+    expandable_prefetches = {}  # expand adı -> prefetch_related argümanı (sadece retrieve)
+
+    def _query_param_list(self, name):
+        value = self.request.query_params.get(name, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            fieldset = {'fields': None, 'omit': (), 'expand': ()}
+            if self.request is not None and self.request.method == 'GET':
+                fieldset['fields'] = set(self._query_param_list('fields')) or None
+                fieldset['omit'] = set(self._query_param_list('omit'))
+                if self.action == 'retrieve':
+                    fieldset['expand'] = [
+                        name for name in self._query_param_list('expand') if name in self.expandable_prefetches
+                    ]
+            self._fieldset = fieldset
+        return self._fieldset
+
+    def field_requested(self, *names):
+        fieldset = self.get_fieldset()
+        return any(
+            name not in fieldset['omit'] and (fieldset['fields'] is None or name in fieldset['fields'])
+            for name in names
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(self.get_fieldset())
+        return context
 
-class StudentViewSet(viewsets.ModelViewSet):
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+
+        deferred = [
+            name for name in self.get_serializer_class().deferrable_fields
+            if not self.field_requested(name)
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        expand = self.get_fieldset()['expand']
+        if expand:
+            queryset = queryset.prefetch_related(*[self.expandable_prefetches[name] for name in expand])
+        return queryset
+
+
+class StudentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
+    expandable_prefetches = {
+        'lessons': Prefetch('lessons', queryset=Lesson.objects.order_by('-date', '-start_time', 'id')),
+        'assignments': Prefetch('assignments', queryset=Assignment.objects.order_by('-date_added', 'id')),
+    }
+
+    def get_queryset(self):
+        # Serializer'daki hesaplanan alanlar öğrenci başına ek sorgu yapmasın
+        if self.action in ('list', 'retrieve') and self.field_requested(*StudentSerializer.COMPUTED_FIELDS):
+            return self.queryset.with_stats()
+        return self.queryset
 
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         """Öğrenci istatistikleri"""
         student = self.get_object()
+        student_stats = student.get_stats()
         
         # Ders istatistikleri
-        total_lessons = student.lessons.count()
-        completed_lessons = student.lessons.filter(status='completed').count()
-        cancelled_lessons = student.lessons.filter(status='cancelled').count()
+        total_lessons = student_stats.total_lessons
+        completed_lessons = student_stats.completed_lessons
+        cancelled_lessons = student_stats.cancelled_lessons
         
         # Ödeme istatistikleri
-        total_earned = student.lessons.filter(
-            status='completed', payment_status='paid'
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-        
-        pending_payments = student.lessons.filter(
-            status='completed', payment_status='pending'
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
+        total_earned = student_stats.paid_total or 0
+        pending_payments = student_stats.pending_total or 0
         
         # Ödev istatistikleri
-        total_assignments = student.assignments.count()
-        completed_assignments = student.assignments.filter(is_completed=True).count()
+        total_assignments = student_stats.total_assignments
+        completed_assignments = student_stats.completed_assignments
+        # Gecikme bugünün tarihine bağlı olduğu için canlı hesaplanır
         overdue_assignments = student.assignments.filter(
             is_completed=False, due_date__lt=timezone.now().date()
         ).count()
@@ -65,12 +143,14 @@ class StudentViewSet(viewsets.ModelViewSet):
         
         return Response(stats)
 
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Assignment.objects.all()
     serializer_class = AssignmentSerializer
+    pagination_class = AssignmentPagination
 
     def get_queryset(self):
-        queryset = self.queryset
+        # Serializer student.name/surname okur
+        queryset = self.queryset.select_related('student')
         student_id = self.request.query_params.get('student_id')
         is_completed = self.request.query_params.get('is_completed')
         is_overdue = self.request.query_params.get('is_overdue')
@@ -95,9 +175,10 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         assignment.save()
         return Response({'status': 'completed'})
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
+    WEEKLY_SCHEDULE_MAX_DAYS = 62  # iki aylık takvim
 
     def create(self, request, *args, **kwargs):
         """Yeni haftalık program oluşturma - çakışma kontrolü ile"""
@@ -122,16 +203,12 @@ class ScheduleViewSet(viewsets.ModelViewSet):
                 parsed_end_time = end_time
             
             # Aynı gün ve saatte başka öğrenci programı var mı kontrol et
-            existing_schedule = Schedule.objects.filter(
-                day_of_week=day_of_week,
-                is_active=True
-            ).exclude(
-                # Zaman çakışması kontrolü
-                Q(end_time__lte=parsed_start_time) | Q(start_time__gte=parsed_end_time)
-            ).first()
+            has_conflict, existing_schedule = Schedule.check_schedule_conflict(
+                day_of_week, parsed_start_time, parsed_end_time, use_cache=False
+            )
             
-            if existing_schedule:
-                student = Student.objects.get(id=existing_schedule.student_id)
+            if has_conflict:
+                student = existing_schedule.student
                 return Response({
                     'error': f'Bu gün ve saatte çakışma var! {student.name} {student.surname} öğrencisinin {existing_schedule.start_time}-{existing_schedule.end_time} saatleri arasında haftalık programı bulunmaktadır.',
                     'conflicting_schedule': {
@@ -140,7 +217,10 @@ class ScheduleViewSet(viewsets.ModelViewSet):
                         'day_of_week': existing_schedule.day_of_week,
                         'start_time': existing_schedule.start_time.strftime('%H:%M'),
                         'end_time': existing_schedule.end_time.strftime('%H:%M')
-                    }
+                    },
+                    'suggested_slots': find_free_schedule_slots(
+                        day_of_week, duration_minutes(parsed_start_time, parsed_end_time), not_before=parsed_start_time
+                    )
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Çakışma yoksa normal create işlemini yap
@@ -158,7 +238,10 @@ class ScheduleViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def update(self, request, *args, **kwargs):
-        """Haftalık program güncelleme - çakışma kontrolü ile"""
+        """
+        Haftalık program güncelleme - çakışma kontrolü ile.
+        "propagate_to_lessons": true ile bu programın gelecekteki planlanmış dersleri de güncellenir.
+        """
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         data = request.data
@@ -181,18 +264,12 @@ class ScheduleViewSet(viewsets.ModelViewSet):
                 parsed_end_time = end_time
             
             # Aynı gün ve saatte başka öğrenci programı var mı kontrol et (mevcut hariç)
-            existing_schedule = Schedule.objects.filter(
-                day_of_week=day_of_week,
-                is_active=True
-            ).exclude(
-                id=instance.id
-            ).exclude(
-                # Zaman çakışması kontrolü
-                Q(end_time__lte=parsed_start_time) | Q(start_time__gte=parsed_end_time)
-            ).first()
+            has_conflict, existing_schedule = Schedule.check_schedule_conflict(
+                day_of_week, parsed_start_time, parsed_end_time, instance.id, use_cache=False
+            )
             
-            if existing_schedule:
-                student = Student.objects.get(id=existing_schedule.student_id)
+            if has_conflict:
+                student = existing_schedule.student
                 return Response({
                     'error': f'Bu gün ve saatte çakışma var! {student.name} {student.surname} öğrencisinin {existing_schedule.start_time}-{existing_schedule.end_time} saatleri arasında haftalık programı bulunmaktadır.',
                     'conflicting_schedule': {
@@ -201,11 +278,23 @@ class ScheduleViewSet(viewsets.ModelViewSet):
                         'day_of_week': existing_schedule.day_of_week,
                         'start_time': existing_schedule.start_time.strftime('%H:%M'),
                         'end_time': existing_schedule.end_time.strftime('%H:%M')
-                    }
+                    },
+                    'suggested_slots': find_free_schedule_slots(
+                        day_of_week, duration_minutes(parsed_start_time, parsed_end_time),
+                        not_before=parsed_start_time, exclude_schedule_id=instance.id
+                    )
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Çakışma yoksa normal update işlemini yap
-            return super().update(request, *args, **kwargs)
+            # Çakışma yoksa normal update işlemini yap; istenirse gelecekteki
+            # planlanmış dersler de aynı transaction içinde taşınır
+            propagate = str(data.get('propagate_to_lessons', '')).lower() in ('true', '1')
+            old_values = {field: getattr(instance, field) for field in Schedule.PROPAGATED_FIELDS}
+            with transaction.atomic():
+                response = super().update(request, *args, partial=partial, **kwargs)
+                if propagate and response.status_code == status.HTTP_200_OK:
+                    schedule = Schedule.objects.select_related('student').get(pk=instance.pk)
+                    response.data['propagation'] = schedule.propagate_to_lessons(old_values)
+            return response
             
         except ValueError as e:
             return Response({
@@ -224,7 +313,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
     def get_queryset(self):
-        queryset = self.queryset.filter(is_active=True)
+        queryset = self.queryset.filter(is_active=True).select_related('student')
         student_id = self.request.query_params.get('student_id')
         day_of_week = self.request.query_params.get('day_of_week')
         
@@ -237,86 +326,59 @@ class ScheduleViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def weekly_schedule(self, request):
-        """Haftalık ders programı - bugünden başlayarak 7 gün"""
-        from datetime import timedelta
-        today = timezone.now().date()
-        
-        weekly_data = []
+        """
+        Ders programı - varsayılan olarak bugünden başlayarak 7 gün.
+        ?start=YYYY-MM-DD&days=N ile (en fazla WEEKLY_SCHEDULE_MAX_DAYS gün) aylık takvim de alınabilir.
+        """
+        now = timezone.now()
+        try:
+            start_date = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date() \
+                if request.query_params.get('start') else timezone.localdate()
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({
+                'error': 'Geçersiz tarih aralığı (start: YYYY-MM-DD, days: sayı)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= self.WEEKLY_SCHEDULE_MAX_DAYS:
+            return Response({
+                'error': f'days 1 ile {self.WEEKLY_SCHEDULE_MAX_DAYS} arasında olmalı'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        end_date = start_date + timedelta(days=days - 1)
         day_names = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar']
-        
-        for i in range(7):
-            current_date = today + timedelta(days=i)
-            day_name = day_names[current_date.weekday()]
-            
-            # O gün için planlanmış dersler
-            lessons = Lesson.objects.filter(
-                date=current_date
-            ).select_related('student').order_by('start_time')
-            
+
+        # Tüm aralık tek sorguda; dersler tarihe göre gruplanır
+        lessons = Lesson.objects.filter(
+            date__gte=start_date, date__lte=end_date
+        ).order_by('date', 'start_time')
+        lessons_by_date = {}
+        for lesson in LessonListSerializer(lessons, many=True, context={'now': now}).data:
+            lessons_by_date.setdefault(lesson['date'], []).append(lesson)
+
+        weekly_data = []
+        for i in range(days):
+            current_date = start_date + timedelta(days=i)
             weekly_data.append({
                 'date': current_date.isoformat(),
-                'day_name': day_name,
-                'lessons': LessonSerializer(lessons, many=True).data
+                'day_name': day_names[current_date.weekday()],
+                'lessons': lessons_by_date.get(current_date.isoformat(), [])
             })
         
         return Response(weekly_data)
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
+    pagination_class = LessonPagination
 
     def create(self, request, *args, **kwargs):
-        """Yeni ders oluşturma - çakışma kontrolü ile"""
-        data = request.data
-        
-        # Tarih ve saat bilgilerini al
-        lesson_date = data.get('date')
-        start_time = data.get('start_time')
-        end_time = data.get('end_time')
-        
+        """Yeni ders oluşturma - çakışma kontrolü Lesson.save() içinde"""
         try:
-            # Tarih ve saat formatlarını parse et
-            if isinstance(lesson_date, str):
-                parsed_date = datetime.strptime(lesson_date, '%Y-%m-%d').date()
-            else:
-                parsed_date = lesson_date
-                
-            if isinstance(start_time, str):
-                parsed_start_time = datetime.strptime(start_time, '%H:%M').time()
-            else:
-                parsed_start_time = start_time
-                
-            if isinstance(end_time, str):
-                parsed_end_time = datetime.strptime(end_time, '%H:%M').time()
-            else:
-                parsed_end_time = end_time
-            
-            # Çakışma kontrolü
-            has_conflict, conflicting_lesson = Lesson.check_schedule_conflict(
-                parsed_date, parsed_start_time, parsed_end_time
-            )
-            
-            if has_conflict:
-                return Response({
-                    'error': f'Bu tarih ve saatte çakışma var! {conflicting_lesson.student.name} {conflicting_lesson.student.surname} öğrencisinin {conflicting_lesson.start_time}-{conflicting_lesson.end_time} saatleri arasında dersi bulunmaktadır.',
-                    'conflicting_lesson': {
-                        'id': conflicting_lesson.id,
-                        'student_name': f'{conflicting_lesson.student.name} {conflicting_lesson.student.surname}',
-                        'date': conflicting_lesson.date.isoformat(),
-                        'start_time': conflicting_lesson.start_time.strftime('%H:%M'),
-                        'end_time': conflicting_lesson.end_time.strftime('%H:%M'),
-                        'status': conflicting_lesson.status
-                    }
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Çakışma yoksa normal create işlemini yap
             return super().create(request, *args, **kwargs)
-            
-        except ValueError as e:
-            return Response({
-                'error': 'Geçersiz tarih/saat formatı',
-                'details': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
+        except LessonConflictError as e:
+            return Response(e.as_response_data(suggest=True), status=status.HTTP_400_BAD_REQUEST)
+        except APIException:
+            raise
         except Exception as e:
             return Response({
                 'error': 'Ders oluşturulurken bir hata oluştu',
@@ -324,59 +386,13 @@ class LessonViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def update(self, request, *args, **kwargs):
-        """Ders güncelleme - çakışma kontrolü ile"""
-        partial = kwargs.pop('partial', False)
-        instance = self.get_object()
-        data = request.data
-        
-        # Tarih ve saat bilgilerini al
-        lesson_date = data.get('date', instance.date)
-        start_time = data.get('start_time', instance.start_time)
-        end_time = data.get('end_time', instance.end_time)
-        
+        """Ders güncelleme - çakışma kontrolü sadece tarih/saat/durum değiştiyse (Lesson.save())"""
         try:
-            # Tarih ve saat formatlarını parse et
-            if isinstance(lesson_date, str):
-                parsed_date = datetime.strptime(lesson_date, '%Y-%m-%d').date()
-            else:
-                parsed_date = lesson_date
-                
-            if isinstance(start_time, str):
-                parsed_start_time = datetime.strptime(start_time, '%H:%M').time()
-            else:
-                parsed_start_time = start_time
-                
-            if isinstance(end_time, str):
-                parsed_end_time = datetime.strptime(end_time, '%H:%M').time()
-            else:
-                parsed_end_time = end_time
-            
-            # Çakışma kontrolü (mevcut dersi hariç tut)
-            has_conflict, conflicting_lesson = Lesson.check_schedule_conflict(
-                parsed_date, parsed_start_time, parsed_end_time, instance.id
-            )
-            
-            if has_conflict:
-                return Response({
-                    'error': f'Bu tarih ve saatte çakışma var! {conflicting_lesson.student.name} {conflicting_lesson.student.surname} öğrencisinin {conflicting_lesson.start_time}-{conflicting_lesson.end_time} saatleri arasında dersi bulunmaktadır.',
-                    'conflicting_lesson': {
-                        'id': conflicting_lesson.id,
-                        'student_name': f'{conflicting_lesson.student.name} {conflicting_lesson.student.surname}',
-                        'date': conflicting_lesson.date.isoformat(),
-                        'start_time': conflicting_lesson.start_time.strftime('%H:%M'),
-                        'end_time': conflicting_lesson.end_time.strftime('%H:%M'),
-                        'status': conflicting_lesson.status
-                    }
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Çakışma yoksa normal update işlemini yap
             return super().update(request, *args, **kwargs)
-            
-        except ValueError as e:
-            return Response({
-                'error': 'Geçersiz tarih/saat formatı',
-                'details': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
+        except LessonConflictError as e:
+            return Response(e.as_response_data(suggest=True), status=status.HTTP_400_BAD_REQUEST)
+        except APIException:
+            raise
         except Exception as e:
             return Response({
                 'error': 'Ders güncellenirken bir hata oluştu',
@@ -389,7 +405,8 @@ class LessonViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
     def get_queryset(self):
-        queryset = self.queryset.select_related('student', 'schedule')
+        # schedule alanı sadece id olarak serileştirilir; join gerekmez
+        queryset = self.queryset.select_related('student')
         
         # Filtreleme parametreleri
         student_id = self.request.query_params.get('student_id')
@@ -428,7 +445,10 @@ class LessonViewSet(viewsets.ModelViewSet):
         lesson.status = 'completed'
         lesson.topic_covered = topic_covered
         lesson.notes = notes
-        lesson.save()
+        try:
+            lesson.save(update_fields=['status', 'topic_covered', 'notes', 'updated_at'])
+        except LessonConflictError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
         
         # Öğrencinin son ders tarihini güncelle
         lesson.student.last_lesson_date = lesson.date
@@ -445,7 +465,7 @@ class LessonViewSet(viewsets.ModelViewSet):
         
         lesson.status = 'cancelled'
         lesson.cancel_reason = cancel_reason
-        lesson.save()
+        lesson.save(update_fields=['status', 'cancel_reason', 'updated_at'])
         
         return Response({'status': 'cancelled'})
 
@@ -454,10 +474,80 @@ class LessonViewSet(viewsets.ModelViewSet):
         """Ders ücretini ödendi olarak işaretle"""
         lesson = self.get_object()
         lesson.payment_status = 'paid'
-        lesson.save()
+        lesson.save(update_fields=['payment_status', 'updated_at'])
         
         return Response({'status': 'paid'})
 
+    FREE_SLOTS_MAX_COUNT = 50
+    FREE_SLOTS_MAX_DAYS = 62
+
+    @action(detail=False, methods=['get'])
+    def free_slots(self, request):
+        """
+        Boş saatler: ?date=YYYY-MM-DD&duration=dakika&count=N&days=N
+        Çalışma saatleri içinde, verilen tarihten itibaren ilk N boş aralık (tek sorgu).
+        """
+        try:
+            start_date = datetime.strptime(request.query_params['date'], '%Y-%m-%d').date() \
+                if request.query_params.get('date') else timezone.localdate()
+            duration = int(request.query_params.get('duration', 60))
+            count = int(request.query_params.get('count', settings.FREE_SLOT_COUNT))
+            days = int(request.query_params.get('days', settings.FREE_SLOT_SEARCH_DAYS))
+        except ValueError:
+            return Response({
+                'error': 'Geçersiz parametre (date: YYYY-MM-DD, duration/count/days: sayı)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        day_start, day_end = working_hours()
+        if not 0 < duration <= day_end - day_start:
+            return Response({
+                'error': f'duration 1 ile {day_end - day_start} dakika arasında olmalı'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= count <= self.FREE_SLOTS_MAX_COUNT or not 1 <= days <= self.FREE_SLOTS_MAX_DAYS:
+            return Response({
+                'error': f'count en fazla {self.FREE_SLOTS_MAX_COUNT}, days en fazla {self.FREE_SLOTS_MAX_DAYS} olabilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'date': start_date.isoformat(),
+            'duration': duration,
+            'slots': find_free_slots(start_date, duration, count=count, days=days),
+        })
+
+    BULK_MAX_LESSONS = 500
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Toplu ders işlemi: {"ids": [...], "action": "mark_paid|mark_completed|cancel", "reason": "..."}
+        Tek transaction; her id için sonuç döner.
+        """
+        lesson_ids = request.data.get('ids')
+        bulk_action = request.data.get('action')
+
+        if bulk_action not in Lesson.BULK_ACTIONS:
+            return Response({
+                'error': f"Geçersiz işlem. Geçerli işlemler: {', '.join(Lesson.BULK_ACTIONS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if (
+            not isinstance(lesson_ids, list) or not lesson_ids
+            or not all(isinstance(lesson_id, int) and not isinstance(lesson_id, bool) for lesson_id in lesson_ids)
+        ):
+            return Response({
+                'error': 'ids boş olmayan bir ders id listesi olmalı'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(lesson_ids) > self.BULK_MAX_LESSONS:
+            return Response({
+                'error': f'Tek istekte en fazla {self.BULK_MAX_LESSONS} ders işlenebilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = Lesson.apply_bulk_action(lesson_ids, bulk_action, reason=request.data.get('reason') or '')
+        return Response({
+            'action': bulk_action,
+            'updated': sum(1 for result in results if result['result'] == 'updated'),
+            'results': results,
+        })
+
     @action(detail=True, methods=['post'])
     def quick_complete(self, request, pk=None):
         """Hızlı ders tamamlama - kapsamlı işlem"""
@@ -472,16 +562,14 @@ class LessonViewSet(viewsets.ModelViewSet):
         
         # Ödeme durumunu güncelle
         payment_received = data.get('payment_received', False)
-        if payment_received:
-            lesson.payment_status = 'paid'
-        else:
-            lesson.payment_status = 'pending'
-            # Öğrencinin borcunu güncelle
-            student = lesson.student
-            student.debt_status = (student.debt_status or 0) + lesson.lesson_fee
-            student.save()
-        
-        lesson.save()
+        lesson.payment_status = 'paid' if payment_received else 'pending'
+        try:
+            lesson.save(update_fields=[
+                'status', 'topic_covered', 'notes', 'book_progress', 'payment_status', 'updated_at'
+            ])
+        except LessonConflictError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
+        # Borç, ders kaydedilirken defter (LedgerEntry) üzerinden güncellendi
         
         # Öğrencinin son ders bilgilerini güncelle
         student = lesson.student
@@ -489,7 +577,7 @@ class LessonViewSet(viewsets.ModelViewSet):
         student.last_topic = lesson.topic_covered
         if lesson.book_progress:
             student.book_progress = lesson.book_progress
-        student.save()
+        student.save(update_fields=['last_lesson_date', 'last_topic', 'book_progress', 'updated_at'])
         
         # Önceki ödev durumunu kontrol et
         previous_assignment_completed = data.get('previous_assignment_completed')
@@ -498,7 +586,7 @@ class LessonViewSet(viewsets.ModelViewSet):
             latest_assignment = Assignment.objects.filter(
                 student=student,
                 is_completed=False
-            ).order_by('-created_at').first()
+            ).order_by('-date_added').first()
             
             if latest_assignment:
                 latest_assignment.is_completed = previous_assignment_completed
@@ -525,15 +613,49 @@ class LessonViewSet(viewsets.ModelViewSet):
             'debt_updated': not payment_received
         })
 
+    # Dışa aktarılan sütunlar: (başlık, values_list alanı)
+    EXPORT_COLUMNS = [
+        ('id', 'id'),
+        ('date', 'date'),
+        ('start_time', 'start_time'),
+        ('end_time', 'end_time'),
+        ('student_id', 'student_id'),
+        ('student_name', 'student__name'),
+        ('student_surname', 'student__surname'),
+        ('lesson_type', 'lesson_type'),
+        ('status', 'status'),
+        ('payment_status', 'payment_status'),
+        ('lesson_fee', 'lesson_fee'),
+        ('topic_covered', 'topic_covered'),
+        ('cancel_reason', 'cancel_reason'),
+    ]
+    EXPORT_CHUNK_SIZE = 2000
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Dersleri (liste filtreleriyle) CSV veya NDJSON olarak akış halinde dışa aktar"""
+        export_format = request.accepted_renderer.format
+        rows = self.get_queryset().order_by('date', 'start_time', 'id').values_list(
+            *[field for _, field in self.EXPORT_COLUMNS]
+        ).iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+
+        response = StreamingHttpResponse(
+            STREAMERS[export_format]([column for column, _ in self.EXPORT_COLUMNS], rows),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8'
+        )
+        filename = f"dersler-{timezone.localdate().isoformat()}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=False, methods=['get'])
     def pending_payments(self, request):
         """Bekleyen ödemeler listesi"""
         pending_lessons = Lesson.objects.filter(
             status='completed',
             payment_status__in=['pending', 'overdue']
-        ).select_related('student').order_by('-date')
+        ).order_by('-date')
         
-        serializer = LessonSerializer(pending_lessons, many=True)
+        serializer = LessonListSerializer(pending_lessons, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -572,24 +694,6 @@ class LessonViewSet(viewsets.ModelViewSet):
                 else:
                     lesson.end_time = new_end_time
             
-            # Kapsamlı çakışma kontrolü (tüm öğrenciler için)
-            has_conflict, conflicting_lesson = Lesson.check_schedule_conflict(
-                lesson.date, lesson.start_time, lesson.end_time, lesson.id
-            )
-            
-            if has_conflict:
-                return Response({
-                    'error': f'Bu tarih ve saatte çakışma var! {conflicting_lesson.student.name} {conflicting_lesson.student.surname} öğrencisinin {conflicting_lesson.start_time}-{conflicting_lesson.end_time} saatleri arasında dersi bulunmaktadır.',
-                    'conflicting_lesson': {
-                        'id': conflicting_lesson.id,
-                        'student_name': f'{conflicting_lesson.student.name} {conflicting_lesson.student.surname}',
-                        'date': conflicting_lesson.date.isoformat(),
-                        'start_time': conflicting_lesson.start_time.strftime('%H:%M'),
-                        'end_time': conflicting_lesson.end_time.strftime('%H:%M'),
-                        'status': conflicting_lesson.status
-                    }
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
             # Güncelleme notunu ekle
             if update_reason:
                 update_note = f"Ders zamanı güncellendi: {old_date} {old_start_time}-{old_end_time} → {lesson.date} {lesson.start_time}-{lesson.end_time}. Sebep: {update_reason}"
@@ -601,7 +705,8 @@ class LessonViewSet(viewsets.ModelViewSet):
             else:
                 lesson.notes = update_note
             
-            lesson.save()
+            # Kapsamlı çakışma kontrolü Lesson.save() içinde (tüm öğrenciler için)
+            lesson.save(update_fields=['date', 'start_time', 'end_time', 'notes', 'updated_at'])
             
             # Bildirim oluştur
             Notification.objects.create(
@@ -628,6 +733,8 @@ class LessonViewSet(viewsets.ModelViewSet):
                 }
             })
             
+        except LessonConflictError as e:
+            return Response(e.as_response_data(suggest=True), status=status.HTTP_400_BAD_REQUEST)
         except ValueError as e:
             return Response({
                 'error': 'Geçersiz tarih/saat formatı',
@@ -663,7 +770,7 @@ class LessonViewSet(viewsets.ModelViewSet):
         else:
             lesson.notes = cancel_note
         
-        lesson.save()
+        lesson.save(update_fields=['status', 'cancel_reason', 'payment_status', 'notes', 'updated_at'])
         
         # Bildirim oluştur
         Notification.objects.create(
@@ -682,12 +789,13 @@ class LessonViewSet(viewsets.ModelViewSet):
             'message': 'Ders başarıyla iptal edildi'
         })
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = self.queryset.select_related('student')
         student_id = self.request.query_params.get('student_id')
         notification_type = self.request.query_params.get('type')
         unread_only = self.request.query_params.get('unread_only')
@@ -712,13 +820,19 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Tüm bildirimleri okundu yap"""
-        self.get_queryset().update(is_read=True)
+        self.get_queryset().update(is_read=True, updated_at=timezone.now())
+        # QuerySet.update sinyal tetiklemez
+        bump_data_version()
         return Response({'status': 'all_read'})
 
+# DailyLessonRollup satırındaki toplam ders sayısı (tüm durumlar)
+ROLLUP_LESSON_COUNT = F('scheduled_count') + F('completed_count') + F('cancelled_count') + F('missed_count')
+
 class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['get'])
+    @cached_response('dashboard-stats')
     def stats(self, request):
         """Dashboard istatistikleri"""
         today = timezone.now().date()
@@ -726,18 +840,16 @@ class DashboardViewSet(viewsets.ViewSet):
         
         # Temel istatistikler
         total_students = Student.objects.count()
-        total_lessons_today = Lesson.objects.filter(date=today).count()
-        
-        # Ödeme istatistikleri
-        total_pending_payments = Lesson.objects.filter(
-            status='completed', payment_status='pending'
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
         
-        monthly_earnings = Lesson.objects.filter(
-            status='completed', 
-            payment_status='paid',
-            date__gte=this_month
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
+        # Ders ve ödeme istatistikleri - günlük özet tablosundan
+        lesson_totals = DailyLessonRollup.objects.order_by().aggregate(
+            lessons_today=Sum(ROLLUP_LESSON_COUNT, filter=Q(date=today)),
+            pending=Sum('pending_total'),
+            monthly_earnings=Sum('paid_total', filter=Q(date__gte=this_month)),
+        )
+        total_lessons_today = lesson_totals['lessons_today'] or 0
+        total_pending_payments = lesson_totals['pending'] or 0
+        monthly_earnings = lesson_totals['monthly_earnings'] or 0
         
         # Ödev istatistikleri
         total_completed_assignments = Assignment.objects.filter(is_completed=True).count()
@@ -757,6 +869,61 @@ class DashboardViewSet(viewsets.ViewSet):
         serializer = DashboardStatsSerializer(stats)
         return Response(serializer.data)
 
+    OCCUPANCY_MAX_DAYS = 92
+
+    @action(detail=False, methods=['get'])
+    @cached_response('dashboard-occupancy')
+    def occupancy(self, request):
+        """
+        Doluluk ısı haritası: ?from=YYYY-MM-DD&to=YYYY-MM-DD (varsayılan bu hafta).
+        Her gün için 15 dakikalık dilimler (1 = dolu) ve çalışma saatleri içindeki doluluk.
+        """
+        today = timezone.localdate()
+        try:
+            date_from = datetime.strptime(request.query_params['from'], '%Y-%m-%d').date() \
+                if request.query_params.get('from') else today - timedelta(days=today.weekday())
+            date_to = datetime.strptime(request.query_params['to'], '%Y-%m-%d').date() \
+                if request.query_params.get('to') else date_from + timedelta(days=6)
+        except ValueError:
+            return Response({
+                'error': 'Geçersiz tarih aralığı (from, to: YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (date_to - date_from).days < self.OCCUPANCY_MAX_DAYS:
+            return Response({
+                'error': f'to, from tarihinden önce olamaz ve aralık en fazla {self.OCCUPANCY_MAX_DAYS} gün olabilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        occupancy = OccupancyMap.load(date_from, date_to)
+        mask = working_mask()
+        working_slots = mask.bit_count()
+
+        days = []
+        total_booked = 0
+        for day_date in occupancy.dates():
+            booked = occupancy.booked_slots(day_date, mask)
+            total_booked += booked
+            days.append({
+                'date': day_date.isoformat(),
+                'slots': occupancy.slots(day_date),
+                'booked_hours': booked * SLOT_MINUTES / 60,
+                'free_hours': occupancy.free_minutes(day_date, mask) / 60,
+                'utilisation': round(booked / working_slots * 100, 1) if working_slots else 0,
+            })
+
+        total_slots = working_slots * len(days)
+        return Response({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'slot_minutes': SLOT_MINUTES,
+            'working_hours': {'start': settings.WORKING_HOURS_START, 'end': settings.WORKING_HOURS_END},
+            'days': days,
+            'summary': {
+                'booked_hours': total_booked * SLOT_MINUTES / 60,
+                'free_hours': occupancy.free_hours(mask),
+                'utilisation': round(total_booked / total_slots * 100, 1) if total_slots else 0,
+            },
+        })
+
     @action(detail=False, methods=['get'])
     def detailed_stats(self, request):
         """Detaylı istatistikler sayfası için kapsamlı veriler"""
@@ -767,125 +934,135 @@ class DashboardViewSet(viewsets.ViewSet):
         last_year = today.replace(year=today.year-1, month=1, day=1)
         
         # Genel İstatistikler
-        total_students = Student.objects.count()
-        active_students = Student.objects.filter(
-            lessons__date__gte=this_month
-        ).distinct().count()
+        student_totals = Student.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(Exists(
+                Lesson.objects.filter(student=OuterRef('pk'), date__gte=this_month)
+            ))),
+        )
+        total_students = student_totals['total']
+        active_students = student_totals['active']
+        
+        # Ders ve ödeme istatistikleri - günlük özet tablosundan tek sorgu
+        this_month_range = Q(date__gte=this_month)
+        last_month_range = Q(date__gte=last_month_start, date__lt=this_month)
+        lesson_totals = {
+            key: value or 0
+            for key, value in DailyLessonRollup.objects.order_by().aggregate(
+                total_lessons=Sum(ROLLUP_LESSON_COUNT),
+                completed_lessons=Sum('completed_count'),
+                cancelled_lessons=Sum('cancelled_count'),
+                missed_lessons=Sum('missed_count'),
+                monthly_lessons=Sum(ROLLUP_LESSON_COUNT, filter=this_month_range),
+                last_month_lessons=Sum(ROLLUP_LESSON_COUNT, filter=last_month_range),
+                total_earned=Sum('paid_total'),
+                monthly_earnings=Sum('paid_total', filter=this_month_range),
+                last_month_earnings=Sum('paid_total', filter=last_month_range),
+                total_pending=Sum('pending_total'),
+                overdue_payments=Sum('overdue_total'),
+                online_lessons=Sum('online_count'),
+                physical_lessons=Sum('physical_count'),
+            ).items()
+        }
         
         # Ders İstatistikleri
-        total_lessons = Lesson.objects.count()
-        completed_lessons = Lesson.objects.filter(status='completed').count()
-        cancelled_lessons = Lesson.objects.filter(status='cancelled').count()
-        missed_lessons = Lesson.objects.filter(status='missed').count()
-        
-        # Bu ay ders istatistikleri
-        monthly_lessons = Lesson.objects.filter(date__gte=this_month).count()
-        monthly_completed = Lesson.objects.filter(
-            date__gte=this_month, status='completed'
-        ).count()
+        total_lessons = lesson_totals['total_lessons']
+        completed_lessons = lesson_totals['completed_lessons']
+        cancelled_lessons = lesson_totals['cancelled_lessons']
+        missed_lessons = lesson_totals['missed_lessons']
         
         # Geçen ay ile karşılaştırma
-        last_month_lessons = Lesson.objects.filter(
-            date__gte=last_month_start, date__lt=this_month
-        ).count()
+        monthly_lessons = lesson_totals['monthly_lessons']
+        last_month_lessons = lesson_totals['last_month_lessons']
         lessons_growth = ((monthly_lessons - last_month_lessons) / last_month_lessons * 100) if last_month_lessons > 0 else 0
         
         # Ödeme İstatistikleri
-        total_earned = Lesson.objects.filter(
-            status='completed', payment_status='paid'
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-        
-        monthly_earnings = Lesson.objects.filter(
-            status='completed', payment_status='paid', date__gte=this_month
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-        
-        last_month_earnings = Lesson.objects.filter(
-            status='completed', payment_status='paid',
-            date__gte=last_month_start, date__lt=this_month
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-        
+        total_earned = lesson_totals['total_earned']
+        monthly_earnings = lesson_totals['monthly_earnings']
+        last_month_earnings = lesson_totals['last_month_earnings']
         earnings_growth = ((monthly_earnings - last_month_earnings) / last_month_earnings * 100) if last_month_earnings > 0 else 0
-        
-        total_pending = Lesson.objects.filter(
-            status='completed', payment_status='pending'
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-        
-        overdue_payments = Lesson.objects.filter(
-            status='completed', payment_status='overdue'
-        ).aggregate(total=Sum('lesson_fee'))['total'] or 0
+        total_pending = lesson_totals['total_pending']
+        overdue_payments = lesson_totals['overdue_payments']
         
         # Ödev İstatistikleri
-        total_assignments = Assignment.objects.count()
-        completed_assignments = Assignment.objects.filter(is_completed=True).count()
-        overdue_assignments = Assignment.objects.filter(
-            is_completed=False, due_date__lt=today
-        ).count()
+        assignment_totals = Assignment.objects.order_by().aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(is_completed=True)),
+            overdue=Count('id', filter=Q(is_completed=False, due_date__lt=today)),
+        )
+        total_assignments = assignment_totals['total']
+        completed_assignments = assignment_totals['completed']
+        overdue_assignments = assignment_totals['overdue']
         assignment_completion_rate = (completed_assignments / total_assignments * 100) if total_assignments > 0 else 0
         
         # Ders türü dağılımı
-        online_lessons = Lesson.objects.filter(lesson_type='online').count()
-        physical_lessons = Lesson.objects.filter(lesson_type='physical').count()
+        online_lessons = lesson_totals['online_lessons']
+        physical_lessons = lesson_totals['physical_lessons']
+        
+        # Son 12 ay aylık kazanç trendi - tek gruplu sorgu (TruncMonth)
+        month_starts = [
+            (today.replace(day=1) - timedelta(days=30*i)).replace(day=1)
+            for i in range(12)
+        ]
+        trend_end = (max(month_starts) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        monthly_rows = {
+            row['month']: row
+            for row in DailyLessonRollup.objects.filter(
+                date__gte=min(month_starts), date__lte=trend_end
+            ).annotate(month=TruncMonth('date')).order_by().values('month').annotate(
+                earnings=Sum('paid_total'),
+                lessons=Sum('completed_count'),
+            )
+        }
         
-        # Son 12 ay aylık kazanç trendi
         monthly_earnings_trend = []
-        for i in range(12):
-            month_start = (today.replace(day=1) - timedelta(days=30*i)).replace(day=1)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            
-            earnings = Lesson.objects.filter(
-                status='completed', payment_status='paid',
-                date__gte=month_start, date__lte=month_end
-            ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-            
-            lessons_count = Lesson.objects.filter(
-                status='completed',
-                date__gte=month_start, date__lte=month_end
-            ).count()
-            
+        for month_start in month_starts:
+            row = monthly_rows.get(month_start, {})
             monthly_earnings_trend.insert(0, {
                 'month': month_start.strftime('%m/%Y'),
-                'earnings': float(earnings),
-                'lessons': lessons_count
+                'earnings': float(row.get('earnings') or 0),
+                'lessons': row.get('lessons') or 0
             })
         
         # Öğrenci başına performans
         student_performance = []
-        for student in Student.objects.all()[:10]:  # En aktif 10 öğrenci
-            student_lessons = student.lessons.filter(status='completed').count()
-            student_earnings = student.lessons.filter(
-                status='completed', payment_status='paid'
-            ).aggregate(total=Sum('lesson_fee'))['total'] or 0
-            student_pending = student.lessons.filter(
-                status='completed', payment_status='pending'
-            ).aggregate(total=Sum('lesson_fee'))['total'] or 0
+        for student in Student.objects.select_related('stats')[:10]:  # En aktif 10 öğrenci
+            student_stats = student.get_stats()
             
             completion_rate = 0
-            if student.assignments.count() > 0:
-                completion_rate = (student.assignments.filter(is_completed=True).count() / 
-                                 student.assignments.count() * 100)
+            if student_stats.total_assignments > 0:
+                completion_rate = (student_stats.completed_assignments / 
+                                 student_stats.total_assignments * 100)
             
             student_performance.append({
                 'name': f"{student.name} {student.surname}",
-                'lessons': student_lessons,
-                'earnings': float(student_earnings),
-                'pending': float(student_pending),
+                'lessons': student_stats.completed_lessons,
+                'earnings': float(student_stats.paid_total),
+                'pending': float(student_stats.pending_total),
                 'assignment_completion': round(completion_rate, 1)
             })
         
-        # Haftalık ders dağılımı
+        # Haftalık ders dağılımı - özet tablosunda tek gruplu sorgu (Django week_day: 1=Pazar, 2=Pazartesi ... 7=Cumartesi)
+        weekday_counts = dict(
+            DailyLessonRollup.objects.annotate(week_day=ExtractWeekDay('date')).order_by()
+            .values('week_day').annotate(count=Sum(ROLLUP_LESSON_COUNT)).values_list('week_day', 'count')
+        )
         weekly_distribution = []
         days = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar']
         for i, day in enumerate(days):
-            count = Lesson.objects.filter(date__week_day=i+2).count()  # Django week_day: 1=Sunday
             weekly_distribution.append({
                 'day': day,
-                'count': count
+                'count': weekday_counts.get((i + 1) % 7 + 1) or 0
             })
         
-        # En popüler ders saatleri
+        # En popüler ders saatleri - özet tablosunda saat bazında tek gruplu sorgu
+        hour_counts = dict(
+            DailyLessonRollup.objects.filter(hour__gte=8, hour__lte=20).order_by()
+            .values('hour').annotate(count=Sum(ROLLUP_LESSON_COUNT)).values_list('hour', 'count')
+        )
         popular_hours = []
         for hour in range(8, 21):  # 08:00 - 20:00 arası
-            count = Lesson.objects.filter(start_time__hour=hour).count()
+            count = hour_counts.get(hour) or 0
             if count > 0:
                 popular_hours.append({
                     'hour': f"{hour:02d}:00",
@@ -942,6 +1119,7 @@ class DashboardViewSet(viewsets.ViewSet):
         return Response(detailed_stats)
 
     @action(detail=False, methods=['get'])
+    @cached_response('upcoming-lessons', expiry=lessons_expiry)
     def upcoming_lessons(self, request):
         """Yaklaşan dersler"""
         now = timezone.now()
@@ -949,83 +1127,56 @@ class DashboardViewSet(viewsets.ViewSet):
             Q(date__gt=now.date()) | 
             Q(date=now.date(), start_time__gt=now.time()),
             status='scheduled'
-        ).select_related('student').order_by('date', 'start_time')[:10]
+        ).order_by('date', 'start_time')[:10]
         
-        serializer = LessonSerializer(upcoming, many=True)
+        serializer = LessonListSerializer(upcoming, many=True, context={'now': now})
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cached_response('today-schedule', expiry=lessons_expiry)
     def today_schedule(self, request):
         """Bugünün ders programı"""
         today = timezone.now().date()
         today_lessons = Lesson.objects.filter(
             date=today
-        ).select_related('student').order_by('start_time')
+        ).order_by('start_time')
         
-        serializer = LessonSerializer(today_lessons, many=True)
+        serializer = LessonListSerializer(today_lessons, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def earnings_report(self, request):
         """Kazanç raporu - haftalık, aylık, yıllık"""
-        from datetime import timedelta
-        from django.db.models import Sum, Count, Q
-        
         today = timezone.now().date()
         week_start = today - timedelta(days=today.weekday())
         month_start = today.replace(day=1)
         year_start = today.replace(month=1, day=1)
         
-        # Haftalık kazanç
-        weekly_earnings = Lesson.objects.filter(
-            date__gte=week_start,
-            date__lte=today,
-            status='completed',
-            payment_status='paid'
-        ).aggregate(
-            total=Sum('lesson_fee'),
-            count=Count('id')
-        )
-        
-        # Aylık kazanç
-        monthly_earnings = Lesson.objects.filter(
-            date__gte=month_start,
-            date__lte=today,
-            status='completed',
-            payment_status='paid'
-        ).aggregate(
-            total=Sum('lesson_fee'),
-            count=Count('id')
-        )
-        
-        # Yıllık kazanç
-        yearly_earnings = Lesson.objects.filter(
-            date__gte=year_start,
-            date__lte=today,
-            status='completed',
-            payment_status='paid'
-        ).aggregate(
-            total=Sum('lesson_fee'),
-            count=Count('id')
+        # Tüm dönemler tek sorguda, günlük özet tablosundan
+        def period_range(start):
+            return Q(date__gte=start, date__lte=today)
+        
+        totals = DailyLessonRollup.objects.order_by().aggregate(
+            weekly_total=Sum('paid_total', filter=period_range(week_start)),
+            weekly_count=Sum('paid_count', filter=period_range(week_start)),
+            monthly_total=Sum('paid_total', filter=period_range(month_start)),
+            monthly_count=Sum('paid_count', filter=period_range(month_start)),
+            yearly_total=Sum('paid_total', filter=period_range(year_start)),
+            yearly_count=Sum('paid_count', filter=period_range(year_start)),
+            pending_total=Sum('pending_total'),
+            pending_count=Sum('pending_count'),
+            overdue_total=Sum('overdue_total'),
+            overdue_count=Sum('overdue_count'),
         )
         
-        # Bekleyen ödemeler
-        pending_payments = Lesson.objects.filter(
-            status='completed',
-            payment_status='pending'
-        ).aggregate(
-            total=Sum('lesson_fee'),
-            count=Count('id')
-        )
+        # Haftalık, aylık, yıllık kazanç
+        weekly_earnings = {'total': totals['weekly_total'], 'count': totals['weekly_count']}
+        monthly_earnings = {'total': totals['monthly_total'], 'count': totals['monthly_count']}
+        yearly_earnings = {'total': totals['yearly_total'], 'count': totals['yearly_count']}
         
-        # Vadesi geçen ödemeler
-        overdue_payments = Lesson.objects.filter(
-            status='completed',
-            payment_status='overdue'
-        ).aggregate(
-            total=Sum('lesson_fee'),
-            count=Count('id')
-        )
+        # Bekleyen ve vadesi geçen ödemeler
+        pending_payments = {'total': totals['pending_total'], 'count': totals['pending_count']}
+        overdue_payments = {'total': totals['overdue_total'], 'count': totals['overdue_count']}
         
         return Response({
             'weekly': {
@@ -1052,3 +1203,136 @@ class DashboardViewSet(viewsets.ViewSet):
                 'lessons_count': overdue_payments['count'] or 0
             }
         })
+
+
+class CalendarViewSet(viewsets.ViewSet):
+    """
+    Takvim: ?from=YYYY-MM-DD&to=YYYY-MM-DD aralığındaki gerçek dersler ile
+    aktif haftalık programların henüz üretilmemiş (sanal) tekrarları. Ufuk ne
+    kadar uzun olursa olsun bir ders aralık sorgusu ve bir program sorgusu.
+    Sanal tekrar düzenlenmeden / tamamlanmadan / ödenmeden önce
+    POST /api/calendar/materialize/ ile gerçek derse dönüştürülür.
+    """
+    permission_classes = [IsAuthenticated]
+    CALENDAR_MAX_DAYS = 366
+
+    def list(self, request):
+        now = timezone.now()
+        try:
+            date_from = datetime.strptime(request.query_params['from'], '%Y-%m-%d').date() \
+                if request.query_params.get('from') else timezone.localdate()
+            date_to = datetime.strptime(request.query_params['to'], '%Y-%m-%d').date() \
+                if request.query_params.get('to') else date_from + timedelta(days=6)
+        except ValueError:
+            return Response({
+                'error': 'Geçersiz tarih aralığı (from, to: YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (date_to - date_from).days < self.CALENDAR_MAX_DAYS:
+            return Response({
+                'error': f'to, from tarihinden önce olamaz ve aralık en fazla {self.CALENDAR_MAX_DAYS} gün olabilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        lesson_rows = list(Lesson.objects.filter(
+            date__gte=date_from, date__lte=date_to
+        ).order_by('date', 'start_time').values(*LessonListSerializer.VALUES_FIELDS))
+        schedules = Schedule.objects.filter(is_active=True).select_related('student')
+        virtual_rows = virtual_occurrences(schedules, date_from, date_to, lesson_rows)
+
+        serializer = LessonListSerializer(context={'now': now})
+        serializer.set_now(now)
+        entries = []
+        for row in lesson_rows:
+            entries.append({**serializer.to_representation(row), 'virtual': False, 'virtual_id': None})
+        for row in virtual_rows:
+            entries.append({**serializer.to_representation(row), 'virtual': True, 'virtual_id': row['virtual_id']})
+        entries.sort(key=lambda entry: (entry['date'], entry['start_time']))
+
+        return Response({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'lessons': entries,
+        })
+
+    @action(detail=False, methods=['post'])
+    def materialize(self, request):
+        """Sanal tekrarı gerçek derse dönüştür: {"schedule": id, "date": "YYYY-MM-DD"}"""
+        try:
+            schedule = Schedule.objects.select_related('student').get(pk=request.data.get('schedule'))
+            occurrence_date = datetime.strptime(str(request.data.get('date')), '%Y-%m-%d').date()
+        except (Schedule.DoesNotExist, ValueError, TypeError):
+            return Response({
+                'error': 'Geçerli bir program (schedule) ve tarih (date: YYYY-MM-DD) gerekli'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            lesson, created = schedule.materialize_occurrence(occurrence_date)
+        except LessonConflictError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            LessonSerializer(lesson).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """
+    Mobil istemci için delta senkronizasyon: ?since=<token> sonrasında
+    oluşturulan/güncellenen kayıtlar ve silinen kayıtların id'leri.
+    Token verilmezse veya silme izlerinin saklanma süresinden eskiyse
+    tüm veri döner ve 'full': true olur (istemci yerel veriyi değiştirir).
+    """
+    permission_classes = [IsAuthenticated]
+
+    SYNC_MODELS = [
+        # (yanıt anahtarı, model adı, queryset, serializer)
+        ('students', 'student', lambda: Student.objects.with_stats(), StudentSerializer),
+        ('lessons', 'lesson', lambda: Lesson.objects.select_related('student'), LessonSerializer),
+        ('assignments', 'assignment', lambda: Assignment.objects.select_related('student'), AssignmentSerializer),
+        ('schedules', 'schedule', lambda: Schedule.objects.select_related('student'), ScheduleSerializer),
+        ('notifications', 'notification', lambda: Notification.objects.select_related('student'), NotificationSerializer),
+    ]
+
+    def list(self, request):
+        # Sorgulardan önce alınır: okuma sırasında yapılan yazmalar bir sonraki senkronizasyona kalır
+        now = timezone.now()
+        since = request.query_params.get('since')
+
+        full = True
+        if since:
+            since_time = parse_datetime(since)
+            if since_time is None or timezone.is_naive(since_time):
+                return Response({'error': 'Geçersiz senkronizasyon token\'ı'}, status=status.HTTP_400_BAD_REQUEST)
+            full = since_time < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+            changed_after = since_time - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+        # timezone.now() UTC'dir; 'Z' ile URL'de kodlanmadan da kullanılabilir
+        response = {'token': now.isoformat().replace('+00:00', 'Z'), 'full': full}
+        deleted = {}
+        tombstones = None
+        if not full:
+            tombstones = DeletionTombstone.objects.filter(deleted_at__gte=changed_after).values_list(
+                'model_name', 'object_id'
+            )
+
+        for key, model_name, queryset, serializer_class in self.SYNC_MODELS:
+            queryset = queryset()
+            if not full:
+                changed = Q(updated_at__gte=changed_after)
+                if model_name == 'student':
+                    # Ders/ödev değişiklikleri öğrencinin hesaplanan alanlarını da değiştirir
+                    changed |= Q(stats__updated_at__gte=changed_after)
+                queryset = queryset.filter(changed)
+            response[key] = serializer_class(queryset, many=True).data
+            deleted[key] = []
+
+        if tombstones is not None:
+            keys = {model_name: key for key, model_name, _, _ in self.SYNC_MODELS}
+            for model_name, object_id in tombstones:
+                if model_name in keys:
+                    deleted[keys[model_name]].append(object_id)
+        response['deleted'] = deleted
+
+        return Response(response)